@@ -1,14 +1,13 @@
 import sys
-import re
 import time
+
+
+# --profile-startup shows the window, prints how long that took and quits
+STARTED = time.perf_counter() if "--profile-startup" in sys.argv else None
+
+import re
 import datetime
-import pandas as pd
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtCore import QThread, QTimer, pyqtSignal
 from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QPushButton, QLineEdit, QTextEdit, QLabel
 
 
@@ -26,6 +25,12 @@ class ScrapeThread(QThread):
         self.finished_signal.emit(data)
 
     def scrape_autotrader(self, cars, criteria):
+        # Selenium and BeautifulSoup are slow to import, so they load when a search starts
+        from bs4 import BeautifulSoup
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from webdriver_manager.chrome import ChromeDriverManager
+
         self.log_signal.emit("Initialising webdriver...")
         service = Service(executable_path=ChromeDriverManager().install()) 
         driver = webdriver.Chrome(service=service)
@@ -203,6 +208,8 @@ class AutoTraderApp(QMainWindow):
         self.results_area.append(message)
 
     def output_data_to_excel(self, data):
+        import pandas as pd
+
         df = pd.DataFrame(data)
 
         df["price"] = df["price"].str.replace("£", "").str.replace(",", "")
@@ -287,4 +294,9 @@ if __name__ == '__main__':
     app = QApplication(sys.argv)
     window = AutoTraderApp()
     window.show()
+
+    if STARTED is not None:
+        # The first event loop pass runs once the window is on screen
+        QTimer.singleShot(0, lambda: (print(f"Window shown after {time.perf_counter() - STARTED:.3f}s."), app.quit()))
+
     sys.exit(app.exec_())
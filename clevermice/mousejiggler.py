@@ -1,9 +1,12 @@
 import sys
-import random
 import time
-import pyautogui
+
+
+# --profile-startup shows the window, prints how long that took and quits
+STARTED = time.perf_counter() if "--profile-startup" in sys.argv else None
+
+import random
 from PyQt5 import QtWidgets, QtCore
-from pynput import keyboard
 
 
 class MouseJiggler(QtCore.QThread):
@@ -42,6 +45,8 @@ class MouseJiggler(QtCore.QThread):
         self.wait()  # Wait for the thread to finish
 
     def switch_screens(self):
+        import pyautogui  # Loaded on first use; it is slow to import and not needed to show the window
+
         if not self._is_running:
             return
         max_switches = random.randint(self.min_switches, self.max_switches)
@@ -56,6 +61,8 @@ class MouseJiggler(QtCore.QThread):
         pyautogui.keyUp('alt')
 
     def wiggle_mouse(self):
+        import pyautogui
+
         if not self._is_running:
             return
         max_wiggles = random.randint(self.min_wiggles, self.max_wiggles)
@@ -70,6 +77,8 @@ class MouseJiggler(QtCore.QThread):
                 return
 
     def get_random_coords(self):
+        import pyautogui
+
         screen = pyautogui.size()
         return [random.randint(100, screen[0] - 200),
                 random.randint(100, screen[1] - 200)]
@@ -81,6 +90,9 @@ class KeyListenerThread(QtCore.QThread):
     escape_pressed = QtCore.pyqtSignal()  # Signal to notify when ESC is pressed
 
     def run(self):
+        # pynput loads here, on the listener thread, instead of delaying the window
+        from pynput import keyboard
+
         def on_press(key):
             if key == keyboard.Key.esc:
                 print("Escape key pressed.")
@@ -225,4 +237,9 @@ if __name__ == "__main__":
     app = QtWidgets.QApplication(sys.argv)
     window = AppWindow()
     window.show()
+
+    if STARTED is not None:
+        # The first event loop pass runs once the window is on screen
+        QtCore.QTimer.singleShot(0, lambda: (print(f"Window shown after {time.perf_counter() - STARTED:.3f}s."), app.quit()))
+
     sys.exit(app.exec_())
@@ -0,0 +1,125 @@
+import time
+from array import array
+
+from corpus import prepare_page
+from extract import DEFAULT_EXTRACTOR, get_extractor
+from matcher import TermMatcher
+
+
+DEFAULT_ANALYSIS_WORKERS = 0  # 0 parses and counts pages on the crawl thread
+PENDING_PER_WORKER = 4  # Pages queued or being analysed per worker before fetching waits
+
+# Each worker process builds its extractor and matcher once, in _start_worker
+_extractor = None
+_matcher = None
+
+
+def _start_worker(extractor, search_terms, case_sensitive, whole_words):
+    global _extractor, _matcher
+    _extractor = get_extractor(extractor)
+    _matcher = TermMatcher(search_terms, case_sensitive=case_sensitive, whole_words=whole_words)
+
+
+def analyze_page(html, want_links, keep_text=False, fingerprint=False):
+    """Extract and count one page in a worker process.
+
+    Only the counts, as a compact array in the matcher's term order, the
+    page's links and how long parsing and counting took are sent back,
+    never the page text. With ``keep_text`` the text is also compressed and
+    indexed for the ``PageCorpus`` here, and that is sent back instead.
+    With ``fingerprint`` the text's simhash is sent back too.
+    """
+    if fingerprint:
+        # Only loaded when the crawl looks for near-duplicates
+        from duplicates import simhash
+
+    start = time.perf_counter()
+    text, links = _extractor.extract(html)
+    parsed = time.perf_counter()
+    counts = array("l", _matcher.count_vector(text))
+    timings = (parsed - start, time.perf_counter() - parsed)
+    return (
+        counts,
+        links if want_links else [],
+        timings,
+        prepare_page(text) if keep_text else None,
+        simhash(text) if fingerprint else None,
+    )
+
+
+class AnalysisPool:
+    """Parses pages and counts their terms in worker processes.
+
+    Extracting text and matching terms is CPU bound, so on the crawl thread
+    it is held to one core by the GIL however many pages are fetched at
+    once. Here the fetch stage hands raw HTML to a ``ProcessPoolExecutor``
+    and carries on fetching, and finished analyses are collected as
+    ``(item, analysis, error)``, where ``item`` is whatever was submitted
+    with the page and ``analysis`` is ``(counts, links, timings, stored,
+    fingerprint)``, with the seconds spent parsing and counting in
+    ``timings``, the page prepared for the corpus, if asked for, in
+    ``stored`` and its simhash, if asked for, in ``fingerprint``. At most
+    ``max_pending`` pages are queued or being analysed: ``submit`` waits for
+    one to finish when the queue is full, so a slow analysis stage holds
+    fetching back instead of letting pages pile up in memory.
+    """
+
+    def __init__(
+        self,
+        workers,
+        search_terms,
+        extractor=DEFAULT_EXTRACTOR,
+        case_sensitive=False,
+        whole_words=False,
+        max_pending=None,
+    ):
+        # multiprocessing and concurrent.futures are only loaded once a run asks for worker processes
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        self.max_pending = max_pending or workers * PENDING_PER_WORKER
+        # Spawned rather than forked, since the crawl runs alongside other threads
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_start_worker,
+            initargs=(extractor, list(search_terms), case_sensitive, whole_words),
+        )
+        self._pending = {}
+
+    def submit(self, item, html, want_links=True, keep_text=False, fingerprint=False):
+        """Queue a page and return any analyses that have finished, waiting for one if the queue is full."""
+        future = self._executor.submit(analyze_page, html, want_links, keep_text, fingerprint)
+        self._pending[future] = item
+        return self.collect(timeout=None if len(self._pending) >= self.max_pending else 0)
+
+    def collect(self, timeout=0):
+        """Return the analyses that have finished, waiting up to ``timeout`` seconds (None for no limit) for one."""
+        from concurrent.futures import FIRST_COMPLETED, wait
+
+        if not self._pending:
+            return []
+        done, _ = wait(self._pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        results = []
+        for future in done:
+            item = self._pending.pop(future)
+            try:
+                results.append((item, future.result(), None))
+            except Exception as e:
+                results.append((item, None, e))
+        return results
+
+    def drain(self):
+        """Wait for every queued page and return all their analyses."""
+        results = []
+        while self._pending:
+            results.extend(self.collect(timeout=None))
+        return results
+
+    def __len__(self):
+        return len(self._pending)
+
+    def close(self):
+        # Anything still queued was fetched but won't be counted; a resumed crawl fetches it again
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._pending.clear()
@@ -0,0 +1,93 @@
+"""Compare parsing and counting pages on one thread with the AnalysisPool.
+
+Synthetic news-style pages are analysed the way a crawl does it: in this
+process, as with 'Parse processes' off, and then through worker pools of
+increasing size. Fetching is left out, so the numbers show how much
+analysis throughput the extra cores add.
+
+Usage:
+    python benchmarks/bench_analysis.py                    # 2000 pages, 1 to all cores
+    python benchmarks/bench_analysis.py --pages 5000 --workers 4 8 16
+    python benchmarks/bench_analysis.py --parser stream --page-kb 200
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis import AnalysisPool  # noqa: E402
+from extract import DEFAULT_EXTRACTOR, available_extractors, get_extractor  # noqa: E402
+from matcher import TermMatcher  # noqa: E402
+
+WORDS = (
+    "council housing budget election minister report health school transport policy market energy climate "
+    "police court weather football growth inflation crime hospital planning railway"
+).split()
+TERMS = ["housing", "climate change", "inflation", "railway", "local elections"]
+
+
+def synthetic_page(index, size):
+    paragraphs = []
+    length = 0
+    while length < size:
+        text = " ".join(random.choice(WORDS) for _ in range(60))
+        paragraphs.append(f"<p>{text} <a href='/story/{index}-{length}'>more</a></p>")
+        length += len(paragraphs[-1])
+    return (
+        f"<html><head><title>Story {index}</title><script>var x = {index};</script></head>"
+        f"<body><nav><a href='/'>Home</a></nav>{''.join(paragraphs)}</body></html>"
+    )
+
+
+def in_process(pages, parser):
+    extractor = get_extractor(parser)
+    matcher = TermMatcher(TERMS)
+    for html in pages:
+        text, links = extractor.extract(html)
+        matcher.count_vector(text)
+
+
+def with_pool(pages, parser, workers):
+    pool = AnalysisPool(workers, TERMS, extractor=parser)
+    try:
+        # Warm the workers up so process start up isn't timed
+        pool.submit(0, pages[0])
+        pool.drain()
+        start = time.perf_counter()
+        for index, html in enumerate(pages):
+            pool.submit(index, html)
+        pool.drain()
+        return time.perf_counter() - start
+    finally:
+        pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--page-kb", type=int, default=80, help="Approximate size of each page")
+    parser.add_argument("--workers", type=int, nargs="+", help="Pool sizes to try (default: 1, 2, 4... up to the cores)")
+    parser.add_argument("--parser", choices=[DEFAULT_EXTRACTOR] + available_extractors(), default=DEFAULT_EXTRACTOR)
+    args = parser.parse_args()
+
+    random.seed(0)
+    pages = [synthetic_page(index, args.page_kb * 1024) for index in range(args.pages)]
+    cores = os.cpu_count() or 1
+    workers = args.workers or sorted({min(cores, 2 ** power) for power in range(cores.bit_length() + 1)})
+
+    print(f"{args.pages} pages of about {args.page_kb} KB, parser {args.parser}, {cores} cores")
+    print(f"{'analysis':<14} {'seconds':>9} {'pages/s':>9}")
+    start = time.perf_counter()
+    in_process(pages, args.parser)
+    elapsed = time.perf_counter() - start
+    print(f"{'in process':<14} {elapsed:9.2f} {args.pages / elapsed:9.0f}")
+    for count in workers:
+        elapsed = with_pool(pages, args.parser, count)
+        print(f"{f'{count} workers':<14} {elapsed:9.2f} {args.pages / elapsed:9.0f}")
+
+
+if __name__ == "__main__":
+    main()
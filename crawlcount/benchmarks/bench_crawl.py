@@ -0,0 +1,331 @@
+"""Measure crawl throughput against a generated site served on this machine.
+
+A synthetic site is served from local ports, one per host, in its own
+process. Pages link on to ``--fanout`` others, so a deep crawl from the
+first page reaches them all, plus a few links back to pages already seen.
+Each response can be delayed (``--latency``, and ``--slow-latency`` on
+the first ``--slow-hosts`` hosts) or fail with a 503 (``--error-rate``).
+Nothing leaves the machine, so runs are repeatable and work offline.
+
+Each workload runs in a fresh process through the same Crawler the app
+uses: "scrape" fetches every page from a URL list and "deep-crawl" follows
+links from the first page. The report has pages/s, fetch latency
+percentiles, peak memory and CPU time, and is saved as JSON so a later run
+can be compared with ``--compare``. With ``--workers`` the analysis worker
+processes' CPU time and the largest one's peak memory are reported
+separately from the crawl process's own.
+
+Usage:
+    python benchmarks/bench_crawl.py                              # 500 pages, both workloads
+    python benchmarks/bench_crawl.py --pages 2000 --page-kb 80 --latency 50 --concurrency 20
+    python benchmarks/bench_crawl.py --workloads deep-crawl --error-rate 0.05 --slow-hosts 2
+    python benchmarks/bench_crawl.py --json after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import DEFAULT_CONCURRENCY, DEFAULT_PER_HOST, Crawler, CrawlSettings  # noqa: E402
+from extract import DEFAULT_EXTRACTOR, available_extractors  # noqa: E402
+
+WORDS = (
+    "council housing budget election minister report health school transport policy market energy climate "
+    "police court weather football growth inflation crime hospital planning railway"
+).split()
+TERMS = ["housing", "climate change", "inflation", "railway", "local elections"]
+WORKLOADS = ("scrape", "deep-crawl")
+BACK_LINKS = 3  # Links per page to pages crawled earlier, so the frontier has duplicates to drop
+
+
+class SyntheticSite:
+    """Page ``index`` lives on host ``index % hosts`` and links to pages ``index * fanout + 1`` onwards."""
+
+    def __init__(self, pages, page_kb, fanout, hosts):
+        self.pages = pages
+        self.page_kb = page_kb
+        self.fanout = fanout
+        self.hosts = hosts
+        self.ports = []
+
+    def url(self, index):
+        return f"http://127.0.0.1:{self.ports[index % self.hosts]}/page/{index}.html"
+
+    def page(self, index):
+        rng = random.Random(index)
+        links = [self.url(child) for child in range(index * self.fanout + 1, (index + 1) * self.fanout + 1)
+                 if child < self.pages]
+        links += [self.url(rng.randrange(index + 1)) for _ in range(BACK_LINKS)]
+        paragraphs = []
+        length = 0
+        while length < self.page_kb * 1024:
+            text = " ".join(rng.choice(WORDS) for _ in range(60))
+            paragraphs.append(f"<p>{text}</p>")
+            length += len(paragraphs[-1])
+        anchors = "".join(f"<li><a href='{link}'>Story</a></li>" for link in links)
+        return (
+            f"<html><head><title>Story {index}</title><script>var story = {index};</script></head>"
+            f"<body><nav><ul>{anchors}</ul></nav><article>{''.join(paragraphs)}</article></body></html>"
+        ).encode("utf-8")
+
+
+def serve(config):
+    """Serve the site until stdin closes. Prints the ports, one per host, once listening."""
+    site = SyntheticSite(config["pages"], config["page_kb"], config["fanout"], config["hosts"])
+    errors = random.Random(0)
+    errors_lock = threading.Lock()
+
+    def handler_for(host):
+        latency = (config["slow_latency"] if host < config["slow_hosts"] else config["latency"]) / 1000
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, as real sites allow
+
+            def do_GET(self):
+                time.sleep(latency)
+                with errors_lock:
+                    failed = errors.random() < config["error_rate"]
+                name = self.path.rsplit("/", 1)[-1]
+                if failed or not name.endswith(".html") or not name[:-5].isdigit() or int(name[:-5]) >= site.pages:
+                    self.send_response(503 if failed else 404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = site.page(int(name[:-5]))
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    servers = [ThreadingHTTPServer(("127.0.0.1", 0), handler_for(host)) for host in range(site.hosts)]
+    site.ports = [server.server_address[1] for server in servers]
+    for server in servers:
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(json.dumps(site.ports), flush=True)
+    sys.stdin.read()
+
+
+class TimedCrawler(Crawler):
+    """A Crawler that records how long each page fetch took, retries included."""
+
+    def open_http(self):
+        super().open_http()
+        self.latencies = []
+        fetch_html = self.http.fetch_html
+
+        def timed_fetch(url):
+            start = time.perf_counter()
+            try:
+                return fetch_html(url)
+            finally:
+                self.latencies.append(time.perf_counter() - start)
+
+        self.http.fetch_html = timed_fetch
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def cpu_seconds(before, after):
+    return (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+
+
+def megabytes(maxrss):
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+
+
+def run_child(workload, config):
+    site = SyntheticSite(config["pages"], config["page_kb"], config["fanout"], config["hosts"])
+    site.ports = config["ports"]
+    settings = CrawlSettings(
+        concurrency=config["concurrency"],
+        per_host=config["per_host"],
+        host_rate=config["host_rate"],
+        use_cache=False,
+        extractor=config["parser"],
+        analysis_workers=config["workers"],
+        max_depth=1000,
+        retry_delay=0.1,
+    )
+    crawler = TimedCrawler(TERMS, settings)
+    before = resource.getrusage(resource.RUSAGE_SELF)
+    workers_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.perf_counter()
+    if workload == "scrape":
+        summary = crawler.scrape([site.url(index) for index in range(site.pages)])
+    else:
+        summary = crawler.deep_crawl([site.url(0)])
+    elapsed = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_SELF)
+    # The crawler has shut its analysis pool down and waited for the workers, so their usage is in here
+    workers_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    pages = len(crawler.matrix)
+    print(json.dumps({
+        "pages": pages,
+        "seconds": elapsed,
+        "pages_per_second": pages / elapsed if elapsed else 0,
+        "p50_ms": percentile(crawler.latencies, 0.5) * 1000,
+        "p95_ms": percentile(crawler.latencies, 0.95) * 1000,
+        "mean_ms": statistics.fmean(crawler.latencies) * 1000 if crawler.latencies else 0,
+        "cpu_seconds": cpu_seconds(before, after),
+        "peak_mb": megabytes(after.ru_maxrss),
+        "worker_cpu_seconds": cpu_seconds(workers_before, workers_after),
+        "worker_peak_mb": megabytes(workers_after.ru_maxrss),
+        "failures": summary["http"]["failures"],
+        "retries": summary["http"]["retries"],
+    }))
+
+
+def measure(workload, config):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", workload, json.dumps(config)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_row(name, result, previous=None):
+    line = (
+        f"{name:<12} {result['pages']:>6} {result['pages_per_second']:9.1f} {result['p50_ms']:8.1f} "
+        f"{result['p95_ms']:8.1f} {result['cpu_seconds']:8.2f} {result['peak_mb']:8.1f} "
+        f"{result['worker_cpu_seconds']:8.2f} {result['worker_peak_mb']:8.1f} {result['failures']:>6}"
+    )
+    if previous:
+        change = (result["pages_per_second"] / previous["pages_per_second"] - 1) * 100
+        line += f"   {change:+.1f}% pages/s vs {previous['pages_per_second']:.1f}"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--page-kb", type=int, default=40, help="Approximate size of each page")
+    parser.add_argument("--fanout", type=int, default=8, help="New pages each page links to")
+    parser.add_argument("--hosts", type=int, default=4, help="Hosts (local ports) the pages are spread over")
+    parser.add_argument("--latency", type=float, default=20, help="Milliseconds before each response")
+    parser.add_argument("--slow-hosts", type=int, default=1, help="Hosts that answer after --slow-latency instead")
+    parser.add_argument("--slow-latency", type=float, default=250, help="Milliseconds")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Share of requests answered with a 503")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST)
+    parser.add_argument("--host-rate", type=float, default=0, help="Requests/s per host, 0 for no limit")
+    parser.add_argument("--workers", type=int, default=0, help="Parse processes")
+    parser.add_argument("--parser", choices=[DEFAULT_EXTRACTOR] + available_extractors(), default=DEFAULT_EXTRACTOR)
+    parser.add_argument("--json", help="Save the results here (default: bench_crawl-<date>.json)")
+    parser.add_argument("--compare", help="Results JSON of an earlier run to compare with")
+    parser.add_argument("--serve", help=argparse.SUPPRESS)
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(json.loads(args.serve))
+        return
+    if args.child:
+        run_child(args.child[0], json.loads(args.child[1]))
+        return
+
+    config = {
+        "pages": args.pages,
+        "page_kb": args.page_kb,
+        "fanout": args.fanout,
+        "hosts": args.hosts,
+        "latency": args.latency,
+        "slow_hosts": args.slow_hosts,
+        "slow_latency": args.slow_latency,
+        "error_rate": args.error_rate,
+        "concurrency": args.concurrency,
+        "per_host": args.per_host,
+        "host_rate": args.host_rate,
+        "workers": args.workers,
+        "parser": args.parser,
+    }
+    previous = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            previous = json.load(file)["results"]
+
+    server = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", json.dumps(config)],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    results = {}
+    try:
+        config["ports"] = json.loads(server.stdout.readline())
+        print(
+            f"{args.pages} pages of about {args.page_kb} KB on {args.hosts} hosts, fan-out {args.fanout}, "
+            f"{args.latency:g} ms latency ({args.slow_hosts} hosts at {args.slow_latency:g} ms), "
+            f"{args.error_rate:.0%} errors"
+        )
+        print(
+            f"{'workload':<12} {'pages':>6} {'pages/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'CPU s':>8} {'peak MB':>8} "
+            f"{'wkr CPU':>8} {'wkr MB':>8} {'failed':>6}"
+        )
+        for workload in args.workloads:
+            results[workload] = measure(workload, config)
+            print_row(workload, results[workload], previous.get(workload))
+    finally:
+        server.stdin.close()
+        server.wait()
+
+    path = args.json or f"bench_crawl-{datetime.now():%Y%m%d-%H%M%S}.json"
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(
+            {
+                "date": datetime.now().isoformat(timespec="seconds"),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "config": {name: value for name, value in config.items() if name != "ports"},
+                "results": results,
+            },
+            file,
+            indent=2,
+        )
+    print(f"Saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Compare the write-only Excel export with the previous in-memory one.
+
+Synthetic results files are generated with the requested number of Detailed
+rows (URLs x search terms) and each exporter runs in its own process, so its
+peak memory can be measured on its own.
+
+Usage:
+    python benchmarks/bench_excel.py                      # 100k and 1M rows
+    python benchmarks/bench_excel.py --rows 10000 100000 --terms 10
+    python benchmarks/bench_excel.py --legacy-max-rows 0  # skip the slow in-memory export
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from counts import CountMatrix  # noqa: E402
+from exports import export_excel  # noqa: E402
+from sinks import ResultWriter, read_results  # noqa: E402
+
+
+def write_synthetic_results(path, rows, terms):
+    search_terms = [f"search term {index}" for index in range(terms)]
+    with ResultWriter(path, flush_interval=60) as sink:
+        for index in range(max(1, rows // terms)):
+            url = f"https://site{index % 500}.example.com/section/{index // 500}/page-{index}.html"
+            sink.write(url, {term: (index * 7 + offset) % 23 for offset, term in enumerate(search_terms)})
+
+
+def legacy_export_excel(results_path, file_path):
+    """The export before write-only mode: a normal Workbook, styled and measured cell by cell."""
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    wb.remove(wb["Sheet"])
+    summary_ws = wb.create_sheet(title="Summary")
+    summary_ws.append(["Base Domain", "Total Count"])
+    domain_counts = {}
+    for url, term_counts in read_results(results_path):
+        domain = urlparse(url).netloc
+        domain_counts[domain] = domain_counts.get(domain, 0) + sum(term_counts.values())
+    for domain, count in domain_counts.items():
+        summary_ws.append(["https://" + domain, count])
+    for row in summary_ws.iter_rows(min_row=2, max_col=1):
+        for cell in row:
+            cell.hyperlink = cell.value
+            cell.style = "Hyperlink"
+
+    detailed_ws = wb.create_sheet(title="Detailed")
+    detailed_ws.append(["URL", "Search Term", "Count"])
+    for url, term_counts in read_results(results_path):
+        for term, count in term_counts.items():
+            detailed_ws.append([url, term, count])
+    for row in detailed_ws.iter_rows(min_row=2, max_col=1):
+        for cell in row:
+            cell.hyperlink = cell.value
+            cell.style = "Hyperlink"
+
+    for ws in [summary_ws, detailed_ws]:
+        for col in ws.columns:
+            max_length = max(len(str(cell.value)) for cell in col)
+            ws.column_dimensions[col[0].column_letter].width = max_length + 2
+    wb.save(file_path)
+
+
+def matrix_export_excel(results_path, file_path):
+    export_excel(CountMatrix.from_results(results_path), file_path)
+
+
+EXPORTERS = {"legacy": legacy_export_excel, "write-only": matrix_export_excel}
+
+
+def run_child(exporter, results_path, file_path):
+    start = time.perf_counter()
+    EXPORTERS[exporter](results_path, file_path)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    print(json.dumps({"seconds": time.perf_counter() - start, "peak_mb": peak_mb}))
+
+
+def measure(exporter, results_path, file_path):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", exporter, results_path, file_path],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000], help="Detailed rows per run")
+    parser.add_argument("--terms", type=int, default=5, help="Search terms per URL")
+    parser.add_argument(
+        "--legacy-max-rows", type=int, default=200_000, help="Skip the in-memory export above this many rows"
+    )
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    print(f"{'rows':>10} {'exporter':<11} {'seconds':>9} {'peak MB':>9} {'file MB':>9}")
+    with tempfile.TemporaryDirectory() as folder:
+        for rows in args.rows:
+            results_path = os.path.join(folder, f"results-{rows}.jsonl")
+            write_synthetic_results(results_path, rows, args.terms)
+            for exporter in EXPORTERS:
+                if exporter == "legacy" and rows > args.legacy_max_rows:
+                    print(f"{rows:>10} {exporter:<11} {'skipped (see --legacy-max-rows)':>29}")
+                    continue
+                file_path = os.path.join(folder, f"{exporter}-{rows}.xlsx")
+                result = measure(exporter, results_path, file_path)
+                size_mb = os.path.getsize(file_path) / (1024 * 1024)
+                print(f"{rows:>10} {exporter:<11} {result['seconds']:9.2f} {result['peak_mb']:9.1f} {size_mb:9.1f}")
+                os.remove(file_path)
+
+
+if __name__ == "__main__":
+    main()
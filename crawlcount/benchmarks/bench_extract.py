@@ -0,0 +1,100 @@
+"""Compare the text extraction backends on saved HTML pages.
+
+Usage:
+    python benchmarks/bench_extract.py pages/            # every .html file in a folder
+    python benchmarks/bench_extract.py a.html b.html
+    python benchmarks/bench_extract.py --download pages/ # save the terms.csv URLs first
+"""
+import argparse
+import csv
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extract import available_extractors, get_extractor  # noqa: E402
+
+
+def download_pages(folder, csv_path):
+    from httpclient import HttpClient
+
+    os.makedirs(folder, exist_ok=True)
+    client = HttpClient()
+    with open(csv_path, "r", encoding="utf-8") as csvfile:
+        urls = [row["urls"].strip() for row in csv.DictReader(csvfile) if row.get("urls", "").strip()]
+    for index, url in enumerate(urls):
+        try:
+            html = client.fetch_html(url)
+        except Exception as e:
+            print(f"Skipped {url}: {e}")
+            continue
+        path = os.path.join(folder, f"page_{index:03d}.html")
+        with open(path, "w", encoding="utf-8") as htmlfile:
+            htmlfile.write(html)
+        print(f"Saved {url} to {path}")
+    client.close()
+
+
+def load_pages(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.htm*"))))
+        else:
+            files.append(path)
+    pages = []
+    for path in files:
+        with open(path, "r", encoding="utf-8", errors="replace") as htmlfile:
+            pages.append(htmlfile.read())
+    return pages
+
+
+def bench(name, pages, repeat):
+    extractor = get_extractor(name)
+    text_chars = 0
+    links = 0
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text_chars = 0
+        links = 0
+        for html in pages:
+            text, page_links = extractor.extract(html)
+            text_chars += len(text)
+            links += len(page_links)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, text_chars, links
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help="HTML files or folders of saved pages")
+    parser.add_argument("--download", metavar="FOLDER", help="Save the pages listed in a urls,terms CSV to FOLDER first")
+    parser.add_argument("--csv", default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "terms.csv"))
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per backend; the fastest is reported")
+    args = parser.parse_args()
+
+    paths = list(args.paths)
+    if args.download:
+        download_pages(args.download, args.csv)
+        paths.append(args.download)
+    pages = load_pages(paths)
+    if not pages:
+        parser.error("No pages to benchmark. Pass HTML files or use --download.")
+
+    total_mb = sum(len(html) for html in pages) / (1024 * 1024)
+    print(f"{len(pages)} pages, {total_mb:.1f} MB of HTML, best of {args.repeat} runs\n")
+    print(f"{'backend':<8} {'seconds':>8} {'pages/s':>9} {'MB/s':>7} {'text chars':>11} {'links':>7}")
+    for name in available_extractors():
+        elapsed, text_chars, links = bench(name, pages, args.repeat)
+        print(
+            f"{name:<8} {elapsed:>8.3f} {len(pages) / elapsed:>9.1f} {total_mb / elapsed:>7.1f} "
+            f"{text_chars:>11} {links:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Measure time to first window for the allotment apps.
+
+Each app is started with --profile-startup, which shows the window, prints
+how long that took (with an import report, for crawlcount) and quits. The time from launching the process to the
+report appearing is the time to first window, including interpreter start
+up (or unpacking, for a PyInstaller one-file build).
+
+Usage:
+    python benchmarks/bench_startup.py                    # crawlcount, autoscraper and mousejiggler
+    python benchmarks/bench_startup.py --repeat 10 --report
+    python benchmarks/bench_startup.py --exe dist/crawlcount   # a built executable
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+APPS = {
+    "crawlcount": os.path.join(REPO, "crawlcount", "crawlcount.py"),
+    "autoscraper": os.path.join(REPO, "autoscraper", "autoscraper.py"),
+    "mousejiggler": os.path.join(REPO, "clevermice", "mousejiggler.py"),
+}
+
+
+def time_to_window(command, env):
+    """Seconds until the app prints its startup report, and the report itself."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        command + ["--profile-startup"],
+        cwd=os.path.dirname(command[-1]) or None,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    elapsed = time.perf_counter() - start
+    if "Window shown after" not in result.stdout:
+        raise RuntimeError(f"{' '.join(command)} didn't report its startup:\n{result.stderr.strip()}")
+    return elapsed, result.stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", action="append", choices=sorted(APPS), help="Only these apps (repeatable)")
+    parser.add_argument("--exe", action="append", default=[], help="A built executable to time instead (repeatable)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--report", action="store_true", help="Print the import report from the last run of each app")
+    args = parser.parse_args()
+
+    if args.exe:
+        commands = {os.path.basename(exe): [os.path.abspath(exe)] for exe in args.exe}
+    else:
+        commands = {name: [sys.executable, APPS[name]] for name in args.app or APPS}
+
+    # Windows are drawn off screen unless a platform was chosen
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    print(f"{'app':<14} {'median':>8} {'min':>8} {'max':>8}  (seconds to first window, {args.repeat} runs)")
+    for name, command in commands.items():
+        try:
+            runs = [time_to_window(command, env) for _ in range(args.repeat)]
+        except (RuntimeError, subprocess.TimeoutExpired) as e:
+            print(f"{name:<14} failed: {e}")
+            continue
+        times = [elapsed for elapsed, _ in runs]
+        print(f"{name:<14} {statistics.median(times):8.3f} {min(times):8.3f} {max(times):8.3f}")
+        if args.report:
+            print(runs[-1][1])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from urls import normalize_url
+
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".crawlcount", "cache.sqlite3")
+DEFAULT_CACHE_TTL = 24 * 60 * 60  # Seconds before a cached page is revalidated
+DEFAULT_CACHE_MAX_MB = 500
+
+
+class CachedPage:
+    def __init__(self, body, etag, last_modified, fetched_at):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    def is_fresh(self, ttl):
+        return time.time() - self.fetched_at < ttl
+
+    def validators(self):
+        """Conditional request headers that let the server answer 304 Not Modified."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """A persistent, size-limited page cache stored in a SQLite file.
+
+    Pages are keyed by normalized URL and by the fetch path that produced
+    them ("requests" or "selenium"), since rendered and raw HTML differ.
+    Bodies are zlib-compressed. When the cache grows past ``max_bytes`` the
+    least recently used pages are evicted. Safe to share between threads.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_CACHE_TTL, max_bytes=DEFAULT_CACHE_MAX_MB * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evicted = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT NOT NULL,
+                source TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                body BLOB NOT NULL,
+                PRIMARY KEY (url, source)
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at)")
+        self._db.commit()
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    def get(self, url, source="requests"):
+        key = normalize_url(url)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM pages WHERE url = ? AND source = ?",
+                (key, source),
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE pages SET accessed_at = ? WHERE url = ? AND source = ?",
+                (time.time(), key, source),
+            )
+            self._db.commit()
+        body, etag, last_modified, fetched_at = row
+        return CachedPage(zlib.decompress(body).decode("utf-8"), etag, last_modified, fetched_at)
+
+    def put(self, url, body, etag=None, last_modified=None, source="requests"):
+        key = normalize_url(url)
+        compressed = zlib.compress(body.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            old = self._db.execute(
+                "SELECT size FROM pages WHERE url = ? AND source = ?", (key, source)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, source, etag, last_modified, now, now, len(compressed), compressed),
+            )
+            self._size += len(compressed) - (old[0] if old else 0)
+            self._evict()
+            self._db.commit()
+
+    def refresh(self, url, source="requests"):
+        """Mark a cached page as fresh again after a 304 Not Modified."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url = ? AND source = ?",
+                (now, now, normalize_url(url), source),
+            )
+            self._db.commit()
+
+    def _evict(self):
+        while self._size > self.max_bytes:
+            rows = self._db.execute(
+                "SELECT url, source, size FROM pages ORDER BY accessed_at LIMIT 100"
+            ).fetchall()
+            if not rows:
+                self._size = 0
+                return
+            for url, source, size in rows:
+                self._db.execute("DELETE FROM pages WHERE url = ? AND source = ?", (url, source))
+                self._size -= size
+                self.evicted += 1
+                if self._size <= self.max_bytes:
+                    return
+
+    def count(self, stat):
+        """Add one to a hit, revalidated or miss counter."""
+        with self._lock:
+            setattr(self, stat, getattr(self, stat) + 1)
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM pages")
+            self._db.commit()
+            self._size = 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "evicted": self.evicted,
+            "size_bytes": self._size,
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,384 @@
+"""Run CrawlCount without the window, e.g. from cron or on a headless server.
+
+Usage:
+    python cli.py terms.csv -o results.xlsx
+    python cli.py terms.csv --mode deep-crawl --max-depth 2 --scope same-domain -o results.jsonl
+    python cli.py terms.csv --mode deep-crawl --discovery sitemaps --sitemap-max-age 7 -o recent.csv
+    python cli.py terms.csv --mode deep-crawl --checkpoint crawl.sqlite3 --resume --max-pages 5000 -o results.csv
+    python cli.py terms.csv --mode deep-crawl --near-duplicates skip --duplicate-similarity 90 -o results.csv
+    python cli.py terms.csv --mode coordinator --queue redis://queuehost:6379 --max-pages 50000 -o results.csv
+    python cli.py --mode worker --queue redis://queuehost:6379
+    python cli.py terms.csv --mode deep-crawl --corpus pages.sqlite3 -o results.csv
+    python cli.py new-terms.csv --mode recount --corpus pages.sqlite3 -o recount.csv
+
+The input is the same 'urls,terms' CSV the Upload CSV button reads. The
+output format follows the file extension: .csv, .jsonl or .xlsx. Several
+jobs can run side by side; give each its own --cache and --checkpoint
+file if they shouldn't share them.
+
+A deep crawl can also be spread over several machines. The coordinator
+queues the starting URLs in a shared --queue, a Redis server or, for
+workers on one machine, a SQLite file, then waits and saves the results.
+Workers, started anywhere the queue can be reached, take the crawl's
+terms and settings from the queue and crawl until it is finished.
+
+With --corpus the text of every page is kept, and --mode recount counts
+the terms of a new CSV (its URLs aren't needed) in the pages of the last
+run that kept them, in seconds and without fetching anything.
+
+Exit status is 0 on success, 1 if the crawl failed and 130 if interrupted.
+"""
+import argparse
+import os
+import signal
+import sys
+import time
+
+from analysis import DEFAULT_ANALYSIS_WORKERS
+from cache import DEFAULT_CACHE_PATH, DEFAULT_CACHE_TTL
+from corpus import DEFAULT_CORPUS_PATH
+from crawlstate import DEFAULT_CHECKPOINT_INTERVAL, CrawlStore
+from distributed import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_JOB,
+    DEFAULT_JOB_WAIT,
+    DEFAULT_LEASE,
+    CrawlWorker,
+    default_worker_id,
+    job_matrix,
+    open_queue,
+    start_job,
+    wait_for_job,
+)
+from duplicates import DEFAULT_DUPLICATE_SIMILARITY, DEFAULT_NEAR_DUPLICATES, NEAR_DUPLICATE_MODES
+from engine import DEFAULT_CONCURRENCY, DEFAULT_PER_HOST, CrawlSettings, CrawlListener, Crawler, RunControl
+from exports import export_format, export_results, read_input_csv
+from extract import DEFAULT_EXTRACTOR, available_extractors
+from frontier import DEFAULT_MAX_DEPTH
+from httpclient import DEFAULT_MAX_PAGE_BYTES
+from politeness import DEFAULT_HOST_RATE
+from report import format_duplicate_stats, format_http_stats, format_summary
+from scope import DEFAULT_SCOPE, SCOPE_RULES
+from sinks import RESULT_FORMATS, ResultWriter, new_results_path
+from sitemaps import DEFAULT_DISCOVERY, DISCOVERY_MODES
+
+
+class ConsoleListener(CrawlListener):
+    """Prints messages, and with ``verbose`` every result, to stderr."""
+
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+
+    def message(self, text):
+        print(text, file=sys.stderr)
+
+    def result(self, url, term_counts):
+        if self.verbose:
+            print(f"{sum(term_counts.values())} matches for {url}", file=sys.stderr)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Count search terms on web pages without the CrawlCount window.")
+    parser.add_argument("input", nargs="?", help="CSV file with 'urls' and 'terms' columns (not needed by workers)")
+    parser.add_argument("-o", "--output", help="Output file: .csv, .jsonl or .xlsx (not needed by workers)")
+    parser.add_argument("--mode", choices=["scrape", "deep-crawl", "recount", "coordinator", "worker"], default="scrape")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Print every result as it is counted")
+
+    matching = parser.add_argument_group("matching")
+    matching.add_argument("--match-case", action="store_true")
+    matching.add_argument("--whole-words", action="store_true")
+    matching.add_argument("--parser", choices=[DEFAULT_EXTRACTOR] + available_extractors(), default=DEFAULT_EXTRACTOR)
+    matching.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_ANALYSIS_WORKERS,
+        help="Processes that parse and count pages while fetching carries on, 0 to do it in this process",
+    )
+
+    fetching = parser.add_argument_group("fetching")
+    fetching.add_argument("--selenium", action="store_true", help="Render pages in headless browsers")
+    fetching.add_argument("--sequential", action="store_true", help="Fetch one URL at a time")
+    fetching.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    fetching.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST)
+    fetching.add_argument("--host-rate", type=float, default=DEFAULT_HOST_RATE, help="Requests/s per host, 0 for no limit")
+    fetching.add_argument(
+        "--max-page-mb",
+        type=float,
+        default=DEFAULT_MAX_PAGE_BYTES / (1024 * 1024),
+        help="Stop downloading a page after this many MB, 0 for no limit",
+    )
+    fetching.add_argument("--no-cache", action="store_true", help="Always download pages")
+    fetching.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="Page cache file")
+    fetching.add_argument("--cache-ttl", type=float, default=DEFAULT_CACHE_TTL / 3600, help="Hours before recheck")
+    fetching.add_argument(
+        "--corpus",
+        default="",
+        help=f"Keep every page's text in this file for --mode recount, which reads {DEFAULT_CORPUS_PATH} by default",
+    )
+    fetching.add_argument("--metrics", default="", help="Save every page's status, size and timings to this CSV file")
+    fetching.add_argument(
+        "--metrics-port",
+        type=int,
+        default=0,
+        help="Serve timing histograms for Prometheus at http://127.0.0.1:PORT/metrics while the run lasts",
+    )
+
+    crawling = parser.add_argument_group("deep crawl")
+    crawling.add_argument("--max-depth", type=int, default=DEFAULT_MAX_DEPTH)
+    crawling.add_argument("--scope", choices=SCOPE_RULES, default=DEFAULT_SCOPE)
+    crawling.add_argument("--allowlist", default="", help="Comma separated domains for --scope allowlist")
+    crawling.add_argument("--max-pages", type=int, default=0)
+    crawling.add_argument("--max-pages-per-host", type=int, default=0)
+    crawling.add_argument("--time-limit", type=float, default=0, help="Minutes")
+    crawling.add_argument(
+        "--discovery",
+        choices=DISCOVERY_MODES,
+        default=DEFAULT_DISCOVERY,
+        help="Find pages by following links, from the sites' sitemaps, or both",
+    )
+    crawling.add_argument("--sitemap-max-age", type=float, default=0, help="Days; skip older sitemap entries")
+    crawling.add_argument(
+        "--near-duplicates",
+        choices=NEAR_DUPLICATE_MODES,
+        default=DEFAULT_NEAR_DUPLICATES,
+        help="Skip or flag pages nearly the same as one already crawled, such as print and AMP versions; "
+        "their links aren't followed either way",
+    )
+    crawling.add_argument(
+        "--duplicate-similarity",
+        type=float,
+        default=DEFAULT_DUPLICATE_SIMILARITY * 100,
+        help="Percent alike two pages' fingerprints must be to count as near-duplicates",
+    )
+    crawling.add_argument("--obey-robots", action="store_true", help="Skip pages robots.txt disallows")
+    crawling.add_argument("--bloom-filter", action="store_true", help="Low-memory URL tracking")
+    crawling.add_argument("--checkpoint", help="Save progress to this file so the crawl can be resumed")
+    crawling.add_argument("--checkpoint-interval", type=float, default=DEFAULT_CHECKPOINT_INTERVAL, help="Seconds")
+    crawling.add_argument(
+        "--resume",
+        action="store_true",
+        help="Carry on the latest unfinished crawl in --checkpoint with its URLs, terms and settings; "
+        "only the budgets given here change",
+    )
+
+    distributed = parser.add_argument_group("distributed deep crawl")
+    distributed.add_argument("--queue", help="Shared work queue: redis://[:password@]host[:port][/db] or a SQLite file")
+    distributed.add_argument("--job", default=DEFAULT_JOB, help="Name of the crawl in the queue")
+    distributed.add_argument(
+        "--lease", type=float, default=DEFAULT_LEASE, help="Seconds before a silent worker's URLs are re-queued"
+    )
+    distributed.add_argument("--batch", type=int, default=DEFAULT_BATCH_SIZE, help="URLs a worker claims at a time")
+    distributed.add_argument("--worker-id", default=None, help="Defaults to the host name and process ID")
+    distributed.add_argument(
+        "--job-wait",
+        type=float,
+        default=DEFAULT_JOB_WAIT,
+        help="Seconds a worker started before the coordinator waits for the job",
+    )
+
+    args = parser.parse_args(argv)
+    if args.mode in ("coordinator", "worker") and not args.queue:
+        parser.error(f"--mode {args.mode} needs --queue")
+    if args.mode != "worker":
+        if not args.output:
+            parser.error("the following arguments are required: -o/--output")
+        if not args.input:
+            parser.error("the following arguments are required: input")
+        try:
+            export_format(args.output)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.resume and not args.checkpoint:
+        parser.error("--resume needs --checkpoint")
+    if not 50 <= args.duplicate_similarity <= 100:
+        parser.error("--duplicate-similarity must be between 50 and 100")
+    return args
+
+
+def settings_from_args(args):
+    return CrawlSettings(
+        use_selenium=args.selenium,
+        concurrent=not args.sequential,
+        concurrency=args.concurrency,
+        per_host=args.per_host,
+        case_sensitive=args.match_case,
+        whole_words=args.whole_words,
+        use_cache=not args.no_cache,
+        cache_path=args.cache,
+        cache_ttl=args.cache_ttl * 3600,
+        extractor=args.parser,
+        analysis_workers=args.workers,
+        bloom_filter=args.bloom_filter,
+        max_depth=args.max_depth,
+        scope=args.scope,
+        allowlist=tuple(host.strip() for host in args.allowlist.split(",") if host.strip()),
+        max_pages=args.max_pages,
+        max_pages_per_host=args.max_pages_per_host,
+        time_limit=args.time_limit * 60,
+        discovery=args.discovery,
+        sitemap_max_age=args.sitemap_max_age,
+        near_duplicates=args.near_duplicates,
+        duplicate_similarity=args.duplicate_similarity / 100,
+        obey_robots=args.obey_robots,
+        host_rate=args.host_rate,
+        max_page_bytes=int(args.max_page_mb * 1024 * 1024),
+        checkpoint_interval=args.checkpoint_interval,
+        metrics_path=args.metrics,
+        metrics_port=args.metrics_port,
+        corpus_path=args.corpus,
+    )
+
+
+def run(args):
+    if args.mode == "coordinator":
+        return run_coordinator(args)
+    if args.mode == "worker":
+        return run_worker(args)
+    settings = settings_from_args(args)
+    store = saved = None
+    if args.checkpoint and (args.mode == "deep-crawl" or args.resume):
+        store = CrawlStore(args.checkpoint, interval=settings.checkpoint_interval)
+    if args.resume:
+        saved = store.latest_unfinished()
+        if saved is None:
+            print(f"No unfinished crawl to resume in {args.checkpoint}.", file=sys.stderr)
+            return 1
+        urls, search_terms = saved.urls, saved.search_terms
+        # Budgets come from this command line so a crawl stopped by one can be given more
+        settings = CrawlSettings.from_dict(saved.settings).with_budgets_from(settings)
+    else:
+        urls, search_terms = read_input_csv(args.input)
+        if not search_terms or (not urls and args.mode != "recount"):
+            print(f"{args.input} needs at least one URL and one search term.", file=sys.stderr)
+            return 1
+
+    control = stop_on_signals()
+
+    # CSV and JSONL are streamed straight to the output; Excel is built from the count matrix afterwards
+    results_path = args.output if export_format(args.output) in RESULT_FORMATS else new_results_path()
+    try:
+        with ResultWriter(results_path, flush_interval=settings.flush_interval) as sink:
+            crawler = Crawler(
+                search_terms, settings, listener=ConsoleListener(args.verbose), control=control, sink=sink, store=store
+            )
+            if saved is not None:
+                summary = crawler.resume_crawl(saved)
+            elif args.mode == "deep-crawl":
+                summary = crawler.deep_crawl(urls)
+            elif args.mode == "recount":
+                summary = crawler.recount(args.corpus or DEFAULT_CORPUS_PATH)
+            else:
+                summary = crawler.scrape(urls)
+        if results_path != args.output:
+            export_results(crawler.matrix, args.output)
+            os.remove(results_path)
+    except Exception as e:
+        print(f"Crawl failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if store is not None:
+            store.close()
+
+    print(format_summary(summary))
+    print(f"{summary['total_urls']} URLs. Results saved to {args.output}")
+    return 130 if summary.get("cancelled") else 0
+
+
+def stop_on_signals():
+    # Stop cleanly on Ctrl+C or kill, keeping the results so far
+    control = RunControl()
+    signal.signal(signal.SIGINT, lambda *_: control.cancel())
+    signal.signal(signal.SIGTERM, lambda *_: control.cancel())
+    return control
+
+
+def run_coordinator(args):
+    """Queue a distributed deep crawl, or rejoin one already queued, and save its results once finished."""
+    urls, search_terms = read_input_csv(args.input)
+    if not urls or not search_terms:
+        print(f"{args.input} needs at least one URL and one search term.", file=sys.stderr)
+        return 1
+
+    control = stop_on_signals()
+    listener = ConsoleListener(args.verbose)
+    try:
+        queue = open_queue(args.queue)
+    except (OSError, ValueError) as e:
+        print(f"Couldn't open the queue {args.queue}: {e}", file=sys.stderr)
+        return 1
+    try:
+        if not start_job(queue, args.job, urls, search_terms, settings_from_args(args), listener=listener):
+            print(f"Job '{args.job}' is already in the queue; waiting for it with its own settings.", file=sys.stderr)
+        timer_start = time.time()
+        status = wait_for_job(queue, args.job, listener=listener, control=control)
+        matrix = job_matrix(queue, args.job)
+        export_results(matrix, args.output)
+    except Exception as e:
+        print(f"Crawl failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        queue.close()
+
+    summary = dict(matrix.summary(), total_urls=len(matrix), queue=status, elapsed=time.time() - timer_start)
+    print(format_summary(summary))
+    print(f"{summary['total_urls']} URLs. Results saved to {args.output}")
+    # Cancelling only stops waiting; the workers carry on and the coordinator can be started again
+    return 130 if control.cancelled else 0
+
+
+def run_worker(args):
+    """Crawl URLs from a distributed deep crawl until it is finished."""
+    control = stop_on_signals()
+    # Settings that only concern this machine; the rest come from the coordinator
+    overrides = {
+        "use_cache": not args.no_cache,
+        "cache_path": args.cache,
+        "analysis_workers": args.workers,
+        "metrics_path": args.metrics,
+        "metrics_port": args.metrics_port,
+        "corpus_path": args.corpus,
+    }
+    worker_id = args.worker_id or default_worker_id()
+    try:
+        queue = open_queue(args.queue)
+    except (OSError, ValueError) as e:
+        print(f"Couldn't open the queue {args.queue}: {e}", file=sys.stderr)
+        return 1
+    try:
+        worker = CrawlWorker(
+            queue,
+            args.job,
+            worker_id=worker_id,
+            listener=ConsoleListener(args.verbose),
+            control=control,
+            overrides=overrides,
+            batch_size=args.batch,
+            lease=args.lease,
+            job_wait=args.job_wait,
+        )
+        result = worker.run()
+    except Exception as e:
+        print(f"Worker failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        queue.close()
+
+    lost = f" {result['lost_leases']} leases ran out before it finished them." if result["lost_leases"] else ""
+    print(
+        f"Worker {worker_id} crawled {result['pages']} URLs.{lost}"
+        f"{format_http_stats(result['http'])}{format_duplicate_stats(result['duplicates'])}"
+    )
+    return 130 if result["cancelled"] else 0
+
+
+def main(argv=None):
+    return run(parse_args(argv))
+
+
+if __name__ == "__main__":
+    if getattr(sys, "frozen", False):
+        # Lets --workers start its processes from a PyInstaller build
+        import multiprocessing
+
+        multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,210 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter, defaultdict
+
+
+DEFAULT_CORPUS_PATH = os.path.join(os.path.expanduser("~"), ".crawlcount", "corpus.sqlite3")
+FLUSH_PAGES = 200  # Pages buffered before their postings are written
+TOKEN = re.compile(r"\w+")  # Word characters, as TermMatcher uses for word boundaries
+
+
+def prepare_page(text):
+    """Compress a page's text and list its distinct words, casefolded, for ``PageCorpus.add_prepared``.
+
+    Cheap enough for the crawl thread but also run in parse processes, so
+    only the compressed text and the words cross back.
+    """
+    return zlib.compress(text.encode("utf-8")), sorted(set(TOKEN.findall(text.casefold())))
+
+
+class PageCorpus:
+    """The extracted text of crawled pages, kept so new terms can be counted without fetching again.
+
+    Each page's text is stored once per URL, zlib-compressed, and replaced
+    when the URL is crawled again. Every run that stores pages is recorded
+    with its list of pages, so ``recount`` can go back over the last crawl.
+
+    An inverted index maps each distinct word to the pages it appears on.
+    Postings are buffered and written in compressed blocks of page IDs, so
+    a word can have several blocks and a re-crawled page may still be listed
+    under words it no longer has. The index only narrows down which pages
+    could match; the matcher then counts those pages exactly, so stale
+    postings cost a little time but never a wrong count. Safe to share
+    between threads.
+    """
+
+    def __init__(self, path=DEFAULT_CORPUS_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL UNIQUE,
+                stored_at REAL NOT NULL,
+                text BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS words (
+                id INTEGER PRIMARY KEY,
+                word TEXT NOT NULL UNIQUE
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                word INTEGER NOT NULL,
+                pages BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS postings_word ON postings (word);
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY,
+                started_at REAL NOT NULL,
+                search_terms TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS run_pages (
+                run INTEGER NOT NULL,
+                page INTEGER NOT NULL,
+                PRIMARY KEY (run, page)
+            ) WITHOUT ROWID;
+            """
+        )
+        self.run_id = None
+        self._postings = defaultdict(list)  # Word -> page IDs added since the last flush
+        self._buffered = 0
+        self.pages = 0
+        self.stored_bytes = 0
+        self.scanned = 0
+
+    def start_run(self, search_terms):
+        """Record a new run whose pages are stored from now on."""
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO runs (started_at, search_terms) VALUES (?, ?)",
+                (time.time(), json.dumps(list(search_terms))),
+            )
+            self._db.commit()
+            self.run_id = cursor.lastrowid
+
+    def add(self, url, text):
+        """Store a page's extracted text in the current run."""
+        self.add_prepared(url, *prepare_page(text))
+
+    def add_prepared(self, url, compressed, words):
+        """Store a page from ``prepare_page``'s compressed text and words."""
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO pages (url, stored_at, text) VALUES (?, ?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET stored_at = excluded.stored_at, text = excluded.text",
+                (url, time.time(), compressed),
+            )
+            page_id = self._db.execute("SELECT id FROM pages WHERE url = ?", (url,)).fetchone()[0]
+            self._db.execute("INSERT OR IGNORE INTO run_pages (run, page) VALUES (?, ?)", (self.run_id, page_id))
+            for word in words:
+                self._postings[word].append(page_id)
+            self.pages += 1
+            self.stored_bytes += len(compressed)
+            self._buffered += 1
+            if self._buffered >= FLUSH_PAGES:
+                self._flush()
+
+    def _flush(self):
+        if self._postings:
+            self._db.executemany("INSERT OR IGNORE INTO words (word) VALUES (?)", ((word,) for word in self._postings))
+            rows = []
+            for word, page_ids in self._postings.items():
+                word_id = self._db.execute("SELECT id FROM words WHERE word = ?", (word,)).fetchone()[0]
+                rows.append((word_id, zlib.compress(array("q", page_ids).tobytes())))
+            self._db.executemany("INSERT INTO postings (word, pages) VALUES (?, ?)", rows)
+            self._postings.clear()
+        self._buffered = 0
+        self._db.commit()
+
+    def latest_run(self):
+        """``(run ID, started_at, search terms)`` of the last run that stored pages, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, started_at, search_terms FROM runs "
+                "WHERE EXISTS (SELECT 1 FROM run_pages WHERE run = runs.id) ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2])
+
+    def candidates(self, matcher):
+        """IDs of the pages that could contain any of ``matcher``'s terms, or None if any page could."""
+        found = set()
+        with self._lock:
+            # Postings still buffered from this run's pages would be missed
+            self._flush()
+            for term in matcher.terms:
+                words = TOKEN.findall(term.casefold())
+                if not words:
+                    # Only punctuation, so there are no words to look up
+                    return None
+                pages = None
+                for position, word in enumerate(words):
+                    word_pages = self._pages_with(word, position, len(words), matcher.whole_words)
+                    pages = word_pages if pages is None else pages & word_pages
+                    if not pages:
+                        break
+                found |= pages
+        return found
+
+    def _pages_with(self, word, position, length, whole_words):
+        # Without whole words a term can start or end inside a longer word, so its first word may end
+        # another word, its last may start one and a single word can be anywhere inside one
+        if whole_words or 0 < position < length - 1:
+            condition, args = "word = ?", (word,)
+        elif length == 1:
+            condition, args = "instr(word, ?) > 0", (word,)
+        elif position == 0:
+            condition, args = "substr(word, -length(?)) = ?", (word, word)
+        else:
+            condition, args = "substr(word, 1, length(?)) = ?", (word, word)
+        pages = set()
+        for (block,) in self._db.execute(
+            f"SELECT pages FROM postings WHERE word IN (SELECT id FROM words WHERE {condition})", args
+        ):
+            pages.update(array("q", zlib.decompress(block)))
+        return pages
+
+    def recount(self, matcher, run_id, control=None):
+        """Yield ``(url, term_counts)`` for every page of a run, counted with ``matcher``.
+
+        Only pages the index says could match are decompressed and scanned;
+        the rest get zero counts. Stops early if ``control`` is cancelled.
+        """
+        candidates = self.candidates(matcher)
+        with self._lock:
+            pages = self._db.execute(
+                "SELECT pages.id, pages.url FROM run_pages JOIN pages ON pages.id = run_pages.page "
+                "WHERE run_pages.run = ? ORDER BY pages.id",
+                (run_id,),
+            ).fetchall()
+        self.scanned = 0
+        zero = dict.fromkeys(matcher.terms, 0)
+        for page_id, url in pages:
+            if control is not None and not control.checkpoint():
+                return
+            if candidates is not None and page_id not in candidates:
+                yield url, Counter(zero)
+                continue
+            with self._lock:
+                compressed = self._db.execute("SELECT text FROM pages WHERE id = ?", (page_id,)).fetchone()[0]
+            self.scanned += 1
+            yield url, matcher.count(zlib.decompress(compressed).decode("utf-8"))
+
+    def stats(self):
+        return {"pages": self.pages, "stored_bytes": self.stored_bytes}
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._db.close()
@@ -0,0 +1,132 @@
+from urllib.parse import urlparse
+
+from sinks import read_results
+
+
+DEFAULT_CAPACITY = 1024  # Rows allocated up front, doubled whenever the matrix fills
+
+
+class CountMatrix:
+    """Every URL's term counts for a run, one row per URL and one column per term.
+
+    Counts are kept in a single NumPy array rather than a Counter per URL,
+    so a run's results take a few bytes per count, and the run summary is
+    computed with vectorized operations over the whole matrix: which URLs
+    contain any or all of the terms, total counts per term and total counts
+    per domain. Rows are appended as URLs are counted and the array doubles
+    in size when it fills. A term not seen before, e.g. when loading a
+    results file, adds a column. The arrays, and NumPy, are only loaded
+    with the first row, so an empty matrix costs nothing at startup.
+    """
+
+    def __init__(self, terms=(), capacity=DEFAULT_CAPACITY):
+        self.terms = []
+        self._term_index = {}
+        self.urls = []
+        self._domains = {}  # Domain name -> id, in first-seen order
+        self._capacity = capacity
+        self._domain_ids = None
+        self._counts = None
+        for term in terms:
+            self._add_term(term)
+
+    @classmethod
+    def from_results(cls, path, terms=()):
+        """Load a results file written by ``ResultWriter``."""
+        matrix = cls(terms)
+        for url, term_counts in read_results(path):
+            matrix.add(url, term_counts)
+        return matrix
+
+    def _add_term(self, term):
+        self._term_index[term] = len(self.terms)
+        self.terms.append(term)
+        if self._counts is not None:
+            import numpy as np
+
+            self._counts = np.hstack([self._counts, np.zeros((len(self._counts), 1), dtype=np.int32)])
+
+    def _grow(self):
+        import numpy as np
+
+        if self._counts is None:
+            self._counts = np.zeros((self._capacity, len(self.terms)), dtype=np.int32)
+            self._domain_ids = np.zeros(self._capacity, dtype=np.int32)
+            return
+        capacity = max(DEFAULT_CAPACITY, 2 * len(self._counts))
+        counts = np.zeros((capacity, len(self.terms)), dtype=np.int32)
+        counts[: len(self.urls)] = self.counts
+        self._counts = counts
+        self._domain_ids = np.resize(self._domain_ids, capacity)
+
+    def add(self, url, term_counts):
+        """Append a URL's counts, given as a mapping of term to count."""
+        for term in term_counts:
+            if term not in self._term_index:
+                self._add_term(term)
+        row = len(self.urls)
+        if self._counts is None or row == len(self._counts):
+            self._grow()
+        counts = self._counts[row]
+        for term, count in term_counts.items():
+            counts[self._term_index[term]] = count
+        domain = urlparse(url).netloc
+        self._domain_ids[row] = self._domains.setdefault(domain, len(self._domains))
+        self.urls.append(url)
+
+    def __len__(self):
+        return len(self.urls)
+
+    @property
+    def counts(self):
+        """The filled part of the matrix, shape (URLs, terms)."""
+        if self._counts is None:
+            import numpy as np
+
+            return np.zeros((0, len(self.terms)), dtype=np.int32)
+        return self._counts[: len(self.urls)]
+
+    def rows(self):
+        """Yield ``(url, {term: count})`` for every URL in the order they were added."""
+        for url, counts in zip(self.urls, self.counts.tolist()):
+            yield url, dict(zip(self.terms, counts))
+
+    def found(self):
+        """Boolean matrix of which terms each URL contains."""
+        return self.counts > 0
+
+    def urls_with_any_terms(self):
+        return int(self.found().any(axis=1).sum()) if self.terms else 0
+
+    def urls_with_all_terms(self):
+        return int(self.found().all(axis=1).sum()) if self.terms else 0
+
+    def row_totals(self):
+        """Total count of all terms for each URL."""
+        import numpy as np
+
+        return self.counts.sum(axis=1, dtype=np.int64)
+
+    def term_totals(self):
+        """Total count of each term across every URL."""
+        import numpy as np
+
+        totals = self.counts.sum(axis=0, dtype=np.int64)
+        return dict(zip(self.terms, totals.tolist()))
+
+    def domain_totals(self):
+        """Total count of all terms for each domain, in the order the domains were first seen."""
+        import numpy as np
+
+        totals = np.zeros(len(self._domains), dtype=np.int64)
+        if self.urls:
+            np.add.at(totals, self._domain_ids[: len(self.urls)], self.row_totals())
+        return dict(zip(self._domains, totals.tolist()))
+
+    def summary(self):
+        return {
+            "urls_with_any_terms": self.urls_with_any_terms(),
+            "urls_with_all_terms": self.urls_with_all_terms(),
+            "term_totals": self.term_totals(),
+            "domain_totals": self.domain_totals(),
+        }
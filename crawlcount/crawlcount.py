@@ -1,7 +1,14 @@
 import sys
 import time
-import csv
-from urllib.parse import urljoin, urlparse
+
+# With --profile-startup every import from here on is timed and reported once the window is up
+if "--profile-startup" in sys.argv:
+    from startup import ImportProfiler
+
+    PROFILER = ImportProfiler().install()
+else:
+    PROFILER = None
+
 from PyQt5.QtWidgets import (
     QApplication,
     QWidget,
@@ -10,30 +17,139 @@ from PyQt5.QtWidgets import (
     QLabel,
     QPlainTextEdit,
     QTextEdit,
-    QTextBrowser,
+    QTableView,
+    QHeaderView,
     QPushButton,
     QMessageBox,
     QFileDialog,
-    QCheckBox
+    QCheckBox,
+    QSpinBox,
+    QComboBox,
+    QLineEdit,
+    QDoubleSpinBox
 )
-from PyQt5.QtGui import QFont, QIcon
-from PyQt5.QtCore import Qt
-import requests
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
-from collections import Counter, deque
-from openpyxl import Workbook
-from openpyxl.utils.dataframe import dataframe_to_rows
-import pandas as pd
+from PyQt5.QtGui import QDesktopServices, QFont, QIcon
+from PyQt5.QtCore import Qt, QThread, QTimer, QUrl, pyqtSignal
+from analysis import DEFAULT_ANALYSIS_WORKERS
+from cache import DEFAULT_CACHE_PATH, DEFAULT_CACHE_TTL, ResponseCache
+from corpus import DEFAULT_CORPUS_PATH
+from counts import CountMatrix
+from crawlstate import DEFAULT_STATE_PATH, CrawlStore
+from drivers import DEFAULT_BROWSERS, DriverPool
+from duplicates import DEFAULT_DUPLICATE_SIMILARITY, DEFAULT_NEAR_DUPLICATES
+from engine import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_PER_HOST,
+    CrawlSettings,
+    CrawlListener,
+    Crawler,
+    RunControl,
+)
+from exports import export_csv, export_excel, read_input_csv
+from extract import DEFAULT_EXTRACTOR, available_extractors
+from frontier import DEFAULT_MAX_DEPTH
+from httpclient import DEFAULT_MAX_PAGE_BYTES
+from politeness import DEFAULT_HOST_RATE
+from report import format_summary
+from resultsmodel import ResultsTableModel
+from scope import DEFAULT_SCOPE
+from sinks import ResultWriter, new_results_path
+from sitemaps import DEFAULT_DISCOVERY
+
+
+# Minimum seconds between result batches sent to the window
+REFRESH_INTERVAL = 0.25
+# Messages kept in the window, oldest dropped first
+MAX_MESSAGES = 1000
+
+
+class CrawlThread(QThread, CrawlListener):
+    status_signal = pyqtSignal(str)  # Signal to send status updates to the main thread
+    batch_signal = pyqtSignal(list)  # Signal to send batches of results and messages to the main thread
+    finished_signal = pyqtSignal(dict)  # Signal to send the run summary to the main thread
+
+    def __init__(self, mode, urls, search_terms, settings, results_path, driver_pool=None, saved_crawl=None):
+        super().__init__()
+        self.mode = mode
+        self.saved_crawl = saved_crawl  # Set when resuming a deep crawl
+        self.urls = urls
+        self.search_terms = search_terms
+        self.settings = settings
+        self.results_path = results_path
+        self.driver_pool = driver_pool
+        self.control = RunControl()
+        self.pending = []
+        self.last_flush = 0.0
+        self.last_status = 0.0
+
+    def run(self):
+        store = None
+        try:
+            # Results go straight to disk so memory stays flat and a crash keeps them
+            with ResultWriter(self.results_path, flush_interval=self.settings.flush_interval) as sink:
+                if self.mode == "deep_crawl":
+                    # Deep crawls are checkpointed so they can be resumed after a cancel or crash
+                    store = CrawlStore(DEFAULT_STATE_PATH, interval=self.settings.checkpoint_interval)
+                crawler = Crawler(
+                    self.search_terms,
+                    self.settings,
+                    listener=self,
+                    control=self.control,
+                    driver_pool=self.driver_pool,
+                    sink=sink,
+                    store=store,
+                    # The table keeps the window's copy of the counts, so the crawler doesn't keep another
+                    keep_counts=False,
+                )
+                if self.saved_crawl is not None:
+                    summary = crawler.resume_crawl(self.saved_crawl)
+                elif self.mode == "deep_crawl":
+                    summary = crawler.deep_crawl(self.urls)
+                elif self.mode == "recount":
+                    summary = crawler.recount(DEFAULT_CORPUS_PATH)
+                else:
+                    summary = crawler.scrape(self.urls)
+        except Exception as e:
+            summary = {"error": str(e), "cancelled": self.control.cancelled}
+        finally:
+            if store is not None:
+                store.close()
+        self.flush()
+        self.finished_signal.emit(summary)
+
+    def status(self, text):
+        # Status changes are throttled like results so they cannot flood the event loop
+        now = time.monotonic()
+        if now - self.last_status >= REFRESH_INTERVAL:
+            self.last_status = now
+            self.status_signal.emit(text)
+        self.flush_if_due()
+
+    def message(self, text):
+        self.pending.append(("message", text))
+        self.flush_if_due()
+
+    def result(self, url, term_counts):
+        self.pending.append(("result", (url, term_counts)))
+        self.flush_if_due()
+
+    def flush_if_due(self):
+        if time.monotonic() - self.last_flush >= REFRESH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        self.last_flush = time.monotonic()
+        if self.pending:
+            batch, self.pending = self.pending, []
+            self.batch_signal.emit(batch)
 
 
 class CrawlCount(QWidget):
     def __init__(self):
         super().__init__()
-        self.results_data = []  # To store the results for CSV export
+        self.results_path = None  # Results file written during the last run
+        self.crawl_thread = None
+        self.driver_pool = None  # Headless browsers, only started in Selenium mode
         self.initUI()
 
     def initUI(self):
@@ -70,6 +186,20 @@ class CrawlCount(QWidget):
         self.search_terms_textbox = QTextEdit()
         self.search_terms_textbox.setFont(QFont("Arial", 12))
         search_terms_layout.addWidget(self.search_terms_textbox)
+
+        # Term matching options
+        match_options_layout = QHBoxLayout()
+        self.match_case_checkbox = QCheckBox("Match case")
+        self.match_case_checkbox.setToolTip("Only count occurrences with the same upper and lower case letters.")
+        self.match_case_checkbox.setFont(QFont("Arial", 12))
+        match_options_layout.addWidget(self.match_case_checkbox)
+
+        self.whole_words_checkbox = QCheckBox("Whole words only")
+        self.whole_words_checkbox.setToolTip("Don't count a term when it is part of a longer word.")
+        self.whole_words_checkbox.setFont(QFont("Arial", 12))
+        match_options_layout.addWidget(self.whole_words_checkbox)
+        match_options_layout.addStretch()
+        search_terms_layout.addLayout(match_options_layout)
         input_layout.addLayout(search_terms_layout)
         # Add the horizontal layout to the main layout
         main_layout.addLayout(input_layout)
@@ -97,6 +227,42 @@ class CrawlCount(QWidget):
         )
         button_layout.addWidget(self.deep_crawl_button)
 
+        # Resume Crawl Button
+        self.resume_button = QPushButton("Resume crawl")
+        self.resume_button.setFont(QFont("Arial", 14, QFont.Bold))
+        self.resume_button.clicked.connect(self.resume_crawl)
+        self.resume_button.setToolTip(
+            "Carry on the last deep crawl that was cancelled, stopped early or interrupted, "
+            "from its last checkpoint."
+        )
+        button_layout.addWidget(self.resume_button)
+
+        # Recount Button
+        self.recount_button = QPushButton("Recount stored crawl")
+        self.recount_button.setFont(QFont("Arial", 14, QFont.Bold))
+        self.recount_button.clicked.connect(self.recount)
+        self.recount_button.setToolTip(
+            "Count the search terms in the pages kept by the last scrape or crawl with 'Keep page text' ticked, "
+            "without downloading them again."
+        )
+        button_layout.addWidget(self.recount_button)
+
+        # Pause Button
+        self.pause_button = QPushButton("Pause")
+        self.pause_button.setFont(QFont("Arial", 14, QFont.Bold))
+        self.pause_button.clicked.connect(self.toggle_pause)
+        self.pause_button.setToolTip("Pause or resume the running scrape or crawl.")
+        self.pause_button.setEnabled(False)
+        button_layout.addWidget(self.pause_button)
+
+        # Cancel Button
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setFont(QFont("Arial", 14, QFont.Bold))
+        self.cancel_button.clicked.connect(self.cancel_crawl)
+        self.cancel_button.setToolTip("Stop the running scrape or crawl and keep the results so far.")
+        self.cancel_button.setEnabled(False)
+        button_layout.addWidget(self.cancel_button)
+
         # Upload CSV Button
         self.upload_button = QPushButton("Upload CSV")
         self.upload_button.setFont(QFont("Arial", 14, QFont.Bold))
@@ -138,19 +304,362 @@ class CrawlCount(QWidget):
         # Results Label and Scroll Area
         self.results_label = QLabel("Results:")
         self.results_label.setFont(QFont("Arial", 12))
+        self.results_label.setWordWrap(True)
         main_layout.addWidget(self.results_label)
 
-        self.results_textbox = QTextBrowser()
-        self.results_textbox.setFont(QFont("Arial", 12))
-        self.results_textbox.setReadOnly(True)
-        self.results_textbox.setOpenExternalLinks(True)
-        main_layout.addWidget(self.results_textbox)
+        # Filters for the results table
+        filter_layout = QHBoxLayout()
+        self.filter_label = QLabel("Filter URLs:")
+        self.filter_label.setFont(QFont("Arial", 12))
+        filter_layout.addWidget(self.filter_label)
+        self.filter_textbox = QLineEdit()
+        self.filter_textbox.setFont(QFont("Arial", 12))
+        self.filter_textbox.setPlaceholderText("Part of a URL, e.g. a domain")
+        self.filter_textbox.setToolTip("Only show URLs containing this text.")
+        self.filter_textbox.textChanged.connect(self.apply_results_filter)
+        filter_layout.addWidget(self.filter_textbox)
+
+        self.filter_term_label = QLabel("Term:")
+        self.filter_term_label.setFont(QFont("Arial", 12))
+        filter_layout.addWidget(self.filter_term_label)
+        self.filter_term_combobox = QComboBox()
+        self.filter_term_combobox.setFont(QFont("Arial", 12))
+        self.filter_term_combobox.setToolTip(
+            "Only show URLs containing this search term. 'At least' then applies to this term's count."
+        )
+        self.filter_term_combobox.addItem("Any term", None)
+        self.filter_term_combobox.currentIndexChanged.connect(self.apply_results_filter)
+        filter_layout.addWidget(self.filter_term_combobox)
+
+        self.min_count_label = QLabel("At least:")
+        self.min_count_label.setFont(QFont("Arial", 12))
+        filter_layout.addWidget(self.min_count_label)
+        self.min_count_spinbox = QSpinBox()
+        self.min_count_spinbox.setRange(0, 1_000_000)
+        self.min_count_spinbox.setFont(QFont("Arial", 12))
+        self.min_count_spinbox.setToolTip("Only show URLs with at least this many matches. 0 shows every URL.")
+        self.min_count_spinbox.valueChanged.connect(self.apply_results_filter)
+        filter_layout.addWidget(self.min_count_spinbox)
+
+        self.shown_label = QLabel()
+        self.shown_label.setFont(QFont("Arial", 12))
+        filter_layout.addWidget(self.shown_label)
+        main_layout.addLayout(filter_layout)
+
+        # Results table, which only draws the rows in view however many URLs are crawled
+        self.results_model = ResultsTableModel(self)
+        self.results_model.modelReset.connect(self.update_term_filter)
+        self.results_model.modelReset.connect(self.update_shown_count)
+        self.results_table = QTableView()
+        self.results_table.setFont(QFont("Arial", 12))
+        self.results_table.setModel(self.results_model)
+        self.results_table.setWordWrap(False)
+        self.results_table.setAlternatingRowColors(True)
+        self.results_table.setSelectionBehavior(QTableView.SelectRows)
+        self.results_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.results_table.verticalHeader().hide()
+        self.results_table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.results_table.horizontalHeader().setStretchLastSection(True)
+        self.results_table.setColumnWidth(0, 600)
+        # Rows stay in the order they arrived until a column header is clicked
+        self.results_table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.results_table.setSortingEnabled(True)
+        self.results_table.doubleClicked.connect(self.open_result)
+        self.results_table.setToolTip("Click a column header to sort. Double-click a row to open the page.")
+        main_layout.addWidget(self.results_table, stretch=3)
+
+        # Messages from the run, such as pages that couldn't be fetched
+        self.messages_textbox = QPlainTextEdit()
+        self.messages_textbox.setFont(QFont("Arial", 12))
+        self.messages_textbox.setReadOnly(True)
+        self.messages_textbox.setMaximumBlockCount(MAX_MESSAGES)
+        self.messages_textbox.setPlaceholderText("Messages from the scrape or crawl appear here.")
+        main_layout.addWidget(self.messages_textbox, stretch=1)
 
         # Add checkbox to toggle use Selenium instead of Requests
         self.checkbox = QCheckBox("Use Selenium for scraping - uses Requests by default")
         self.checkbox.setToolTip("Slower but more reliable.")
         self.checkbox.setFont(QFont("Arial", 12))
-        main_layout.addWidget(self.checkbox)
+        selenium_layout = QHBoxLayout()
+        selenium_layout.addWidget(self.checkbox)
+
+        self.browsers_label = QLabel("Browsers:")
+        self.browsers_label.setFont(QFont("Arial", 12))
+        selenium_layout.addWidget(self.browsers_label)
+        self.browsers_spinbox = QSpinBox()
+        self.browsers_spinbox.setRange(1, 16)
+        self.browsers_spinbox.setValue(DEFAULT_BROWSERS)
+        self.browsers_spinbox.setToolTip("Number of headless browsers kept open for Selenium scraping.")
+        selenium_layout.addWidget(self.browsers_spinbox)
+        selenium_layout.addStretch()
+        main_layout.addLayout(selenium_layout)
+
+        # Concurrency settings for the Requests fetch path
+        concurrency_layout = QHBoxLayout()
+        self.concurrent_checkbox = QCheckBox("Fetch URLs concurrently")
+        self.concurrent_checkbox.setToolTip(
+            "Fetch several URLs at once. Untick to fetch one URL at a time for comparison."
+        )
+        self.concurrent_checkbox.setFont(QFont("Arial", 12))
+        self.concurrent_checkbox.setChecked(True)
+        concurrency_layout.addWidget(self.concurrent_checkbox)
+
+        self.concurrency_label = QLabel("Max concurrent:")
+        self.concurrency_label.setFont(QFont("Arial", 12))
+        concurrency_layout.addWidget(self.concurrency_label)
+        self.concurrency_spinbox = QSpinBox()
+        self.concurrency_spinbox.setRange(1, 200)
+        self.concurrency_spinbox.setValue(DEFAULT_CONCURRENCY)
+        self.concurrency_spinbox.setToolTip("Maximum number of URLs fetched at the same time.")
+        concurrency_layout.addWidget(self.concurrency_spinbox)
+
+        self.per_host_label = QLabel("Max per host:")
+        self.per_host_label.setFont(QFont("Arial", 12))
+        concurrency_layout.addWidget(self.per_host_label)
+        self.per_host_spinbox = QSpinBox()
+        self.per_host_spinbox.setRange(1, 50)
+        self.per_host_spinbox.setValue(DEFAULT_PER_HOST)
+        self.per_host_spinbox.setToolTip("Maximum number of URLs fetched from the same host at the same time.")
+        concurrency_layout.addWidget(self.per_host_spinbox)
+
+        self.host_rate_label = QLabel("Requests/s per host:")
+        self.host_rate_label.setFont(QFont("Arial", 12))
+        concurrency_layout.addWidget(self.host_rate_label)
+        self.host_rate_spinbox = QDoubleSpinBox()
+        self.host_rate_spinbox.setRange(0, 100)
+        self.host_rate_spinbox.setDecimals(1)
+        self.host_rate_spinbox.setSingleStep(0.5)
+        self.host_rate_spinbox.setValue(DEFAULT_HOST_RATE)
+        self.host_rate_spinbox.setSpecialValueText("No limit")
+        self.host_rate_spinbox.setToolTip(
+            "Average requests per second sent to any one site. Failing sites are also backed off and retried later "
+            "while other sites carry on."
+        )
+        concurrency_layout.addWidget(self.host_rate_spinbox)
+
+        self.max_page_label = QLabel("Max page size (MB):")
+        self.max_page_label.setFont(QFont("Arial", 12))
+        concurrency_layout.addWidget(self.max_page_label)
+        self.max_page_spinbox = QSpinBox()
+        self.max_page_spinbox.setRange(0, 1000)
+        self.max_page_spinbox.setValue(DEFAULT_MAX_PAGE_BYTES // (1024 * 1024))
+        self.max_page_spinbox.setSpecialValueText("No limit")
+        self.max_page_spinbox.setToolTip(
+            "Stop downloading a page after this much and count the terms in what arrived. "
+            "PDFs, images, videos and other files that aren't web pages are always skipped."
+        )
+        concurrency_layout.addWidget(self.max_page_spinbox)
+
+        self.extractor_label = QLabel("Parser:")
+        self.extractor_label.setFont(QFont("Arial", 12))
+        concurrency_layout.addWidget(self.extractor_label)
+        self.extractor_combobox = QComboBox()
+        self.extractor_combobox.addItems([DEFAULT_EXTRACTOR] + available_extractors())
+        self.extractor_combobox.setToolTip(
+            "How page text and links are extracted. 'auto' uses the fastest parser installed."
+        )
+        concurrency_layout.addWidget(self.extractor_combobox)
+
+        self.workers_label = QLabel("Parse processes:")
+        self.workers_label.setFont(QFont("Arial", 12))
+        concurrency_layout.addWidget(self.workers_label)
+        self.workers_spinbox = QSpinBox()
+        self.workers_spinbox.setRange(0, 64)
+        self.workers_spinbox.setValue(DEFAULT_ANALYSIS_WORKERS)
+        self.workers_spinbox.setSpecialValueText("Off")
+        self.workers_spinbox.setToolTip(
+            "Parse pages and count terms in this many separate processes so every CPU core is used. "
+            "Helps large crawls with many fetches at once; 'Off' does it all in the app."
+        )
+        concurrency_layout.addWidget(self.workers_spinbox)
+        concurrency_layout.addStretch()
+        main_layout.addLayout(concurrency_layout)
+
+        # Page cache settings
+        cache_layout = QHBoxLayout()
+        self.cache_checkbox = QCheckBox("Use page cache")
+        self.cache_checkbox.setToolTip(
+            "Reuse pages downloaded by earlier runs. Older pages are only downloaded again if they have changed."
+        )
+        self.cache_checkbox.setFont(QFont("Arial", 12))
+        self.cache_checkbox.setChecked(True)
+        cache_layout.addWidget(self.cache_checkbox)
+
+        self.cache_ttl_label = QLabel("Recheck after (hours):")
+        self.cache_ttl_label.setFont(QFont("Arial", 12))
+        cache_layout.addWidget(self.cache_ttl_label)
+        self.cache_ttl_spinbox = QSpinBox()
+        self.cache_ttl_spinbox.setRange(0, 24 * 30)
+        self.cache_ttl_spinbox.setValue(DEFAULT_CACHE_TTL // 3600)
+        self.cache_ttl_spinbox.setToolTip("How long a cached page is used before asking the site whether it changed.")
+        cache_layout.addWidget(self.cache_ttl_spinbox)
+
+        self.clear_cache_button = QPushButton("Clear cache")
+        self.clear_cache_button.setFont(QFont("Arial", 12))
+        self.clear_cache_button.clicked.connect(self.clear_cache)
+        self.clear_cache_button.setToolTip("Delete every cached page.")
+        cache_layout.addWidget(self.clear_cache_button)
+
+        self.corpus_checkbox = QCheckBox("Keep page text")
+        self.corpus_checkbox.setToolTip(
+            "Store the text of every page so 'Recount stored crawl' can count new search terms in seconds."
+        )
+        self.corpus_checkbox.setFont(QFont("Arial", 12))
+        cache_layout.addWidget(self.corpus_checkbox)
+        cache_layout.addStretch()
+        main_layout.addLayout(cache_layout)
+
+        # Deep crawl settings
+        crawl_layout = QHBoxLayout()
+        self.max_depth_label = QLabel("Max depth:")
+        self.max_depth_label.setFont(QFont("Arial", 12))
+        crawl_layout.addWidget(self.max_depth_label)
+        self.max_depth_spinbox = QSpinBox()
+        self.max_depth_spinbox.setRange(0, 10)
+        self.max_depth_spinbox.setValue(DEFAULT_MAX_DEPTH)
+        self.max_depth_spinbox.setToolTip("How many links away from the starting URLs the deep crawl may go.")
+        crawl_layout.addWidget(self.max_depth_spinbox)
+
+        self.scope_label = QLabel("Follow links to:")
+        self.scope_label.setFont(QFont("Arial", 12))
+        crawl_layout.addWidget(self.scope_label)
+        self.scope_combobox = QComboBox()
+        for label, rule in [
+            ("Any site", "any"),
+            ("Same domain", "same-domain"),
+            ("Same registrable domain", "same-registrable-domain"),
+            ("Allowlist", "allowlist"),
+        ]:
+            self.scope_combobox.addItem(label, rule)
+        self.scope_combobox.setCurrentIndex(self.scope_combobox.findData(DEFAULT_SCOPE))
+        self.scope_combobox.setToolTip(
+            "Which links the deep crawl follows: any site, only the starting hosts, "
+            "the starting sites including subdomains (e.g. news.bbc.co.uk for bbc.co.uk), "
+            "or the starting hosts plus the allowlist."
+        )
+        self.scope_combobox.currentIndexChanged.connect(self.update_allowlist_state)
+        crawl_layout.addWidget(self.scope_combobox)
+
+        self.allowlist_textbox = QLineEdit()
+        self.allowlist_textbox.setPlaceholderText("Allowed domains, comma separated")
+        self.allowlist_textbox.setToolTip("Domains the deep crawl may follow links to, including their subdomains.")
+        crawl_layout.addWidget(self.allowlist_textbox)
+        self.update_allowlist_state()
+        main_layout.addLayout(crawl_layout)
+
+        # How the deep crawl finds pages
+        discovery_layout = QHBoxLayout()
+        self.discovery_label = QLabel("Find pages:")
+        self.discovery_label.setFont(QFont("Arial", 12))
+        discovery_layout.addWidget(self.discovery_label)
+        self.discovery_combobox = QComboBox()
+        for label, mode in [
+            ("By following links", "links"),
+            ("From sitemaps", "sitemaps"),
+            ("From sitemaps and links", "both"),
+        ]:
+            self.discovery_combobox.addItem(label, mode)
+        self.discovery_combobox.setCurrentIndex(self.discovery_combobox.findData(DEFAULT_DISCOVERY))
+        self.discovery_combobox.setToolTip(
+            "Sitemaps list a site's pages without downloading each page to find its links. "
+            "'From sitemaps' crawls the starting URLs and the pages their sites' sitemaps list, without following links."
+        )
+        self.discovery_combobox.currentIndexChanged.connect(self.update_sitemap_state)
+        discovery_layout.addWidget(self.discovery_combobox)
+
+        self.sitemap_age_label = QLabel("Changed in the last (days):")
+        self.sitemap_age_label.setFont(QFont("Arial", 12))
+        discovery_layout.addWidget(self.sitemap_age_label)
+        self.sitemap_age_spinbox = QSpinBox()
+        self.sitemap_age_spinbox.setRange(0, 10_000)
+        self.sitemap_age_spinbox.setSpecialValueText("Any time")
+        self.sitemap_age_spinbox.setToolTip(
+            "Only crawl sitemap pages modified this recently. Pages without a date in the sitemap are still crawled."
+        )
+        discovery_layout.addWidget(self.sitemap_age_spinbox)
+
+        self.robots_checkbox = QCheckBox("Obey robots.txt")
+        self.robots_checkbox.setToolTip("Skip pages the site's robots.txt asks crawlers not to visit.")
+        self.robots_checkbox.setFont(QFont("Arial", 12))
+        discovery_layout.addWidget(self.robots_checkbox)
+        discovery_layout.addStretch()
+        self.update_sitemap_state()
+        main_layout.addLayout(discovery_layout)
+
+        # Deep crawl budgets
+        budget_layout = QHBoxLayout()
+        self.max_pages_label = QLabel("Max pages:")
+        self.max_pages_label.setFont(QFont("Arial", 12))
+        budget_layout.addWidget(self.max_pages_label)
+        self.max_pages_spinbox = QSpinBox()
+        self.max_pages_spinbox.setRange(0, 10_000_000)
+        self.max_pages_spinbox.setSpecialValueText("No limit")
+        self.max_pages_spinbox.setToolTip("Stop the deep crawl after this many pages.")
+        budget_layout.addWidget(self.max_pages_spinbox)
+
+        self.max_pages_per_host_label = QLabel("Max pages per host:")
+        self.max_pages_per_host_label.setFont(QFont("Arial", 12))
+        budget_layout.addWidget(self.max_pages_per_host_label)
+        self.max_pages_per_host_spinbox = QSpinBox()
+        self.max_pages_per_host_spinbox.setRange(0, 10_000_000)
+        self.max_pages_per_host_spinbox.setSpecialValueText("No limit")
+        self.max_pages_per_host_spinbox.setToolTip("Crawl at most this many pages from any one host.")
+        budget_layout.addWidget(self.max_pages_per_host_spinbox)
+
+        self.time_limit_label = QLabel("Time limit (minutes):")
+        self.time_limit_label.setFont(QFont("Arial", 12))
+        budget_layout.addWidget(self.time_limit_label)
+        self.time_limit_spinbox = QSpinBox()
+        self.time_limit_spinbox.setRange(0, 24 * 60)
+        self.time_limit_spinbox.setSpecialValueText("No limit")
+        self.time_limit_spinbox.setToolTip("Stop the deep crawl after this long and keep the results so far.")
+        budget_layout.addWidget(self.time_limit_spinbox)
+
+        self.bloom_checkbox = QCheckBox("Low-memory URL tracking")
+        self.bloom_checkbox.setToolTip(
+            "Remember crawled URLs in a fixed amount of memory for very large deep crawls. "
+            "A very small share of new URLs may be skipped as if already seen."
+        )
+        self.bloom_checkbox.setFont(QFont("Arial", 12))
+        budget_layout.addWidget(self.bloom_checkbox)
+        budget_layout.addStretch()
+        main_layout.addLayout(budget_layout)
+
+        # Pages nearly the same as one already crawled, such as print and AMP versions
+        duplicates_layout = QHBoxLayout()
+        self.duplicates_label = QLabel("Near-duplicate pages:")
+        self.duplicates_label.setFont(QFont("Arial", 12))
+        duplicates_layout.addWidget(self.duplicates_label)
+        self.duplicates_combobox = QComboBox()
+        for label, mode in [
+            ("Crawl them all", "off"),
+            ("Skip them", "skip"),
+            ("Count but flag them", "flag"),
+        ]:
+            self.duplicates_combobox.addItem(label, mode)
+        self.duplicates_combobox.setCurrentIndex(self.duplicates_combobox.findData(DEFAULT_NEAR_DUPLICATES))
+        self.duplicates_combobox.setToolTip(
+            "Deep crawl pages whose text is nearly the same as a page already crawled, such as print, AMP and "
+            "translated versions or listings that share most of their stories, can be left out of the results or "
+            "counted with a message. Either way their links aren't followed."
+        )
+        self.duplicates_combobox.currentIndexChanged.connect(self.update_duplicates_state)
+        duplicates_layout.addWidget(self.duplicates_combobox)
+
+        self.similarity_label = QLabel("Similarity (%):")
+        self.similarity_label.setFont(QFont("Arial", 12))
+        duplicates_layout.addWidget(self.similarity_label)
+        self.similarity_spinbox = QSpinBox()
+        self.similarity_spinbox.setRange(50, 100)
+        self.similarity_spinbox.setValue(round(DEFAULT_DUPLICATE_SIMILARITY * 100))
+        self.similarity_spinbox.setToolTip(
+            "How alike two pages' fingerprints must be to count as near-duplicates. Lower catches more variants "
+            "but may also catch pages that only share a template."
+        )
+        duplicates_layout.addWidget(self.similarity_spinbox)
+        duplicates_layout.addStretch()
+        self.update_duplicates_state()
+        main_layout.addLayout(duplicates_layout)
 
         # Set the layout and window properties
         self.setLayout(main_layout)
@@ -190,143 +699,48 @@ class CrawlCount(QWidget):
             QPushButton:hover {
                 background-color: #5A6268;
             }
+            QPushButton:disabled {
+                background-color: #ADB5BD;
+            }
         """
         )
 
     def scrape_and_count(self):
-        self.results_label.setText("Results:")
-        timer_start = time.time()
-
-        urls = self.urls_textbox.toPlainText().strip().splitlines()
-        search_terms = self.search_terms_textbox.toPlainText().strip().splitlines()
-
-        if not urls or not search_terms:
-            QMessageBox.critical(
-                self, "Error", "Please enter at least one URL and one search term."
-            )
-            return
-
-        self.results_textbox.clear()
-        self.results_data.clear()  # Clear previous results
-
-        # Initialize counters
-        total_urls = len(urls)
-        urls_with_any_terms = 0
-        urls_with_all_terms = 0
-        processed_urls = set()
-
-        # Update status
-        self.status_label.setText("Status: Scraping...")
-        QApplication.processEvents()
-
-        # Use selenium to get the HTML content
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")  # Run headless Chrome
-        chrome_options.add_argument("--window-size=450,450")
-        service = Service(executable_path=ChromeDriverManager().install())
-
-        driver = webdriver.Chrome(service=service)
+        self.start_crawl("scrape")
 
-        for url in urls:
-            if url in processed_urls:
-                self.results_textbox.append(f"Skipped duplicate URL: {url}\n")
-                continue
+    def deep_crawl(self):
+        self.start_crawl("deep_crawl")
 
+    def resume_crawl(self):
+        try:
+            store = CrawlStore(DEFAULT_STATE_PATH)
             try:
-                self.status_label.setText(f"Status: Scraping {url}...")
-                QApplication.processEvents()  # Update the UI
-
-                driver.get(url)
-
-                html = driver.page_source
-
-                # Use requests to get the HTML content
-                timeout = 4
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_11_5) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/50.0.2661.102 Safari/537.36',
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                    'Accept-Language': 'en-US,en;q=0.5',
-                    'Referer': 'https://www.google.com/',
-                    'Connection': 'keep-alive',
-                }
-
-                # response = requests.get(url, headers=headers, timeout=timeout)
-                # response.raise_for_status()
-                
-                # Parse the HTML content with BeautifulSoup
-                soup = BeautifulSoup(html, "html.parser") # response.text if requests packege used
-                text = soup.get_text().lower()
-
-                # Count occurrences of each search term
-                term_counts = Counter()
-                for term in search_terms:
-                    term_counts[term.lower()] += text.count(term.lower())
-
-                # Calculate total matches
-                total_matches = sum(term_counts.values())
-
-                # Determine if URL contains any or all search terms
-                contains_all_terms = all(term.lower() in text for term in search_terms)
-                if any(term_counts.values()):
-                    urls_with_any_terms += 1
-                if contains_all_terms:
-                    urls_with_all_terms += 1
-
-                # Store results for CSV
-                self.results_data.append({"URL": url, "Counts": term_counts})
-
-                # Display results with total matches and individual term details
-                self.results_textbox.append(
-                    f"{total_matches} matches for <a href='{url}'>{url}</a><br>"
-                )
-
-                for term, count in term_counts.items():
-                    self.results_textbox.append(f"  {term}: {count} occurrences")
-                self.results_textbox.append("\n")
-
-                # Add URL to the set of processed URLs
-                processed_urls.add(url)
-            except requests.exceptions.Timeout as e:
-                self.results_textbox.append(f"Failed to retrieve {url}: Timeout. {e}\n\n")
-                time.sleep(5)
-                continue
-            except requests.exceptions.RequestException as e:
-                self.results_textbox.append(f"Failed to retrieve {url}: RequestException {e}\n\n")
-                time.sleep(5)
-                continue
-            except requests.exceptions.ConnectionError as e:
-                self.results_textbox.append(f"Failed to retrieve {url}: ConnectionError. {e}\n\n")
-                time.sleep(5)
-                continue
-            except requests.exceptions.HTTPError as e:
-                self.results_textbox.append(f"Failed to retrieve {url}: HTTPError. {e}\n\n")
-                time.sleep(5)
-                continue
-
-        # Calculate percentages
-        percentage_any_terms = (
-            (urls_with_any_terms / total_urls) * 100 if total_urls > 0 else 0
-        )
-        percentage_all_terms = (
-            (urls_with_all_terms / total_urls) * 100 if total_urls > 0 else 0
-        )
-
-        # Final status update
-        self.status_label.setText("Status: Completed")
-        QApplication.processEvents()
+                saved = store.latest_unfinished()
+            finally:
+                store.close()
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to load the saved crawl: {e}")
+            return
+        if saved is None:
+            QMessageBox.information(self, "Resume crawl", "There is no unfinished deep crawl to resume.")
+            return
 
-        # Stop timer
-        elapsed_time = time.time() - timer_start
+        # Show what is being resumed. The saved settings are used so the crawl carries on unchanged,
+        # apart from the budgets, which can be raised for a crawl that ran out
+        self.urls_textbox.setPlainText("\n".join(saved.urls))
+        self.search_terms_textbox.setPlainText("\n".join(saved.search_terms))
+        settings = CrawlSettings.from_dict(saved.settings).with_budgets_from(self.current_settings())
+        self.run_crawl("deep_crawl", saved.urls, saved.search_terms, settings, saved)
 
-        # Append summary to results
-        self.results_label.setText(
-            f"Results: {percentage_any_terms:.1f}% of the URLs contained one or more search terms. " + 
-            f"{percentage_all_terms:.1f}% included all the search terms. Elapsed time: {elapsed_time:.2f}s."
-        )
+    def recount(self):
+        search_terms = self.search_terms_textbox.toPlainText().strip().splitlines()
+        if not search_terms:
+            QMessageBox.critical(self, "Error", "Please enter at least one search term.")
+            return
+        self.run_crawl("recount", [], search_terms, self.current_settings())
 
-    def deep_crawl(self):
+    def start_crawl(self, mode):
         self.results_label.setText("Results:")
-        timer_start = time.time()
 
         urls = self.urls_textbox.toPlainText().strip().splitlines()
         search_terms = self.search_terms_textbox.toPlainText().strip().splitlines()
@@ -337,102 +751,193 @@ class CrawlCount(QWidget):
             )
             return
 
-        self.results_textbox.clear()
-        self.results_data.clear()  # Clear previous results
-
-        # Initialize URL queue with (URL, depth) tuples and processed URL set
-        url_queue = deque((url, 0) for url in urls)
-        processed_urls = set()
-
-        # Update status
-        self.status_label.setText("Status: Deep Crawling...")
-        QApplication.processEvents()
-
-        while url_queue:
-            current_url, depth = url_queue.popleft()
-            self.crawl_url(
-                current_url,
-                search_terms,
-                processed_urls,
-                url_queue,
-                depth
-            )
-            print("Queue size:", len(url_queue))
-
-        # Final status update
-        self.status_label.setText("Status: Completed")
-        QApplication.processEvents()
-
-        # Stop timer
-        elapsed_time = time.time() - timer_start
-
-        # Append summary to results
-        self.results_label.setText(
-            "Results: X% of the URLs contained one or more search terms. " + 
-            f"X% included all the search terms. Elapsed time: {elapsed_time:.2f}s."
+        self.run_crawl(mode, urls, search_terms, self.current_settings())
+
+    def current_settings(self):
+        return CrawlSettings(
+            use_selenium=self.checkbox.isChecked(),
+            concurrent=self.concurrent_checkbox.isChecked(),
+            concurrency=self.concurrency_spinbox.value(),
+            per_host=self.per_host_spinbox.value(),
+            case_sensitive=self.match_case_checkbox.isChecked(),
+            whole_words=self.whole_words_checkbox.isChecked(),
+            use_cache=self.cache_checkbox.isChecked(),
+            cache_ttl=self.cache_ttl_spinbox.value() * 3600,
+            extractor=self.extractor_combobox.currentText(),
+            analysis_workers=self.workers_spinbox.value(),
+            bloom_filter=self.bloom_checkbox.isChecked(),
+            max_depth=self.max_depth_spinbox.value(),
+            scope=self.scope_combobox.currentData(),
+            allowlist=tuple(host.strip() for host in self.allowlist_textbox.text().split(",") if host.strip()),
+            max_pages=self.max_pages_spinbox.value(),
+            max_pages_per_host=self.max_pages_per_host_spinbox.value(),
+            time_limit=self.time_limit_spinbox.value() * 60,
+            discovery=self.discovery_combobox.currentData(),
+            sitemap_max_age=self.sitemap_age_spinbox.value(),
+            near_duplicates=self.duplicates_combobox.currentData(),
+            duplicate_similarity=self.similarity_spinbox.value() / 100,
+            obey_robots=self.robots_checkbox.isChecked(),
+            host_rate=self.host_rate_spinbox.value(),
+            max_page_bytes=self.max_page_spinbox.value() * 1024 * 1024,
+            corpus_path=DEFAULT_CORPUS_PATH if self.corpus_checkbox.isChecked() else "",
         )
 
-    def crawl_url(self, url, search_terms, processed_urls, url_queue, depth):
-        # Skip if the URL has already been processed
-        if url in processed_urls:
+    def run_crawl(self, mode, urls, search_terms, settings, saved_crawl=None):
+        self.results_label.setText("Results:")
+        self.messages_textbox.clear()
+        self.results_model.reset(search_terms)
+        self.results_path = new_results_path()
+
+        # Run the crawl in a separate thread so the window stays responsive
+        driver_pool = self.get_driver_pool() if settings.use_selenium else None
+        self.crawl_thread = CrawlThread(
+            mode, urls, search_terms, settings, self.results_path, driver_pool, saved_crawl
+        )
+        self.crawl_thread.status_signal.connect(self.status_label.setText)
+        self.crawl_thread.batch_signal.connect(self.show_batch)
+        self.crawl_thread.finished_signal.connect(self.crawl_finished)
+        self.set_running(True)
+        self.crawl_thread.start()
+
+    def get_driver_pool(self):
+        # Keep the same browsers between runs unless the pool size changed
+        size = self.browsers_spinbox.value()
+        if self.driver_pool is not None and self.driver_pool.size != size:
+            self.driver_pool.shutdown()
+            self.driver_pool = None
+        if self.driver_pool is None:
+            self.driver_pool = DriverPool(size)
+        return self.driver_pool
+
+    def toggle_pause(self):
+        if self.crawl_thread is None:
             return
-
-        # Limit crawl depth to 1 level
-        if depth > 1:
+        control = self.crawl_thread.control
+        if control.paused:
+            control.resume()
+            self.pause_button.setText("Pause")
+            self.status_label.setText("Status: Resumed")
+        else:
+            control.pause()
+            self.pause_button.setText("Resume")
+            self.status_label.setText("Status: Paused")
+
+    def cancel_crawl(self):
+        if self.crawl_thread is None:
             return
+        self.crawl_thread.control.cancel()
+        self.status_label.setText("Status: Cancelling...")
+
+    def set_running(self, running):
+        self.scrape_button.setEnabled(not running)
+        self.deep_crawl_button.setEnabled(not running)
+        self.resume_button.setEnabled(not running)
+        self.recount_button.setEnabled(not running)
+        self.upload_button.setEnabled(not running)
+        self.pause_button.setEnabled(running)
+        self.cancel_button.setEnabled(running)
+        self.pause_button.setText("Pause")
+
+    def show_batch(self, batch):
+        # Add the whole batch to the table at once, so the view updates once per batch
+        results = [payload for kind, payload in batch if kind == "result"]
+        if results:
+            self.results_model.add_results(results)
+        for kind, payload in batch:
+            if kind == "message":
+                self.messages_textbox.appendPlainText(payload)
+        self.update_shown_count()
+
+    def apply_results_filter(self):
+        self.results_model.set_filter(
+            self.filter_textbox.text(),
+            self.filter_term_combobox.currentData(),
+            self.min_count_spinbox.value(),
+        )
 
-        try:
-            self.status_label.setText(f"Status: Crawling {url}...")
-            QApplication.processEvents()  # Update the UI
-
-            response = requests.get(url)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-            text = soup.get_text().lower()
-
-            # Count occurrences of each search term
-            term_counts = Counter()
-            for term in search_terms:
-                term_counts[term.lower()] += text.count(term.lower())
-
-            # Calculate total matches
-            total_matches = sum(term_counts.values())
+    def update_term_filter(self):
+        # Offer the run's search terms, keeping the chosen one if it is still there
+        terms = self.results_model.matrix.terms
+        if [self.filter_term_combobox.itemData(i) for i in range(1, self.filter_term_combobox.count())] == terms:
+            return
+        current = self.filter_term_combobox.currentData()
+        self.filter_term_combobox.blockSignals(True)
+        self.filter_term_combobox.clear()
+        self.filter_term_combobox.addItem("Any term", None)
+        for term in terms:
+            self.filter_term_combobox.addItem(term, term)
+        self.filter_term_combobox.setCurrentIndex(max(0, self.filter_term_combobox.findData(current)))
+        self.filter_term_combobox.blockSignals(False)
+
+    def update_shown_count(self):
+        self.shown_label.setText(
+            f"{self.results_model.rowCount()} of {len(self.results_model.matrix)} URLs shown"
+        )
 
-            # Store results for CSV
-            self.results_data.append({"URL": url, "Counts": term_counts})
+    def open_result(self, index):
+        QDesktopServices.openUrl(QUrl(self.results_model.url(index.row())))
 
-            # Display results with total matches and individual term details
-            self.results_textbox.append(
-                f"{total_matches} matches for <a href='{url}'>{url}</a><br>"
-            )
+    def crawl_finished(self, summary):
+        self.crawl_thread = None
+        self.set_running(False)
 
-            for term, count in term_counts.items():
-                self.results_textbox.append(f"  {term}: {count} occurrences")
-            self.results_textbox.append("\n")
+        # Final status update
+        self.status_label.setText(
+            "Status: Cancelled" if summary.get("cancelled") else "Status: Completed"
+        )
 
-            # Add URL to the set of processed URLs
-            processed_urls.add(url)
+        if "error" in summary:
+            self.results_label.setText(f"Results: Crawl failed: {summary['error']}")
+        else:
+            # Every result reached the table before the summary, so its matrix has the run's totals
+            summary.update(self.results_model.matrix.summary())
+            self.results_label.setText(f"Results: {format_summary(summary)}\nResults file: {self.results_path}")
 
-            # Add all links found on this page to the queue with increased depth
-            all_links = soup.find_all("a", href=True)
-            print(f"Found {len(all_links)} links at depth {depth} on {url}.")
+    def update_allowlist_state(self):
+        self.allowlist_textbox.setEnabled(self.scope_combobox.currentData() == "allowlist")
 
-            for link in all_links:
-                next_url = urljoin(url, link["href"])
-                next_url = (
-                    urlparse(next_url)._replace(query="", fragment="").geturl()
-                )  # Clean URL
+    def update_sitemap_state(self):
+        self.sitemap_age_spinbox.setEnabled(self.discovery_combobox.currentData() != "links")
 
-                # Only add new URLs to the queue if they haven't been processed
-                if next_url not in processed_urls:
-                    url_queue.append((next_url, depth + 1))
+    def update_duplicates_state(self):
+        self.similarity_spinbox.setEnabled(self.duplicates_combobox.currentData() != "off")
 
-        except requests.exceptions.RequestException as e:
-            self.results_textbox.append(f"Failed to retrieve {url}: {e}\n\n")
+    def clear_cache(self):
+        if self.crawl_thread is not None:
+            QMessageBox.critical(self, "Error", "Wait for the running crawl to finish before clearing the cache.")
+            return
+        try:
+            cache = ResponseCache(DEFAULT_CACHE_PATH)
+            cache.clear()
+            cache.close()
+            QMessageBox.information(self, "Success", "Page cache cleared.")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to clear the cache: {e}")
+
+    def closeEvent(self, event):
+        # Stop a running crawl before the window goes away
+        if self.crawl_thread is not None:
+            self.crawl_thread.control.cancel()
+            self.crawl_thread.wait()
+        if self.driver_pool is not None:
+            self.driver_pool.shutdown()
+        event.accept()
+
+    def saved_results(self):
+        """The last run's results, read back from the file they were streamed to."""
+        return CountMatrix.from_results(self.results_path, self.results_model.matrix.terms)
+
+    def can_download(self):
+        if self.crawl_thread is not None:
+            QMessageBox.critical(self, "Error", "Wait for the running crawl to finish before downloading its results.")
+            return False
+        if not len(self.results_model.matrix) or self.results_path is None:
+            QMessageBox.critical(self, "Error", "No results available to download.")
+            return False
+        return True
 
     def download_excel(self):
-        if not self.results_data:
-            QMessageBox.critical(self, "Error", "No results available to download.")
+        if not self.can_download():
             return
 
         # Ask the user for a file name and location to save the Excel file
@@ -447,74 +952,7 @@ class CrawlCount(QWidget):
 
         if file_path:
             try:
-                # Create a new Excel workbook and add sheets
-                wb = Workbook()
-
-                # Remove the default sheet if present
-                if "Sheet" in wb.sheetnames:
-                    wb.remove(wb["Sheet"])
-
-                # Summary sheet
-                summary_ws = wb.create_sheet(title="Summary")
-                summary_ws.append(["Base Domain", "Total Count"])
-
-                # Dictionary to store aggregated counts by base domain
-                domain_counts = {}
-                for data in self.results_data:
-                    url = data["URL"]
-                    domain = urlparse(url).netloc
-                    total_count = sum(data["Counts"].values())
-
-                    if domain in domain_counts:
-                        domain_counts[domain] += total_count
-                    else:
-                        domain_counts[domain] = total_count
-
-                # Write aggregated counts to the Summary sheet
-                for domain, count in domain_counts.items():
-                    if not domain.startswith("https://"):
-                        domain = "https://" + domain
-
-                    summary_ws.append([domain, count])
-
-                # Create clickable URLs in Summary sheet
-                for row in summary_ws.iter_rows(min_row=2, max_col=1):
-                    for cell in row:
-                        cell.hyperlink = cell.value
-                        cell.style = "Hyperlink"
-
-                # Detailed sheet
-                detailed_ws = wb.create_sheet(title="Detailed")
-                detailed_ws.append(["URL", "Search Term", "Count"])
-
-                # Write detailed counts to the detailed sheet
-                for data in self.results_data:
-                    url = data["URL"]
-                    for term, count in data["Counts"].items():
-                        detailed_ws.append([url, term, count])
-
-                # Create clickable URLs in Detailed sheet
-                for row in detailed_ws.iter_rows(min_row=2, max_col=1):
-                    for cell in row:
-                        cell.hyperlink = cell.value
-                        cell.style = "Hyperlink"
-
-                # Auto-adjust column widths for readability
-                for ws in [summary_ws, detailed_ws]:
-                    for col in ws.columns:
-                        max_length = 0
-                        column = col[0].column_letter  # Get the column name
-                        for cell in col:
-                            try:
-                                if len(str(cell.value)) > max_length:
-                                    max_length = len(cell.value)
-                            except:
-                                pass
-                        adjusted_width = max_length + 2
-                        ws.column_dimensions[column].width = adjusted_width
-
-                # Save the workbook
-                wb.save(file_path)
+                export_excel(self.saved_results(), file_path)
 
                 QMessageBox.information(
                     self, "Success", f"Results successfully saved to {file_path}"
@@ -523,8 +961,7 @@ class CrawlCount(QWidget):
                 QMessageBox.critical(self, "Error", f"Failed to save Excel file: {e}")
 
     def download_csv(self):
-        if not self.results_data:
-            QMessageBox.critical(self, "Error", "No results available to download.")
+        if not self.can_download():
             return
 
         # Ask the user for a file name and location to save the CSV
@@ -539,17 +976,7 @@ class CrawlCount(QWidget):
 
         if file_path:
             try:
-                with open(file_path, "w", newline="", encoding="utf-8") as csvfile:
-                    fieldnames = ["URL", "Search Term", "Count"]
-                    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-                    writer.writeheader()
-                    for data in self.results_data:
-                        url = data["URL"]
-                        for term, count in data["Counts"].items():
-                            writer.writerow(
-                                {"URL": url, "Search Term": term, "Count": count}
-                            )
+                export_csv(self.saved_results(), file_path)
 
                 QMessageBox.information(
                     self, "Success", f"Results successfully saved to {file_path}"
@@ -570,19 +997,7 @@ class CrawlCount(QWidget):
 
         if file_path:
             try:
-                urls = []
-                search_terms = []
-
-                # Read the CSV file and extract URLs and search terms
-                with open(file_path, "r", encoding="utf-8") as csvfile:
-                    reader = csv.DictReader(csvfile)
-                    for row in reader:
-                        url = row.get("urls", "").strip()
-                        term = row.get("terms", "").strip()
-                        if url:
-                            urls.append(url)
-                        if term:
-                            search_terms.append(term)
+                urls, search_terms = read_input_csv(file_path)
 
                 # Populate the input fields
                 self.urls_textbox.setPlainText("\n".join(urls))
@@ -600,11 +1015,24 @@ class CrawlCount(QWidget):
             "CrawlCount Help\n\n"
             "1. Enter URLs: Input the URLs you want to scrape in the 'Enter URLs' textbox. Each URL should be on a new line.\n\n"
             "2. Enter Search Terms: Input the search terms you want to look for in the 'Enter search terms' textbox. Each term should be on a new line.\n\n"
-            "3. Start scrape: Click the 'Start scrape' button to begin searching the provided URLs for the specified terms. Results will be displayed in the results area.\n\n"
-            "4. Start deep crawl: Click the 'Start deep crawl' button to start crawling initial URLs then all links found on the initial URLs. This will search within these linked pages as well to 1 level deep.\n\n"
+            "Match case and Whole words only: Tick these under the search terms to count only exact-case matches or to ignore terms found inside longer words.\n\n"
+            "3. Start scrape: Click the 'Start scrape' button to begin searching the provided URLs for the specified terms. Results will be displayed in the results table.\n\n"
+            "4. Start deep crawl: Click the 'Start deep crawl' button to start crawling initial URLs then all links found on the initial URLs. This will search within these linked pages as well, to 'Max depth' levels deep (1 by default).\n\n"
+            "Crawl scope and budgets: 'Follow links to' keeps the deep crawl on the starting hosts, the starting sites including their subdomains, or an allowlist of domains. 'Max pages', 'Max pages per host' and 'Time limit' stop the crawl early and keep the results so far. Use 0 for no limit.\n\n"
+            "Find pages: Deep crawls normally find pages by following the links on each page. 'From sitemaps' reads the sitemaps each starting site publishes (listed in its robots.txt, or at /sitemap.xml) and crawls the pages they list instead, which reaches a site's articles with far fewer downloads. 'From sitemaps and links' does both. 'Changed in the last (days)' skips sitemap pages last modified before then, and 'Obey robots.txt' skips pages a site asks crawlers to avoid.\n\n"
+            "Resume crawl: Deep crawls save their progress every few seconds. If one was cancelled, stopped by a budget or the app was closed, 'Resume crawl' carries on the latest one with its original URLs, search terms and settings, without fetching the pages it already crawled. The current 'Max pages', 'Max pages per host' and 'Time limit' apply, so a crawl that hit a budget can be given more.\n\n"
+            "Results table: Each row is a URL with its total matches and a column for each search term. Click a column header to sort by it and double-click a row to open the page. 'Filter URLs', 'Term' and 'At least' narrow the table to URLs containing some text, a particular term or a minimum number of matches. Downloads always include every URL.\n\n"
+            "Recount stored crawl: Tick 'Keep page text' before a scrape or deep crawl to store the text of every page it reads. Afterwards, change the search terms and click 'Recount stored crawl' to count them in those pages in seconds, without downloading anything. The URLs box isn't used.\n\n"
+            "Near-duplicate pages: News sites link to many copies of the same story, such as print and AMP versions, translations and listings that share most of their stories. During a deep crawl each page's text is fingerprinted, and a page whose fingerprint is at least 'Similarity (%)' alike a page already crawled is either left out ('Skip them') or counted with a message naming the page it copies ('Count but flag them'). Either way its links aren't followed. The summary says how many were found. The default of 92% catches copies with about one word in a hundred changed; lower it to catch copies edited more.\n\n"
+            "Pause and Cancel: While a scrape or deep crawl is running, 'Pause' holds it until you click 'Resume' and 'Cancel' stops it early, keeping the results collected so far.\n\n"
+            "Page cache: Pages are kept on disk so running again with new search terms doesn't download them again. After the 'Recheck after' hours a cached page is only downloaded again if the site says it changed. Untick 'Use page cache' to always download, or click 'Clear cache' to empty it.\n\n"
+            "Low-memory URL tracking: For very large deep crawls, tick this to remember crawled URLs in a fixed amount of memory. A very small share of new pages may be skipped as if already crawled.\n\n"
+            "Requests/s per host: Limits how fast any one site is asked for pages. A site that times out or returns server errors is left alone for a while and retried later, while the other sites carry on.\n\n"
+            "Max page size (MB): Pages are downloaded bit by bit and cut off at this size. Links to PDFs, images, videos and other files that aren't web pages are skipped as soon as the site says what they are, without downloading them. The summary shows how much was saved.\n\n"
+            "Parse processes: Finding the text on a page and counting the terms uses the CPU, and the app can only use one core for it. Set this to the number of CPU cores to parse pages in separate processes while downloading carries on. Most useful for big crawls with many fetches at once.\n\n"
             "5. Upload CSV: Click the 'Upload CSV' button to upload a CSV file with columns 'urls' and 'terms' to populate the input fields.\n\n"
-            "6. Download results: Click the 'Download Excel' or 'Download CSV' buttons to save the results. The Excel version contains aggregated summary counts by domain and detailed terms by URL.\n\n"
-            "7. Use Selenium: Tick the checkbox at the bottom to use Selenium which launches a browser to scrape. More reliable and handles problematic sites better but is slower.\n\n"
+            "6. Download results: Click the 'Download Excel' or 'Download CSV' buttons to save the results. The Excel version contains aggregated summary counts by domain and detailed terms by URL. Results are also written to a file as they arrive (shown under Results), so they survive if the app is closed mid-crawl.\n\n"
+            "7. Use Selenium: Tick the checkbox at the bottom to use Selenium which launches headless browsers to scrape. More reliable and handles problematic sites better but is slower. The browsers are started on the first Selenium scrape and reused until the window is closed; 'Browsers' sets how many run at once.\n\n"
             "Thanks again for using CrawlCount.\n\n\n"
             "https://www.gnu.org/licenses/gpl-3.0.en.html\n"
             "https://github.com/shedloadofcode/CrawlCount"
@@ -613,7 +1041,23 @@ class CrawlCount(QWidget):
 
 
 if __name__ == "__main__":
+    if getattr(sys, "frozen", False):
+        # Lets parse processes start from a PyInstaller build instead of opening another window
+        import multiprocessing
+
+        multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     ex = CrawlCount()
+    # Quit any browsers left open, even if the window was never closed normally
+    app.aboutToQuit.connect(lambda: ex.driver_pool and ex.driver_pool.shutdown())
+
+    if PROFILER is not None:
+        # Report from the first pass of the event loop, once the window has been shown
+        def report_startup():
+            PROFILER.mark_window_shown()
+            print(PROFILER.report())
+            app.quit()
+
+        QTimer.singleShot(0, report_startup)
 
     sys.exit(app.exec_())
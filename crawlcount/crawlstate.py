@@ -0,0 +1,154 @@
+import json
+import os
+import sqlite3
+import time
+from collections import Counter
+from dataclasses import asdict
+
+
+DEFAULT_STATE_PATH = os.path.join(os.path.expanduser("~"), ".crawlcount", "crawls.sqlite3")
+DEFAULT_CHECKPOINT_INTERVAL = 10.0  # Seconds between checkpoints
+
+QUEUED = "queued"
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"  # Near-duplicates, pages robots.txt disallows and responses that aren't web pages
+
+
+class SavedCrawl:
+    """A deep crawl loaded back from a CrawlStore."""
+
+    def __init__(self, crawl_id, status, urls, search_terms, settings, updated_at):
+        self.crawl_id = crawl_id
+        self.status = status
+        self.urls = urls
+        self.search_terms = search_terms
+        self.settings = settings
+        self.updated_at = updated_at
+        self.queued = []  # (url, depth) still to crawl, in the order they were found
+        self.seen = []  # Every URL the frontier has accepted
+        self.done = []  # URLs already crawled or given up on
+
+
+class CrawlStore:
+    """Keeps a deep crawl's frontier, visited set and results in SQLite.
+
+    Changes are buffered in memory and written in one transaction by
+    ``checkpoint``, which ``checkpoint_if_due`` calls at most every
+    ``interval`` seconds. A crawl that was cancelled, closed or killed can be
+    loaded again with ``load_crawl`` and carried on from its last checkpoint.
+    Pages in flight at the time are simply fetched again.
+    """
+
+    def __init__(self, path=DEFAULT_STATE_PATH, interval=DEFAULT_CHECKPOINT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS crawls (
+                id INTEGER PRIMARY KEY,
+                status TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                urls TEXT NOT NULL,
+                search_terms TEXT NOT NULL,
+                settings TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                crawl_id INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                depth INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                counts TEXT,
+                UNIQUE (crawl_id, url)
+            );
+            CREATE INDEX IF NOT EXISTS pages_state ON pages (crawl_id, state);
+            """
+        )
+        self._db.commit()
+        self._queued = []
+        self._finished = []
+        self._last_checkpoint = time.monotonic()
+
+    def start_crawl(self, urls, search_terms, settings):
+        now = time.time()
+        cursor = self._db.execute(
+            "INSERT INTO crawls (status, started_at, updated_at, urls, search_terms, settings) VALUES (?, ?, ?, ?, ?, ?)",
+            ("running", now, now, json.dumps(urls), json.dumps(search_terms), json.dumps(asdict(settings))),
+        )
+        self._db.commit()
+        return cursor.lastrowid
+
+    def queued(self, url, depth):
+        self._queued.append((url, depth))
+
+    def finished(self, url, term_counts=None, skipped=False):
+        """Record a crawled page with its counts, a page that failed for good or one that was ``skipped``."""
+        if skipped:
+            self._finished.append((url, SKIPPED, None))
+        elif term_counts is not None:
+            self._finished.append((url, DONE, json.dumps(dict(term_counts))))
+        else:
+            self._finished.append((url, FAILED, None))
+
+    def checkpoint_if_due(self, crawl_id):
+        if time.monotonic() - self._last_checkpoint >= self.interval:
+            self.checkpoint(crawl_id)
+
+    def checkpoint(self, crawl_id, status=None):
+        with self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO pages (crawl_id, url, depth, state) VALUES (?, ?, ?, ?)",
+                [(crawl_id, url, depth, QUEUED) for url, depth in self._queued],
+            )
+            self._db.executemany(
+                "UPDATE pages SET state = ?, counts = ? WHERE crawl_id = ? AND url = ?",
+                [(state, counts, crawl_id, url) for url, state, counts in self._finished],
+            )
+            if status is None:
+                self._db.execute("UPDATE crawls SET updated_at = ? WHERE id = ?", (time.time(), crawl_id))
+            else:
+                self._db.execute(
+                    "UPDATE crawls SET updated_at = ?, status = ? WHERE id = ?", (time.time(), status, crawl_id)
+                )
+        self._queued.clear()
+        self._finished.clear()
+        self._last_checkpoint = time.monotonic()
+
+    def latest_unfinished(self):
+        """The most recent crawl that didn't run to completion, or None."""
+        row = self._db.execute(
+            "SELECT id FROM crawls WHERE status != 'finished' ORDER BY updated_at DESC LIMIT 1"
+        ).fetchone()
+        return self.load_crawl(row[0]) if row else None
+
+    def load_crawl(self, crawl_id):
+        row = self._db.execute(
+            "SELECT id, status, urls, search_terms, settings, updated_at FROM crawls WHERE id = ?", (crawl_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        saved = SavedCrawl(row[0], row[1], json.loads(row[2]), json.loads(row[3]), json.loads(row[4]), row[5])
+        for url, depth, state in self._db.execute(
+            "SELECT url, depth, state FROM pages WHERE crawl_id = ? ORDER BY rowid", (crawl_id,)
+        ):
+            saved.seen.append(url)
+            if state == QUEUED:
+                saved.queued.append((url, depth))
+            else:
+                saved.done.append(url)
+        return saved
+
+    def results(self, crawl_id):
+        """Yield ``(url, Counter)`` for every page crawled so far."""
+        for url, counts in self._db.execute(
+            "SELECT url, counts FROM pages WHERE crawl_id = ? AND state = ? ORDER BY rowid", (crawl_id, DONE)
+        ):
+            yield url, Counter(json.loads(counts))
+
+    def close(self):
+        self._db.close()
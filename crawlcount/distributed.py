@@ -0,0 +1,823 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict
+from urllib.parse import unquote, urlsplit
+
+from counts import CountMatrix
+from engine import CrawlListener, Crawler, CrawlSettings, RunControl
+from frontier import Frontier
+from matcher import TermMatcher
+from scope import CrawlScope
+from sitemaps import RobotsCache
+from urls import normalize_url
+
+
+DEFAULT_JOB = "crawl"
+DEFAULT_LEASE = 60.0  # Seconds a worker may hold claimed URLs without a heartbeat
+DEFAULT_BATCH_SIZE = 20  # URLs claimed at a time
+DEFAULT_POLL_INTERVAL = 2.0  # Seconds between checks when the queue is empty or being watched
+DEFAULT_JOB_WAIT = 600.0  # Seconds a worker started before its coordinator waits for the job to appear
+REDIS_PREFIX = "crawlcount"
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"  # Over the per-host page limit
+IGNORED = "ignored"  # Claimed, then skipped by the worker: a near-duplicate, disallowed by robots.txt or not a web page
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def open_queue(address):
+    """Open the shared work queue at ``address``.
+
+    A redis:// URL (redis://[:password@]host[:port][/db]) uses any server
+    that speaks the Redis protocol, for workers on several machines.
+    Anything else is the path of a SQLite file, for workers on one machine.
+    """
+    if address.startswith("redis://"):
+        return RedisQueue(address)
+    return SqliteQueue(address)
+
+
+class SqliteQueue:
+    """The shared frontier and results of distributed crawls in a SQLite file.
+
+    Each URL of a job is one row that moves from queued to leased to done,
+    failed, ignored or skipped. Every call runs in its own immediate transaction, so
+    any number of worker processes on the machine can share the file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                config TEXT NOT NULL,
+                requeued INTEGER NOT NULL DEFAULT 0,
+                over_host_budget INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS work (
+                job TEXT NOT NULL,
+                url TEXT NOT NULL,
+                depth INTEGER NOT NULL,
+                host TEXT NOT NULL,
+                state TEXT NOT NULL,
+                worker TEXT,
+                expires REAL,
+                claimed INTEGER NOT NULL DEFAULT 0,
+                counts TEXT,
+                UNIQUE (job, url)
+            );
+            CREATE INDEX IF NOT EXISTS work_state ON work (job, state);
+            CREATE TABLE IF NOT EXISTS seen (
+                job TEXT NOT NULL,
+                key TEXT NOT NULL,
+                PRIMARY KEY (job, key)
+            );
+            CREATE TABLE IF NOT EXISTS hosts (
+                job TEXT NOT NULL,
+                host TEXT NOT NULL,
+                pages INTEGER NOT NULL,
+                PRIMARY KEY (job, host)
+            );
+            CREATE TABLE IF NOT EXISTS workers (
+                job TEXT NOT NULL,
+                worker TEXT NOT NULL,
+                seen REAL NOT NULL,
+                PRIMARY KEY (job, worker)
+            );
+            """
+        )
+
+    def _transaction(self):
+        return _Transaction(self._db, self._lock)
+
+    def now(self):
+        return time.time()
+
+    def create_job(self, job, config):
+        """Store a new job's settings. Returns False if the job already exists."""
+        with self._transaction() as db:
+            cursor = db.execute("INSERT OR IGNORE INTO jobs (id, config) VALUES (?, ?)", (job, json.dumps(config)))
+            return cursor.rowcount == 1
+
+    def job(self, job):
+        with self._transaction() as db:
+            row = db.execute("SELECT config FROM jobs WHERE id = ?", (job,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def add(self, job, items):
+        """Queue ``(url, depth)`` items that the job hasn't seen before. Returns how many were new."""
+        with self._transaction() as db:
+            return self._add(db, job, items)
+
+    def _add(self, db, job, items):
+        # Workers each dedupe their own links, so two of them can find the same page spelled differently
+        added = 0
+        for url, depth in items:
+            if db.execute("INSERT OR IGNORE INTO seen (job, key) VALUES (?, ?)", (job, normalize_url(url))).rowcount:
+                added += db.execute(
+                    "INSERT OR IGNORE INTO work (job, url, depth, host, state) VALUES (?, ?, ?, ?, ?)",
+                    (job, url, depth, urlsplit(url).netloc, QUEUED),
+                ).rowcount
+        return added
+
+    def _requeue_expired(self, db, job, now):
+        cursor = db.execute(
+            "UPDATE work SET state = ?, worker = NULL, expires = NULL WHERE job = ? AND state = ? AND expires < ?",
+            (QUEUED, job, LEASED, now),
+        )
+        if cursor.rowcount:
+            db.execute("UPDATE jobs SET requeued = requeued + ? WHERE id = ?", (cursor.rowcount, job))
+        return cursor.rowcount
+
+    def requeue_expired(self, job):
+        """Put URLs whose lease ran out back in the queue. Returns how many."""
+        with self._transaction() as db:
+            return self._requeue_expired(db, job, self.now())
+
+    def claim(self, job, worker, count, lease, max_pages=0, max_pages_per_host=0, deadline=0):
+        """Lease up to ``count`` queued URLs to ``worker`` for ``lease`` seconds. Returns ``(url, depth)`` pairs.
+
+        Expired leases are re-queued first. Nothing is claimed once
+        ``max_pages`` URLs have been leased or finished or ``deadline`` has
+        passed, and URLs over ``max_pages_per_host`` are skipped.
+        """
+        now = self.now()
+        with self._transaction() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO workers (job, worker, seen) VALUES (?, ?, ?)", (job, worker, now)
+            )
+            self._requeue_expired(db, job, now)
+            if deadline and now >= deadline:
+                return []
+            if max_pages:
+                started = db.execute(
+                    "SELECT COUNT(*) FROM work WHERE job = ? AND state IN (?, ?, ?, ?)",
+                    (job, LEASED, DONE, FAILED, IGNORED),
+                ).fetchone()[0]
+                count = min(count, max_pages - started)
+
+            claimed = []
+            while len(claimed) < count:
+                rows = db.execute(
+                    "SELECT rowid, url, depth, host, claimed FROM work WHERE job = ? AND state = ? ORDER BY rowid LIMIT ?",
+                    (job, QUEUED, count - len(claimed)),
+                ).fetchall()
+                if not rows:
+                    break
+                for rowid, url, depth, host, claimed_before in rows:
+                    # A URL counts against its host the first time it is claimed, not again after a lease expires
+                    if max_pages_per_host and not claimed_before and self._host_full(db, job, host, max_pages_per_host):
+                        db.execute("UPDATE work SET state = ? WHERE rowid = ?", (SKIPPED, rowid))
+                        db.execute("UPDATE jobs SET over_host_budget = over_host_budget + 1 WHERE id = ?", (job,))
+                        continue
+                    db.execute(
+                        "UPDATE work SET state = ?, worker = ?, expires = ?, claimed = 1 WHERE rowid = ?",
+                        (LEASED, worker, now + lease, rowid),
+                    )
+                    claimed.append((url, depth))
+            return claimed
+
+    def _host_full(self, db, job, host, limit):
+        db.execute(
+            "INSERT INTO hosts (job, host, pages) VALUES (?, ?, 1) "
+            "ON CONFLICT (job, host) DO UPDATE SET pages = pages + 1",
+            (job, host),
+        )
+        return db.execute("SELECT pages FROM hosts WHERE job = ? AND host = ?", (job, host)).fetchone()[0] > limit
+
+    def heartbeat(self, job, worker, urls, lease):
+        """Extend the leases ``worker`` still holds on ``urls``. Returns how many it still held."""
+        now = self.now()
+        with self._transaction() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO workers (job, worker, seen) VALUES (?, ?, ?)", (job, worker, now)
+            )
+            before = db.total_changes
+            db.executemany(
+                "UPDATE work SET expires = ? WHERE job = ? AND url = ? AND state = ? AND worker = ?",
+                [(now + lease, job, url, LEASED, worker) for url in urls],
+            )
+            return db.total_changes - before
+
+    def complete(self, job, worker, results, links, skipped=()):
+        """Record crawled URLs and queue the links found on them, in one transaction.
+
+        ``results`` are ``(url, term_counts)`` pairs, with None counts for a
+        URL that failed, and ``skipped`` the URLs the worker chose not to
+        count. A URL already finished by another worker, after this worker's
+        lease expired, keeps the first result.
+        """
+        finished = [
+            (DONE if counts is not None else FAILED, json.dumps(dict(counts)) if counts is not None else None, url)
+            for url, counts in results
+        ]
+        finished.extend((IGNORED, None, url) for url in skipped)
+        with self._transaction() as db:
+            db.executemany(
+                "UPDATE work SET state = ?, worker = NULL, expires = NULL, counts = ? "
+                "WHERE job = ? AND url = ? AND state IN (?, ?)",
+                [(state, counts, job, url, QUEUED, LEASED) for state, counts, url in finished],
+            )
+            return self._add(db, job, links)
+
+    def release(self, job, worker, urls):
+        """Give back leases a worker won't finish, so other workers can claim the URLs straight away."""
+        with self._transaction() as db:
+            db.executemany(
+                "UPDATE work SET state = ?, worker = NULL, expires = NULL WHERE job = ? AND url = ? AND worker = ? AND state = ?",
+                [(QUEUED, job, url, worker, LEASED) for url in urls],
+            )
+
+    def status(self, job):
+        """Counts of URLs in each state, re-queued leases and when each worker was last heard from."""
+        with self._transaction() as db:
+            states = dict(db.execute("SELECT state, COUNT(*) FROM work WHERE job = ? GROUP BY state", (job,)))
+            row = db.execute("SELECT requeued, over_host_budget FROM jobs WHERE id = ?", (job,)).fetchone()
+            workers = dict(db.execute("SELECT worker, seen FROM workers WHERE job = ?", (job,)))
+        requeued, over_host_budget = row or (0, 0)
+        return {
+            "queued": states.get(QUEUED, 0),
+            "leased": states.get(LEASED, 0),
+            "done": states.get(DONE, 0),
+            "failed": states.get(FAILED, 0),
+            "skipped": states.get(IGNORED, 0),
+            "over_host_budget": over_host_budget,
+            "requeued": requeued,
+            "workers": workers,
+        }
+
+    def results(self, job):
+        """Yield ``(url, Counter)`` for every URL crawled so far."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT url, counts FROM work WHERE job = ? AND state = ? ORDER BY rowid", (job, DONE)
+            ).fetchall()
+        for url, counts in rows:
+            yield url, Counter(json.loads(counts))
+
+    def close(self):
+        self._db.close()
+
+
+class _Transaction:
+    # BEGIN IMMEDIATE takes the write lock up front, so two workers can't claim the same rows
+    def __init__(self, db, lock):
+        self.db = db
+        self.lock = lock
+
+    def __enter__(self):
+        self.lock.acquire()
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, kind, value, traceback):
+        try:
+            self.db.execute("COMMIT" if kind is None else "ROLLBACK")
+        finally:
+            self.lock.release()
+
+
+class RedisError(Exception):
+    """An error reply from the Redis server."""
+
+
+class RespClient:
+    """A minimal client for the Redis protocol (RESP), using only the standard library.
+
+    Enough to run commands and Lua scripts against Redis or any compatible
+    server. Safe to share between threads.
+    """
+
+    def __init__(self, host="localhost", port=6379, db=0, password=None, timeout=30):
+        self._lock = threading.Lock()
+        self._socket = socket.create_connection((host, port), timeout=timeout)
+        self._file = self._socket.makefile("rb")
+        if password:
+            self.execute("AUTH", password)
+        if db:
+            self.execute("SELECT", db)
+
+    def execute(self, *args):
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        with self._lock:
+            self._socket.sendall(b"".join(parts))
+            return self._read_reply()
+
+    def _read_reply(self):
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("The Redis server closed the connection.")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode("utf-8")
+        if kind == b"-":
+            raise RedisError(rest.decode("utf-8"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self._file.read(length + 2)[:-2]
+            return data.decode("utf-8")
+        if kind == b"*":
+            length = int(rest)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise RedisError(f"Unexpected reply from the Redis server: {line!r}")
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+
+# The Lua scripts below run atomically on the server, using its clock for leases
+_NOW = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+"""
+
+_REQUEUE = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)
+for _, url in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], url)
+    redis.call('HDEL', KEYS[3], url)
+    redis.call('LPUSH', KEYS[1], url)
+end
+if #expired > 0 then
+    redis.call('HINCRBY', KEYS[6], 'requeued', #expired)
+end
+"""
+
+# KEYS: queue, leases, owners, results, hosts, stats, depths, workers, claimed
+# ARGV: worker, count, lease, max_pages, max_pages_per_host, deadline
+_CLAIM = _NOW + """
+redis.call('HSET', KEYS[8], ARGV[1], now)
+""" + _REQUEUE + """
+local deadline = tonumber(ARGV[6])
+if deadline > 0 and now >= deadline then
+    return {}
+end
+local want = tonumber(ARGV[2])
+local max_pages = tonumber(ARGV[4])
+if max_pages > 0 then
+    want = math.min(want, max_pages - redis.call('HLEN', KEYS[4]) - redis.call('ZCARD', KEYS[2]))
+end
+local per_host = tonumber(ARGV[5])
+local claimed = {}
+while #claimed < want * 2 do
+    local url = redis.call('LPOP', KEYS[1])
+    if not url then
+        break
+    end
+    local allowed = true
+    -- A URL counts against its host the first time it is claimed, not again after a lease expires
+    if redis.call('SADD', KEYS[9], url) == 1 and per_host > 0 then
+        local host = string.match(url, '^[%w+.-]+://([^/?#]+)') or ''
+        if redis.call('HINCRBY', KEYS[5], host, 1) > per_host then
+            redis.call('HINCRBY', KEYS[6], 'over_host_budget', 1)
+            allowed = false
+        end
+    end
+    if allowed then
+        redis.call('ZADD', KEYS[2], now + tonumber(ARGV[3]), url)
+        redis.call('HSET', KEYS[3], url, ARGV[1])
+        claimed[#claimed + 1] = url
+        claimed[#claimed + 1] = redis.call('HGET', KEYS[7], url) or '0'
+    end
+end
+return claimed
+"""
+
+# KEYS: queue, leases, owners, results, hosts, stats
+_REQUEUE_EXPIRED = _NOW + """
+local before = tonumber(redis.call('HGET', KEYS[6], 'requeued') or '0')
+""" + _REQUEUE + """
+return tonumber(redis.call('HGET', KEYS[6], 'requeued') or '0') - before
+"""
+
+# KEYS: leases, owners, workers   ARGV: worker, lease, url...
+_HEARTBEAT = _NOW + """
+redis.call('HSET', KEYS[3], ARGV[1], now)
+local renewed = 0
+for i = 3, #ARGV do
+    if redis.call('HGET', KEYS[2], ARGV[i]) == ARGV[1] then
+        redis.call('ZADD', KEYS[1], now + tonumber(ARGV[2]), ARGV[i])
+        renewed = renewed + 1
+    end
+end
+return renewed
+"""
+
+# KEYS: queue, leases, owners, results, seen, depths
+# ARGV: JSON {"results": [[url, counts JSON, "" or "ignored"]], "links": [[url, depth, normalized url]]}
+_COMPLETE = """
+local payload = cjson.decode(ARGV[1])
+for _, result in ipairs(payload.results) do
+    local url = result[1]
+    if redis.call('ZREM', KEYS[2], url) == 0 then
+        -- The lease expired and the URL went back in the queue; it doesn't need crawling again
+        redis.call('LREM', KEYS[1], 1, url)
+    end
+    redis.call('HDEL', KEYS[3], url)
+    redis.call('HSETNX', KEYS[4], url, result[2])
+end
+local added = 0
+for _, link in ipairs(payload.links) do
+    if redis.call('SADD', KEYS[5], link[3]) == 1 then
+        redis.call('HSET', KEYS[6], link[1], link[2])
+        redis.call('RPUSH', KEYS[1], link[1])
+        added = added + 1
+    end
+end
+return added
+"""
+
+# KEYS: queue, leases, owners   ARGV: worker, url...
+_RELEASE = """
+for i = 2, #ARGV do
+    if redis.call('HGET', KEYS[3], ARGV[i]) == ARGV[1] then
+        redis.call('ZREM', KEYS[2], ARGV[i])
+        redis.call('HDEL', KEYS[3], ARGV[i])
+        redis.call('LPUSH', KEYS[1], ARGV[i])
+    end
+end
+return 0
+"""
+
+
+class RedisQueue:
+    """The shared frontier and results of distributed crawls on a Redis-protocol server.
+
+    Each job's keys start with ``crawlcount:<job>:``. The queue is a list of
+    URLs, leases are a sorted set scored by expiry time and results a hash
+    of URL to counts, empty for a failed URL and "ignored" for a skipped
+    one. Claims, heartbeats and completions are Lua scripts, so they are
+    atomic however many workers call them and leases are timed by the
+    server's clock rather than each worker's.
+    """
+
+    def __init__(self, address):
+        parts = urlsplit(address)
+        self.client = RespClient(
+            parts.hostname or "localhost",
+            parts.port or 6379,
+            db=int(parts.path.strip("/") or 0),
+            password=unquote(parts.password) if parts.password else None,
+        )
+
+    def _key(self, job, name):
+        return f"{REDIS_PREFIX}:{job}:{name}"
+
+    def _keys(self, job, *names):
+        return [self._key(job, name) for name in names]
+
+    def _eval(self, script, keys, *args):
+        return self.client.execute("EVAL", script, len(keys), *keys, *args)
+
+    def now(self):
+        seconds, microseconds = self.client.execute("TIME")
+        return int(seconds) + int(microseconds) / 1_000_000
+
+    def create_job(self, job, config):
+        """Store a new job's settings. Returns False if the job already exists."""
+        return self.client.execute("SET", self._key(job, "job"), json.dumps(config), "NX") == "OK"
+
+    def job(self, job):
+        config = self.client.execute("GET", self._key(job, "job"))
+        return json.loads(config) if config else None
+
+    def add(self, job, items):
+        """Queue ``(url, depth)`` items that the job hasn't seen before. Returns how many were new."""
+        return self._complete(job, [], items)
+
+    def requeue_expired(self, job):
+        """Put URLs whose lease ran out back in the queue. Returns how many."""
+        keys = self._keys(job, "queue", "leases", "owners", "results", "hosts", "stats")
+        return self._eval(_REQUEUE_EXPIRED, keys)
+
+    def claim(self, job, worker, count, lease, max_pages=0, max_pages_per_host=0, deadline=0):
+        """Lease up to ``count`` queued URLs to ``worker`` for ``lease`` seconds. Returns ``(url, depth)`` pairs."""
+        keys = self._keys(
+            job, "queue", "leases", "owners", "results", "hosts", "stats", "depths", "workers", "claimed"
+        )
+        reply = self._eval(_CLAIM, keys, worker, count, lease, max_pages, max_pages_per_host, deadline)
+        return [(reply[index], int(reply[index + 1])) for index in range(0, len(reply), 2)]
+
+    def heartbeat(self, job, worker, urls, lease):
+        """Extend the leases ``worker`` still holds on ``urls``. Returns how many it still held."""
+        return self._eval(_HEARTBEAT, self._keys(job, "leases", "owners", "workers"), worker, lease, *urls)
+
+    def complete(self, job, worker, results, links, skipped=()):
+        """Record crawled URLs, with None counts for failures, mark the ``skipped`` ones and queue the links found on them."""
+        return self._complete(job, results, links, skipped)
+
+    def _complete(self, job, results, links, skipped=()):
+        payload = {
+            "results": [[url, json.dumps(dict(counts)) if counts is not None else ""] for url, counts in results]
+            + [[url, IGNORED] for url in skipped],
+            "links": [[url, depth, normalize_url(url)] for url, depth in links],
+        }
+        # cjson turns empty lists into objects, which ipairs still walks as empty
+        keys = self._keys(job, "queue", "leases", "owners", "results", "seen", "depths")
+        return self._eval(_COMPLETE, keys, json.dumps(payload))
+
+    def release(self, job, worker, urls):
+        """Give back leases a worker won't finish, so other workers can claim the URLs straight away."""
+        if urls:
+            self._eval(_RELEASE, self._keys(job, "queue", "leases", "owners"), worker, *urls)
+
+    def status(self, job):
+        """Counts of URLs in each state, re-queued leases and when each worker was last heard from."""
+        results = self.client.execute("HVALS", self._key(job, "results"))
+        stats = self._hash(self._key(job, "stats"))
+        failed = sum(1 for counts in results if not counts)
+        skipped = sum(1 for counts in results if counts == IGNORED)
+        return {
+            "queued": self.client.execute("LLEN", self._key(job, "queue")),
+            "leased": self.client.execute("ZCARD", self._key(job, "leases")),
+            "done": len(results) - failed - skipped,
+            "failed": failed,
+            "skipped": skipped,
+            "over_host_budget": int(stats.get("over_host_budget", 0)),
+            "requeued": int(stats.get("requeued", 0)),
+            "workers": {worker: float(seen) for worker, seen in self._hash(self._key(job, "workers")).items()},
+        }
+
+    def _hash(self, key):
+        values = self.client.execute("HGETALL", key) or []
+        return dict(zip(values[::2], values[1::2]))
+
+    def results(self, job):
+        """Yield ``(url, Counter)`` for every URL crawled so far."""
+        cursor = "0"
+        while True:
+            cursor, values = self.client.execute("HSCAN", self._key(job, "results"), cursor, "COUNT", 1000)
+            for url, counts in zip(values[::2], values[1::2]):
+                if counts and counts != IGNORED:
+                    yield url, Counter(json.loads(counts))
+            if cursor == "0":
+                break
+
+    def close(self):
+        self.client.close()
+
+
+def job_finished(queue, job, config, status=None):
+    """True once nothing is leased and nothing more will be claimed."""
+    status = status or queue.status(job)
+    if status["leased"]:
+        return False
+    settings = config["settings"]
+    started = status["done"] + status["failed"] + status["skipped"]
+    out_of_budget = bool(settings["max_pages"]) and started >= settings["max_pages"]
+    out_of_time = bool(config["deadline"]) and queue.now() >= config["deadline"]
+    return not status["queued"] or out_of_budget or out_of_time
+
+
+class _LeasedBatch:
+    # Stands in for the Crawler's CrawlStore, collecting what to send back to the shared queue
+    def __init__(self):
+        self.results = []
+        self.skipped = []
+        self.links = []
+
+    def queued(self, url, depth):
+        self.links.append((url, depth))
+
+    def finished(self, url, term_counts=None, skipped=False):
+        if skipped:
+            self.skipped.append(url)
+        else:
+            self.results.append((url, term_counts))
+
+    def checkpoint_if_due(self, crawl_id):
+        pass
+
+
+def start_job(queue, job, urls, search_terms, settings, listener=None):
+    """Create a distributed deep crawl and queue its starting URLs.
+
+    Starting URLs go through the same normalizing and scope rules as links
+    found later, and with sitemap discovery the sitemaps are read here and
+    their pages queued too. Returns False if the job already existed, in
+    which case it is left as it was.
+    """
+    listener = listener or CrawlListener()
+    config = {
+        "urls": urls,
+        "search_terms": search_terms,
+        "settings": asdict(settings),
+        "deadline": queue.now() + settings.time_limit if settings.time_limit else 0,
+    }
+    if not queue.create_job(job, config):
+        return False
+
+    # Sitemaps are read here, but pages are only stored and analysed by the workers that crawl them
+    crawler, frontier = _job_crawler(config, listener, RunControl(), {"corpus_path": "", "analysis_workers": 0})
+    for url in urls:
+        frontier.add(url, 0)
+    if settings.discovery != "links":
+        crawler.open_http()
+        try:
+            crawler.seed_from_sitemaps(urls, frontier)
+        finally:
+            crawler.close_http()
+    added = queue.add(job, list(frontier.queue))
+    listener.message(f"Started job '{job}' with {added} URLs queued.")
+    return True
+
+
+def _job_crawler(config, listener, control, overrides=None):
+    settings = CrawlSettings.from_dict(dict(config["settings"], **(overrides or {})))
+    crawler = Crawler(config["search_terms"], settings, listener=listener, control=control)
+    crawler.summary = {"total_urls": 0}
+    scope = CrawlScope(settings.scope, allowlist=settings.allowlist)
+    for url in config["urls"]:
+        scope.add_seed(url)
+    # Links are checked against the depth limit and scope here, before they are sent to the queue
+    crawler.frontier = Frontier(
+        max_depth=settings.max_depth,
+        bloom_filter=settings.bloom_filter,
+        bloom_capacity=settings.bloom_capacity,
+        scope=scope,
+    )
+    if settings.obey_robots or settings.discovery != "links":
+        crawler.robots = RobotsCache(crawler.fetch_quietly)
+    return crawler, crawler.frontier
+
+
+class CrawlWorker:
+    """Crawls URLs claimed from a shared queue until the job is finished.
+
+    URLs are claimed ``batch_size`` at a time on a lease of ``lease``
+    seconds, which a background thread keeps renewing with heartbeats while
+    the batch is crawled. Each batch's counts and the links found on its
+    pages go back in one ``complete`` call. If the worker dies, its leases
+    run out and the URLs are re-queued for other workers; if it is
+    cancelled, they are released straight away. ``overrides`` replace job
+    settings that only affect this machine, such as the page cache or
+    ``analysis_workers``. Workers can be started before the coordinator:
+    one waits up to ``job_wait`` seconds for its job to be created.
+    """
+
+    def __init__(
+        self,
+        queue,
+        job,
+        worker_id=None,
+        listener=None,
+        control=None,
+        overrides=None,
+        batch_size=DEFAULT_BATCH_SIZE,
+        lease=DEFAULT_LEASE,
+        poll_interval=DEFAULT_POLL_INTERVAL,
+        job_wait=DEFAULT_JOB_WAIT,
+    ):
+        self.queue = queue
+        self.job = job
+        self.worker_id = worker_id or default_worker_id()
+        self.listener = listener or CrawlListener()
+        self.control = control or RunControl()
+        self.overrides = overrides or {}
+        self.batch_size = batch_size
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.job_wait = job_wait
+        self.held = set()
+        self._held_lock = threading.Lock()
+        self.pages = 0
+        self.lost_leases = 0
+
+    def run(self):
+        config = self._wait_for_job()
+        if config is None:
+            return {"pages": 0, "lost_leases": 0, "http": None, "duplicates": None, "cancelled": True}
+        settings = config["settings"]
+        crawler, frontier = _job_crawler(config, self.listener, self.control, self.overrides)
+
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(stop_heartbeat,), daemon=True)
+        heartbeat.start()
+        crawler.open_http()
+        try:
+            while self.control.checkpoint():
+                claimed = self.queue.claim(
+                    self.job,
+                    self.worker_id,
+                    self.batch_size,
+                    self.lease,
+                    max_pages=settings["max_pages"],
+                    max_pages_per_host=settings["max_pages_per_host"],
+                    deadline=config["deadline"],
+                )
+                if not claimed:
+                    if job_finished(self.queue, self.job, config):
+                        break
+                    self.listener.status("Status: Waiting for work...")
+                    time.sleep(self.poll_interval)
+                    continue
+                self._crawl_batch(crawler, frontier, claimed)
+        finally:
+            stop_heartbeat.set()
+            heartbeat.join()
+            crawler.close_http()
+            # Anything claimed but not finished goes back for another worker
+            self.queue.release(self.job, self.worker_id, list(self.held))
+        return {
+            "pages": self.pages,
+            "lost_leases": self.lost_leases,
+            "http": crawler.summary.get("http"),
+            "duplicates": crawler.summary.get("duplicates"),
+            "cancelled": self.control.cancelled,
+        }
+
+    def _wait_for_job(self):
+        """Return the job's config once the coordinator has created it, or None if cancelled first."""
+        give_up = time.monotonic() + self.job_wait
+        while self.control.checkpoint():
+            config = self.queue.job(self.job)
+            if config is not None:
+                return config
+            if time.monotonic() >= give_up:
+                raise ValueError(f"There is no job '{self.job}' in the queue after waiting {self.job_wait:g}s.")
+            self.listener.status(f"Status: Waiting for job '{self.job}' to be started...")
+            time.sleep(self.poll_interval)
+        return None
+
+    def _crawl_batch(self, crawler, frontier, claimed):
+        with self._held_lock:
+            self.held.update(url for url, _ in claimed)
+        batch = _LeasedBatch()
+        crawler.store = batch
+        # Counts only go to the shared queue, so the worker doesn't keep every page it has crawled
+        crawler.matrix = CountMatrix(crawler.matcher.terms)
+        pending = Frontier()
+        pending.restore(claimed, ())
+        crawler.crawl_queue(pending)
+        crawler.finish_analysis()
+
+        self.queue.complete(self.job, self.worker_id, batch.results, batch.links, batch.skipped)
+        # The links were handed over, so the frontier only needs to remember them for deduplication
+        frontier.queue.clear()
+        with self._held_lock:
+            self.held.difference_update(url for url, _ in batch.results)
+            self.held.difference_update(batch.skipped)
+        self.pages += len(batch.results) + len(batch.skipped)
+
+    def _heartbeat(self, stop):
+        while not stop.wait(self.lease / 3):
+            with self._held_lock:
+                held = list(self.held)
+            if held:
+                renewed = self.queue.heartbeat(self.job, self.worker_id, held, self.lease)
+                self.lost_leases += len(held) - renewed
+
+
+def wait_for_job(queue, job, listener=None, control=None, poll_interval=DEFAULT_POLL_INTERVAL):
+    """Report a job's progress until it is finished or ``control`` is cancelled. Returns the last status."""
+    listener = listener or CrawlListener()
+    control = control or RunControl()
+    config = queue.job(job)
+    while True:
+        queue.requeue_expired(job)
+        status = queue.status(job)
+        listener.status(
+            f"Status: {status['done']} crawled, {status['failed']} failed, {status['skipped']} skipped, "
+            f"{status['queued']} queued, {status['leased']} in progress"
+        )
+        if job_finished(queue, job, config, status) or not control.checkpoint():
+            return status
+        time.sleep(poll_interval)
+
+
+def job_matrix(queue, job):
+    """Load a job's results into a ``CountMatrix``, with a column for every search term."""
+    config = queue.job(job)
+    settings = CrawlSettings.from_dict(config["settings"])
+    matcher = TermMatcher(
+        config["search_terms"], case_sensitive=settings.case_sensitive, whole_words=settings.whole_words
+    )
+    matrix = CountMatrix(matcher.terms)
+    for url, term_counts in queue.results(job):
+        matrix.add(url, term_counts)
+    return matrix
@@ -0,0 +1,142 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+
+DEFAULT_BROWSERS = 2
+DEFAULT_PAGES_PER_BROWSER = 50
+DEFAULT_PAGE_LOAD_TIMEOUT = 30
+
+
+class DriverPool:
+    """A pool of reusable headless Chrome drivers.
+
+    Nothing is started until the first page is fetched, so the pool costs
+    nothing while Selenium mode is off. Up to ``size`` drivers are created on
+    demand, checked before every use, and replaced once they have loaded
+    ``max_pages`` pages so long runs don't keep growing Chrome's memory.
+    Call ``shutdown`` to quit every driver.
+    """
+
+    def __init__(self, size=DEFAULT_BROWSERS, max_pages=DEFAULT_PAGES_PER_BROWSER, page_load_timeout=DEFAULT_PAGE_LOAD_TIMEOUT):
+        self.size = max(1, int(size))
+        self.max_pages = max(1, int(max_pages))
+        self.page_load_timeout = page_load_timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._pages = {}
+        self._service_path = None
+        self._closed = False
+        self.started = 0
+        self.recycled = 0
+
+    def fetch(self, url):
+        """Load a URL in a pooled driver and return the rendered HTML."""
+        with self.driver() as driver:
+            driver.get(url)
+            return driver.page_source
+
+    @contextmanager
+    def driver(self):
+        driver = self._acquire()
+        try:
+            yield driver
+        finally:
+            # A driver left broken by a failed page is caught by the next health check
+            self._release(driver)
+
+    def _acquire(self):
+        while True:
+            if self._closed:
+                raise RuntimeError("Driver pool has been shut down.")
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self._created < self.size
+                    if can_create:
+                        self._created += 1
+                if can_create:
+                    try:
+                        return self._create_driver()
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+                driver = self._idle.get()
+
+            if driver is None:
+                continue  # Woken up because a slot was freed or the pool shut down
+            if self._is_healthy(driver):
+                return driver
+            self._discard(driver)
+
+    def _release(self, driver):
+        self._pages[id(driver)] = self._pages.get(id(driver), 0) + 1
+        if self._closed or self._pages[id(driver)] >= self.max_pages:
+            if not self._closed:
+                self.recycled += 1
+            self._discard(driver)
+        else:
+            self._idle.put(driver)
+
+    def _discard(self, driver):
+        self._pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        with self._lock:
+            self._created -= 1
+        # Let a waiting fetch create a replacement
+        self._idle.put(None)
+
+    def _is_healthy(self, driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _create_driver(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.chrome.options import Options
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        chrome_options = Options()
+        chrome_options.add_argument("--headless")  # Run headless Chrome
+        chrome_options.add_argument("--window-size=450,450")
+
+        # Only resolve the chromedriver binary once per pool
+        if self._service_path is None:
+            self._service_path = ChromeDriverManager().install()
+        service = Service(executable_path=self._service_path)
+
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+        driver.set_page_load_timeout(self.page_load_timeout)
+        self._pages[id(driver)] = 0
+        self.started += 1
+        return driver
+
+    def shutdown(self):
+        """Quit every idle driver. Drivers in use are quit when released."""
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if driver is not None:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+                with self._lock:
+                    self._created -= 1
+        self._pages.clear()
+
+        # Wake any fetch still waiting for a driver so it can give up
+        for _ in range(self.size):
+            self._idle.put(None)
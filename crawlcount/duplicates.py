@@ -0,0 +1,113 @@
+import hashlib
+import re
+
+
+NEAR_DUPLICATE_MODES = ("off", "skip", "flag")
+DEFAULT_NEAR_DUPLICATES = "off"
+# Share of the 64 fingerprint bits two pages must have in common. 0.92 allows 5 differing bits: about
+# nine in ten copies with one word in two hundred changed and two in three with one word in a hundred
+# changed, such as a print version or a story with a corrected line. Each changed word alters
+# SHINGLE_WORDS shingles, so copies edited more need a lower setting. Below about 0.90, short pages that
+# are mostly a shared template can start to match each other.
+DEFAULT_DUPLICATE_SIMILARITY = 0.92
+SHINGLE_WORDS = 3  # Pages are compared on overlapping runs of this many words
+FINGERPRINT_BITS = 64
+TOKEN = re.compile(r"\w+")
+
+MAX_CACHED_WORDS = 200_000
+
+_MASK = (1 << 64) - 1
+_PRIME = 0x100000001B3
+_word_hashes = {}
+
+
+def _word_hash(word):
+    # A stable hash, unlike hash(), so parse processes and other machines agree
+    value = _word_hashes.get(word)
+    if value is None:
+        value = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+        if len(_word_hashes) < MAX_CACHED_WORDS:
+            _word_hashes[word] = value
+    return value
+
+
+def _mix(values):
+    # The splitmix64 finalizer, so shingles that differ in one word differ in about half their bits
+    import numpy as np
+
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def simhash(text, shingle=SHINGLE_WORDS):
+    """A 64-bit fingerprint of a page's text that changes little when the text changes little.
+
+    Each run of ``shingle`` words is hashed, and each bit of the fingerprint
+    is set if it is set in most of the hashes. Pages that share most of their
+    text, such as print and AMP versions or a listing with one story swapped,
+    end up a few bits apart, while unrelated pages differ in about half.
+    Returns None for a page with no words.
+    """
+    # NumPy is only loaded once a crawl compares pages
+    import numpy as np
+
+    words = TOKEN.findall(text.casefold())
+    if not words:
+        return None
+    hashes = np.fromiter((_word_hash(word) for word in words), dtype=np.uint64, count=len(words))
+    if len(hashes) > shingle:
+        # Combine each word with the ones after it; uint64 arithmetic wraps like the hash needs
+        combined = hashes[: len(hashes) - shingle + 1].copy()
+        for offset in range(1, shingle):
+            with np.errstate(over="ignore"):
+                combined = combined * np.uint64(_PRIME) + hashes[offset : len(hashes) - shingle + 1 + offset]
+        hashes = combined
+    with np.errstate(over="ignore"):
+        hashes = _mix(hashes)
+
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    majority = bits.sum(axis=0, dtype=np.int64) * 2 > len(hashes)
+    return int.from_bytes(np.packbits(majority, bitorder="little").tobytes(), "little")
+
+
+def max_distance(similarity):
+    """Differing bits allowed between the fingerprints of two pages at least ``similarity`` alike."""
+    return max(0, min(FINGERPRINT_BITS - 1, int((1 - similarity) * FINGERPRINT_BITS + 1e-9)))
+
+
+class NearDuplicateIndex:
+    """Finds pages whose simhash is within ``distance`` bits of one seen before.
+
+    Fingerprints are split into ``distance + 1`` bands. Two fingerprints
+    that differ in at most ``distance`` bits must agree on at least one whole
+    band, so only pages sharing a band are compared instead of every page
+    seen so far.
+    """
+
+    def __init__(self, similarity=DEFAULT_DUPLICATE_SIMILARITY):
+        self.distance = max_distance(similarity)
+        bands = self.distance + 1
+        edges = [FINGERPRINT_BITS * band // bands for band in range(bands + 1)]
+        self._bands = [(start, (1 << (end - start)) - 1) for start, end in zip(edges, edges[1:])]
+        self._tables = [{} for _ in self._bands]
+        self.checked = 0
+        self.duplicates = 0
+
+    def find_or_add(self, url, fingerprint):
+        """The URL of an earlier page that ``url`` nearly duplicates, or None after remembering it."""
+        self.checked += 1
+        keys = [(fingerprint >> start) & mask for start, mask in self._bands]
+        for table, key in zip(self._tables, keys):
+            for other, other_url in table.get(key, ()):
+                if bin((fingerprint ^ other) & _MASK).count("1") <= self.distance:
+                    self.duplicates += 1
+                    return other_url
+        for table, key in zip(self._tables, keys):
+            table.setdefault(key, []).append((fingerprint, url))
+        return None
+
+    def stats(self):
+        return {"checked": self.checked, "duplicates": self.duplicates, "distance": self.distance}
@@ -0,0 +1,827 @@
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, fields, replace
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urljoin
+
+from analysis import DEFAULT_ANALYSIS_WORKERS, AnalysisPool
+from cache import DEFAULT_CACHE_PATH, DEFAULT_CACHE_TTL, DEFAULT_CACHE_MAX_MB, ResponseCache
+from corpus import PageCorpus
+from counts import CountMatrix
+from crawlstate import DEFAULT_CHECKPOINT_INTERVAL
+from drivers import DEFAULT_BROWSERS, DEFAULT_PAGES_PER_BROWSER, DriverPool
+from duplicates import DEFAULT_DUPLICATE_SIMILARITY, DEFAULT_NEAR_DUPLICATES, NearDuplicateIndex, simhash
+from extract import DEFAULT_EXTRACTOR, get_extractor
+from frontier import DEFAULT_BLOOM_CAPACITY, DEFAULT_MAX_DEPTH, Frontier
+from httpclient import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_RETRIES,
+    DEFAULT_BACKOFF,
+    DEFAULT_MAX_PAGE_BYTES,
+    DEFAULT_POOL_HOSTS,
+    HttpClient,
+    SkippedPage,
+)
+from matcher import TermMatcher
+from metrics import CrawlMetrics, MetricsServer
+from politeness import DEFAULT_HOST_RATE, DEFAULT_MAX_ATTEMPTS, DEFAULT_RETRY_DELAY, HostScheduler
+from scope import DEFAULT_SCOPE, CrawlScope
+from sinks import DEFAULT_FLUSH_INTERVAL
+from sitemaps import DEFAULT_DISCOVERY, RobotsCache, SitemapReader
+
+
+DEFAULT_CONCURRENCY = 10
+DEFAULT_PER_HOST = 2
+
+
+@dataclass
+class CrawlSettings:
+    """Options shared by the scrape and deep crawl modes."""
+
+    use_selenium: bool = False
+    concurrent: bool = True
+    concurrency: int = DEFAULT_CONCURRENCY
+    per_host: int = DEFAULT_PER_HOST
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT
+    read_timeout: float = DEFAULT_READ_TIMEOUT
+    retries: int = DEFAULT_RETRIES
+    backoff: float = DEFAULT_BACKOFF
+    max_page_bytes: int = DEFAULT_MAX_PAGE_BYTES  # Longer pages are cut off, 0 for no limit
+    case_sensitive: bool = False
+    whole_words: bool = False
+    browsers: int = DEFAULT_BROWSERS
+    pages_per_browser: int = DEFAULT_PAGES_PER_BROWSER
+    use_cache: bool = True
+    cache_path: str = DEFAULT_CACHE_PATH
+    cache_ttl: float = DEFAULT_CACHE_TTL
+    cache_max_mb: int = DEFAULT_CACHE_MAX_MB
+    extractor: str = DEFAULT_EXTRACTOR
+    analysis_workers: int = DEFAULT_ANALYSIS_WORKERS  # Processes that parse and count pages, 0 for none
+    max_depth: int = DEFAULT_MAX_DEPTH
+    bloom_filter: bool = False
+    bloom_capacity: int = DEFAULT_BLOOM_CAPACITY
+    scope: str = DEFAULT_SCOPE
+    allowlist: tuple = ()
+    max_pages_per_host: int = 0  # 0 means no limit
+    max_pages: int = 0
+    time_limit: float = 0  # Seconds
+    discovery: str = DEFAULT_DISCOVERY  # Find pages by following links, from sitemaps, or both
+    sitemap_max_age: float = 0  # Days; older sitemap entries are skipped, 0 means any age
+    near_duplicates: str = DEFAULT_NEAR_DUPLICATES  # Crawl, skip or flag pages nearly the same as one already crawled
+    duplicate_similarity: float = DEFAULT_DUPLICATE_SIMILARITY
+    obey_robots: bool = False
+    host_rate: float = DEFAULT_HOST_RATE
+    retry_delay: float = DEFAULT_RETRY_DELAY
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    flush_interval: float = DEFAULT_FLUSH_INTERVAL
+    checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL
+    metrics_path: str = ""  # CSV file for every page's timings, empty for none
+    metrics_port: int = 0  # Serve the timing histograms for Prometheus on this local port, 0 for none
+    corpus_path: str = ""  # Keep every page's text here so new terms can be recounted, empty for none
+
+    @classmethod
+    def from_dict(cls, values):
+        """Rebuild settings saved with ``asdict``, ignoring options this version doesn't know."""
+        known = {field.name for field in fields(cls)}
+        settings = cls(**{name: value for name, value in values.items() if name in known})
+        settings.allowlist = tuple(settings.allowlist)
+        return settings
+
+    def with_budgets_from(self, other):
+        """A copy of these settings with the page budgets and time limit of ``other``."""
+        return replace(
+            self,
+            max_pages=other.max_pages,
+            max_pages_per_host=other.max_pages_per_host,
+            time_limit=other.time_limit,
+        )
+
+
+class CrawlListener:
+    """Receives progress from a running Crawler. Override what you need."""
+
+    def status(self, text):
+        pass
+
+    def message(self, text):
+        pass
+
+    def result(self, url, term_counts):
+        pass
+
+
+class RunControl:
+    """Cancel and pause flags shared between a running crawl and its owner."""
+
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+        self._running.set()  # Wake a paused crawl so it can stop
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def checkpoint(self):
+        """Block while paused. Returns False once the crawl has been cancelled."""
+        self._running.wait()
+        return not self.cancelled
+
+
+class Crawler:
+    """Runs the scrape and deep crawl modes without any GUI dependency.
+
+    Progress is reported through a ``CrawlListener`` and both modes return a
+    summary dict once finished or cancelled. Pass a long-lived ``driver_pool``
+    to reuse browsers across runs; otherwise Selenium mode starts its own pool
+    and shuts it down when the run ends. Each result is also written to
+    ``sink`` (a ``ResultWriter``) as soon as it is counted, and kept in
+    ``matrix`` (a ``CountMatrix``) for the run summary and exports, unless
+    ``keep_counts`` is False because the caller keeps its own; the summary
+    then leaves out the totals. With a ``store`` (a ``CrawlStore``) deep
+    crawls are checkpointed and can be picked up again later with
+    ``resume_crawl``. With ``analysis_workers`` set, pages
+    are parsed and counted in an ``AnalysisPool`` of worker processes while
+    this thread carries on fetching. Every page's fetch, parse and count
+    times go into ``metrics`` (a ``CrawlMetrics``) and the summary. With
+    ``corpus_path`` set, each page's text is kept in a ``PageCorpus`` so
+    ``recount`` can count other terms later without fetching anything.
+    With ``near_duplicates`` set, deep crawl pages are fingerprinted and
+    any nearly the same as a page already crawled are skipped or flagged,
+    and their links are not followed.
+    """
+
+    def __init__(
+        self,
+        search_terms,
+        settings=None,
+        listener=None,
+        control=None,
+        driver_pool=None,
+        sink=None,
+        store=None,
+        keep_counts=True,
+    ):
+        self.search_terms = search_terms
+        self.settings = settings or CrawlSettings()
+        self.listener = listener or CrawlListener()
+        self.control = control or RunControl()
+        self.driver_pool = driver_pool
+        self.sink = sink
+        self.store = store
+        self.crawl_id = None
+        self.http = None
+        self.cache = None
+        self.scheduler = None
+        self.robots = None
+        self.analysis = None
+        self.frontier = None
+        self.metrics = None
+        self.metrics_server = None
+        self.corpus = None
+        self.duplicates = None
+
+        self.extractor = get_extractor(self.settings.extractor)
+
+        # Compile the terms once for the whole run
+        self.matcher = TermMatcher(
+            search_terms,
+            case_sensitive=self.settings.case_sensitive,
+            whole_words=self.settings.whole_words,
+        )
+        self.matrix = CountMatrix(self.matcher.terms) if keep_counts else None
+
+    def scrape(self, urls):
+        timer_start = time.time()
+        self.summary = {"total_urls": len(urls)}
+
+        # Skip duplicate URLs up front so each URL is only fetched once
+        unique_urls = []
+        seen_urls = set()
+        for url in urls:
+            if url in seen_urls:
+                self.listener.message(f"Skipped duplicate URL: {url}")
+                continue
+            seen_urls.add(url)
+            unique_urls.append(url)
+
+        self.listener.status("Status: Scraping...")
+
+        self.open_http()
+        try:
+            if self.settings.use_selenium:
+                self.scrape_with_selenium(unique_urls)
+            elif self.settings.concurrent:
+                self.scrape_concurrently(unique_urls)
+            else:
+                self.scrape_sequentially(unique_urls)
+            self.finish_analysis()
+        finally:
+            self.close_http()
+
+        if self.matrix is not None:
+            self.summary.update(self.matrix.summary())
+        self.summary["cancelled"] = self.control.cancelled
+        self.summary["elapsed"] = time.time() - timer_start
+        return self.summary
+
+    def scrape_concurrently(self, urls, fetch=None, concurrency=None):
+        def on_result(url, html, error):
+            if isinstance(error, SkippedPage):
+                self.listener.message(f"Skipped {url}: {error}")
+            elif error is not None:
+                self.listener.message(f"Failed to retrieve {url}: {error}")
+            else:
+                self.count_page(url, html)
+            self.listener.status(f"Status: Scraped {url}...")
+
+        # asyncio is only loaded once a concurrent run starts
+        from fetchengine import FetchEngine
+
+        engine = FetchEngine(
+            fetch or self.http.fetch_html,
+            concurrency=concurrency or self.settings.concurrency,
+            per_host=self.settings.per_host,
+            control=self.control,
+            scheduler=self.scheduler,
+        )
+        engine.run(urls, on_result)
+
+    def scrape_sequentially(self, urls):
+        import requests
+
+        pending = deque(urls)
+        while (pending or self.scheduler.has_deferred()) and self.control.checkpoint():
+            url = self.next_url(pending.popleft if pending else None)
+            if url is None:
+                continue
+
+            wait = self.scheduler.try_acquire(url)
+            if wait > 0:
+                # Come back to this host later and carry on with the others
+                self.scheduler.defer(url, url, wait)
+                continue
+
+            try:
+                self.listener.status(f"Status: Scraping {url}...")
+                html = self.http.fetch_html(url)
+                self.scheduler.record_success(url)
+                self.count_page(url, html)
+            except SkippedPage as e:
+                self.scheduler.record_success(url)
+                self.listener.message(f"Skipped {url}: {e}")
+            except requests.exceptions.RequestException as e:
+                self.retry_later(url, url, e)
+
+    def next_url(self, take_new):
+        """Return deferred work that is due, else new work from ``take_new``.
+
+        When only deferred work is left, waits briefly for it and returns None.
+        """
+        item = self.scheduler.pop_ready()
+        if item is not None:
+            return item
+        if take_new is not None:
+            return take_new()
+        time.sleep(min(self.scheduler.next_ready_in() or 0, 0.5))
+        return None
+
+    def retry_later(self, url, item, error):
+        """Defer ``item`` if the failure is worth retrying. Returns False once the URL is given up on."""
+        delay = self.scheduler.record_failure(url, error)
+        if delay is None:
+            self.listener.message(f"Failed to retrieve {url}: {type(error).__name__}. {error}")
+            return False
+        self.listener.message(f"Failed to retrieve {url}: {type(error).__name__}. Retrying in {delay:.1f}s.")
+        self.scheduler.defer(url, item, delay)
+        return True
+
+    def scrape_with_selenium(self, urls):
+        # Use a pool of headless browsers to get the rendered HTML content
+        pool = self.driver_pool
+        owns_pool = pool is None
+        if owns_pool:
+            pool = DriverPool(self.settings.browsers, self.settings.pages_per_browser)
+
+        def fetch_rendered(url):
+            if self.cache is None:
+                return pool.fetch(url)
+            cached = self.cache.get(url, source="selenium")
+            if cached is not None and cached.is_fresh(self.cache.ttl):
+                self.cache.count("hits")
+                return cached.body
+            self.cache.count("misses")
+            html = pool.fetch(url)
+            self.cache.put(url, html, source="selenium")
+            return html
+
+        self.listener.status("Status: Starting browsers...")
+        try:
+            self.scrape_concurrently(urls, fetch=fetch_rendered, concurrency=pool.size)
+        finally:
+            if owns_pool:
+                pool.shutdown()
+
+    def open_http(self):
+        self.scheduler = HostScheduler(
+            rate=self.settings.host_rate,
+            retry_delay=self.settings.retry_delay,
+            max_attempts=self.settings.max_attempts,
+        )
+
+        if self.settings.use_cache:
+            self.cache = ResponseCache(
+                self.settings.cache_path,
+                ttl=self.settings.cache_ttl,
+                max_bytes=self.settings.cache_max_mb * 1024 * 1024,
+            )
+
+        self.metrics = CrawlMetrics(self.settings.metrics_path)
+        if self.settings.metrics_port:
+            self.metrics_server = MetricsServer(self.metrics, self.settings.metrics_port)
+            self.listener.message(f"Serving crawl metrics at http://127.0.0.1:{self.metrics_server.port}/metrics")
+
+        # One keep-alive session per run, pooled per host
+        self.http = HttpClient(
+            connect_timeout=self.settings.connect_timeout,
+            read_timeout=self.settings.read_timeout,
+            retries=self.settings.retries,
+            backoff=self.settings.backoff,
+            pool_hosts=max(DEFAULT_POOL_HOSTS, self.settings.concurrency),
+            pool_per_host=self.settings.per_host,
+            cache=self.cache,
+            max_page_bytes=self.settings.max_page_bytes,
+            metrics=self.metrics,
+        )
+
+        if self.settings.corpus_path:
+            self.corpus = PageCorpus(self.settings.corpus_path)
+            self.corpus.start_run(self.search_terms)
+
+        if self.settings.near_duplicates != "off":
+            self.duplicates = NearDuplicateIndex(self.settings.duplicate_similarity)
+
+        if self.settings.analysis_workers > 0:
+            self.analysis = AnalysisPool(
+                self.settings.analysis_workers,
+                self.search_terms,
+                extractor=self.settings.extractor,
+                case_sensitive=self.settings.case_sensitive,
+                whole_words=self.settings.whole_words,
+            )
+
+    def close_http(self):
+        if self.analysis is not None:
+            self.analysis.close()
+            self.analysis = None
+        self.summary["hosts"] = self.scheduler.stats()
+        self.summary["http"] = self.http.stats()
+        self.http.close()
+        if self.cache is not None:
+            self.summary["cache"] = self.cache.stats()
+            self.cache.close()
+            self.cache = None
+        if self.metrics_server is not None:
+            self.metrics_server.close()
+            self.metrics_server = None
+        self.metrics.close()
+        self.summary["timings"] = self.metrics.stats()
+        if self.corpus is not None:
+            self.corpus.close()
+            self.summary["corpus"] = self.corpus.stats()
+            self.corpus = None
+        if self.duplicates is not None:
+            self.summary["duplicates"] = dict(self.duplicates.stats(), mode=self.settings.near_duplicates)
+            self.duplicates = None
+
+    def count_page(self, url, html, depth=None):
+        """Count the terms on a fetched page. Deep crawl pages, which have a ``depth``, also have their links queued.
+
+        With an analysis pool the page is sent to a worker process and
+        counted when its analysis comes back, maybe during a later call.
+        """
+        # Only deep crawl pages are compared, since their links are what near-duplicates would waste time on
+        fingerprint = depth is not None and self.duplicates is not None
+        if self.analysis is not None:
+            self.pages_analyzed(
+                self.analysis.submit(
+                    (url, depth),
+                    html,
+                    want_links=depth is not None,
+                    keep_text=self.corpus is not None,
+                    fingerprint=fingerprint,
+                )
+            )
+            return
+
+        # Extract the visible text, without script and style content
+        start = time.perf_counter()
+        text, links = self.extractor.extract(html)
+        parsed = time.perf_counter()
+
+        # Count every search term in one pass; any/all membership comes from the matrix at the end
+        term_counts = self.matcher.count(text)
+        self.metrics.analyzed(url, parsed - start, time.perf_counter() - parsed)
+        if self.corpus is not None:
+            self.corpus.add(url, text)
+        self.page_counted(url, depth, term_counts, links, simhash(text) if fingerprint else None)
+
+    def pages_analyzed(self, analyses):
+        for (url, depth), analysis, error in analyses:
+            if error is not None:
+                self.listener.message(f"Failed to analyse {url}: {type(error).__name__}. {error}")
+                if depth is not None and self.store is not None:
+                    self.store.finished(url)
+                continue
+            counts, links, (parse, count), stored, fingerprint = analysis
+            self.metrics.analyzed(url, parse, count)
+            if stored is not None:
+                self.corpus.add_prepared(url, *stored)
+            self.page_counted(url, depth, Counter(dict(zip(self.matcher.terms, counts))), links, fingerprint)
+
+    def page_counted(self, url, depth, term_counts, links, fingerprint=None):
+        original = None
+        if fingerprint is not None:
+            original = self.duplicates.find_or_add(url, fingerprint)
+        if original is not None and self.settings.near_duplicates == "skip":
+            self.listener.message(f"Skipped near-duplicate of {original}: {url}")
+            if self.store is not None:
+                self.store.finished(url, skipped=True)
+            return
+
+        self.record_result(url, term_counts)
+        if depth is None:
+            return
+        self.summary["total_urls"] += 1
+        if original is not None:
+            self.listener.message(f"Near-duplicate of {original}: {url}")
+
+        # Queue the links found on this page one level deeper; the frontier
+        # drops duplicates and links past the depth limit. A near-duplicate's
+        # links are almost all on the page it copies, so they aren't followed
+        if self.settings.discovery != "sitemaps" and original is None:
+            for link in links:
+                self.enqueue(self.frontier, urljoin(url, link), depth + 1)
+        if self.store is not None:
+            self.store.finished(url, term_counts)
+
+    def analyzing(self):
+        return self.analysis is not None and len(self.analysis) > 0
+
+    def finish_analysis(self):
+        # Pages already fetched are still counted when the run ends or stops early
+        if self.analysis is not None:
+            self.pages_analyzed(self.analysis.drain())
+
+    def record_result(self, url, term_counts):
+        if self.matrix is not None:
+            self.matrix.add(url, term_counts)
+        if self.sink is not None:
+            self.sink.write(url, term_counts)
+        self.listener.result(url, term_counts)
+
+    def recount(self, corpus_path):
+        """Count the search terms in the page text kept by the last run that stored it, without fetching."""
+        timer_start = time.time()
+        self.summary = {"total_urls": 0}
+        corpus = PageCorpus(corpus_path)
+        try:
+            run = corpus.latest_run()
+            if run is None:
+                raise ValueError(f"There are no stored pages to recount in {corpus_path}.")
+            run_id, started_at, _ = run
+            self.listener.status("Status: Recounting stored pages...")
+            for url, term_counts in corpus.recount(self.matcher, run_id, control=self.control):
+                self.record_result(url, term_counts)
+                self.summary["total_urls"] += 1
+            self.summary["recount"] = {
+                "started_at": started_at,
+                "pages": self.summary["total_urls"],
+                "scanned": corpus.scanned,
+            }
+        finally:
+            corpus.close()
+
+        if self.matrix is not None:
+            self.summary.update(self.matrix.summary())
+        self.summary["cancelled"] = self.control.cancelled
+        self.summary["elapsed"] = time.time() - timer_start
+        return self.summary
+
+    def deep_crawl(self, urls):
+        if self.store is not None:
+            self.crawl_id = self.store.start_crawl(urls, self.search_terms, self.settings)
+        return self.run_deep_crawl(urls)
+
+    def resume_crawl(self, saved):
+        """Carry on a deep crawl loaded from the store with ``CrawlStore.load_crawl``.
+
+        Pages crawled before are reported again from the store instead of
+        being fetched, and the crawl continues from the saved frontier.
+        """
+        self.crawl_id = saved.crawl_id
+        return self.run_deep_crawl(saved.urls, saved)
+
+    def run_deep_crawl(self, urls, saved=None):
+        timer_start = time.time()
+        self.summary = {"total_urls": 0}
+
+        # Scope rules and budgets that bound how far the crawl can go
+        scope = CrawlScope(
+            self.settings.scope,
+            allowlist=self.settings.allowlist,
+            max_pages_per_host=self.settings.max_pages_per_host,
+            max_pages=self.settings.max_pages,
+            time_limit=self.settings.time_limit,
+        )
+        for url in urls:
+            scope.add_seed(url)
+
+        frontier = Frontier(
+            max_depth=self.settings.max_depth,
+            bloom_filter=self.settings.bloom_filter,
+            bloom_capacity=self.settings.bloom_capacity,
+            scope=scope,
+        )
+        self.frontier = frontier
+        if saved is None:
+            # Seed the frontier with the starting URLs at depth 0
+            for url in urls:
+                if self.enqueue(frontier, url, 0) is None:
+                    self.listener.message(f"Skipped duplicate or invalid URL: {url}")
+        else:
+            # Pick up where the saved crawl stopped, with its budgets already partly spent
+            frontier.restore(saved.queued, saved.seen)
+            for url in saved.done:
+                scope.record_page(url)
+            for url, term_counts in self.store.results(saved.crawl_id):
+                self.record_result(url, term_counts)
+                self.summary["total_urls"] += 1
+            self.listener.message(
+                f"Resumed crawl with {len(saved.done)} pages already crawled and {len(saved.queued)} still queued."
+            )
+
+        self.listener.status("Status: Deep Crawling...")
+
+        # robots.txt is read once per host, for its sitemaps and, if obeyed, its rules
+        if self.settings.obey_robots or self.settings.discovery != "links":
+            self.robots = RobotsCache(self.fetch_quietly)
+
+        completed = False
+        self.open_http()
+        try:
+            if saved is None and self.settings.discovery != "links":
+                self.seed_from_sitemaps(urls, frontier)
+
+            completed = self.crawl_queue(frontier, scope)
+            self.finish_analysis()
+        finally:
+            self.close_http()
+            if self.store is not None:
+                # A crawl that was cancelled, stopped by a budget or crashed stays resumable
+                status = "finished" if completed else "cancelled" if self.control.cancelled else "stopped"
+                self.store.checkpoint(self.crawl_id, status=status)
+
+        if self.matrix is not None:
+            self.summary.update(self.matrix.summary())
+        self.summary["frontier"] = frontier.stats()
+        self.summary["scope"] = scope.stats()
+        if self.robots is not None:
+            self.summary["robots"] = self.robots.stats()
+        self.summary["cancelled"] = self.control.cancelled
+        self.summary["elapsed"] = time.time() - timer_start
+        return self.summary
+
+    def crawl_queue(self, queue, scope=None):
+        """Crawl ``(url, depth)`` items popped from ``queue`` (a ``Frontier``) until none are left.
+
+        Links found are added to ``self.frontier``, which is usually the same
+        queue. Retries that are waiting and pages still being analysed are
+        finished too. Returns True if the work ran out, False if the run was
+        cancelled or ``scope`` ran out of budget first. With ``concurrent``
+        set, pages are fetched ``concurrency`` at a time.
+
+        A page only counts against the budgets once its fetch starts, so a
+        URL left waiting for its host's rate limit when the budget runs out
+        isn't counted as crawled. Waiting work is deferred as ``(item,
+        counted)``, since a retry has been counted already.
+        """
+        if self.settings.concurrent and self.settings.concurrency > 1:
+            return self.crawl_queue_concurrently(queue, scope)
+
+        while (queue or self.scheduler.has_deferred() or self.analyzing()) and self.control.checkpoint():
+            if not self.within_budget(scope):
+                return False
+
+            ready = self.scheduler.pop_ready()
+            if ready is None:
+                if not queue:
+                    if self.analyzing():
+                        # Pages still being analysed may have links that refill the queue
+                        self.pages_analyzed(self.analysis.collect(timeout=0.5))
+                    else:
+                        self.next_url(None)
+                    continue
+                ready = self.take_url(queue, scope), False
+                if ready[0] is None:
+                    continue
+
+            item, counted = ready
+            current_url, depth = item
+            wait = self.scheduler.try_acquire(current_url)
+            if wait > 0:
+                # Come back to this host later and carry on with the others
+                self.scheduler.defer(current_url, ready, wait)
+                continue
+            if counted or self.count_against_budget(current_url, scope):
+                self.crawl_url(current_url, depth)
+        return not self.control.cancelled
+
+    def crawl_queue_concurrently(self, queue, scope=None):
+        """``crawl_queue`` with up to ``concurrency`` pages fetched at once, ``per_host`` at most from one host.
+
+        Fetches run on a ``FetchPool`` while this thread counts the pages
+        that have arrived, or hands them to the analysis pool, and queues
+        their links, so the frontier, budgets and checkpoints are only ever
+        touched here. A URL whose host already has ``per_host`` fetches
+        running waits in ``held`` for one of them to finish; no more than
+        ``concurrency`` are held before popping stops.
+        """
+        # asyncio is only loaded once a concurrent run starts
+        from fetchengine import FetchPool
+
+        fetches = FetchPool(self.http.fetch_html, self.settings.concurrency, self.settings.per_host)
+        held = deque()
+        try:
+            while (
+                queue or held or fetches or self.scheduler.has_deferred() or self.analyzing()
+            ) and self.control.checkpoint():
+                if not self.within_budget(scope):
+                    # Pages already being fetched were counted against the budget, so they are finished
+                    self.pages_fetched(fetches.drain())
+                    return False
+
+                self.pages_fetched(fetches.collect())
+                if fetches.full():
+                    self.pages_fetched(fetches.collect(timeout=0.5))
+                    continue
+
+                ready = self.scheduler.pop_ready() or self.next_held(held, fetches)
+                if ready is None:
+                    if not queue or len(held) >= fetches.concurrency:
+                        # Nothing can start until a fetch, an analysis or a retry comes due
+                        if fetches:
+                            self.pages_fetched(fetches.collect(timeout=min(0.5, self.scheduler.next_ready_in() or 0.5)))
+                        elif self.analyzing():
+                            self.pages_analyzed(self.analysis.collect(timeout=0.5))
+                        else:
+                            self.next_url(None)
+                        continue
+                    ready = self.take_url(queue, scope), False
+                    if ready[0] is None:
+                        continue
+
+                item, counted = ready
+                current_url, depth = item
+                if not fetches.has_room(current_url):
+                    held.append(ready)
+                    continue
+                wait = self.scheduler.try_acquire(current_url)
+                if wait > 0:
+                    self.scheduler.defer(current_url, ready, wait)
+                    continue
+                if counted or self.count_against_budget(current_url, scope):
+                    self.listener.status(f"Status: Crawling {current_url} ({len(self.frontier)} queued)...")
+                    fetches.submit(current_url, item)
+            return not self.control.cancelled
+        finally:
+            fetches.close()
+
+    @staticmethod
+    def next_held(held, fetches):
+        # The first URL held back whose host now has a fetch slot free
+        for index, ready in enumerate(held):
+            if fetches.has_room(ready[0][0]):
+                del held[index]
+                return ready
+        return None
+
+    def within_budget(self, scope):
+        """Checkpoint if due. Returns False, after saying why, once ``scope`` is out of budget."""
+        if self.store is not None:
+            self.store.checkpoint_if_due(self.crawl_id)
+        if scope is not None and scope.exhausted():
+            self.listener.message(f"Stopped crawling: {scope.stop_reason}.")
+            return False
+        return True
+
+    def take_url(self, queue, scope):
+        """Pop the next item from ``queue``, or None if the budget or robots.txt rules it out."""
+        item = queue.pop()
+        if scope is not None and not scope.can_fetch(item[0]):
+            return None
+        if self.settings.obey_robots and not self.robots.allowed(item[0]):
+            if self.store is not None:
+                self.store.finished(item[0], skipped=True)
+            return None
+        return item
+
+    @staticmethod
+    def count_against_budget(url, scope):
+        """Record a page whose fetch is starting. Returns False if its host ran out of budget while it waited."""
+        if scope is None:
+            return True
+        if not scope.can_fetch(url):
+            return False
+        scope.record_page(url)
+        return True
+
+    def crawl_url(self, url, depth):
+        import requests
+
+        self.listener.status(f"Status: Crawling {url} ({len(self.frontier)} queued)...")
+        try:
+            html = self.http.fetch_html(url)
+        except (SkippedPage, requests.exceptions.RequestException) as e:
+            self.page_fetched(url, depth, None, e)
+        else:
+            self.page_fetched(url, depth, html, None)
+
+    def pages_fetched(self, fetches):
+        import requests
+
+        for (url, depth), html, error in fetches:
+            if error is not None and not isinstance(error, (SkippedPage, requests.exceptions.RequestException)):
+                raise error
+            self.page_fetched(url, depth, html, error)
+
+    def page_fetched(self, url, depth, html, error):
+        if error is None:
+            self.scheduler.record_success(url)
+            self.count_page(url, html, depth)
+        elif isinstance(error, SkippedPage):
+            # The host answered fine, this page just can't contain any terms
+            self.scheduler.record_success(url)
+            self.listener.message(f"Skipped {url}: {error}")
+            if self.store is not None:
+                self.store.finished(url, skipped=True)
+        elif not self.retry_later(url, ((url, depth), True), error) and self.store is not None:
+            self.store.finished(url)
+
+    def seed_from_sitemaps(self, urls, frontier):
+        """Queue every page listed in the sitemaps of the starting hosts, as if each were a starting URL."""
+        since = None
+        if self.settings.sitemap_max_age:
+            since = datetime.now(timezone.utc) - timedelta(days=self.settings.sitemap_max_age)
+        reader = SitemapReader(self.fetch_quietly, self.robots, since=since)
+
+        self.listener.status("Status: Reading sitemaps...")
+        queued = 0
+        for url, _ in reader.discover(urls):
+            if not self.control.checkpoint():
+                break
+            if self.enqueue(frontier, url, 0) is not None:
+                queued += 1
+        self.summary["sitemaps"] = dict(reader.stats(), queued=queued)
+        self.listener.message(f"Found {reader.found} pages in {reader.read} sitemaps and queued {queued}.")
+
+    def fetch_quietly(self, url):
+        """GET a robots.txt or sitemap within the host's rate limit.
+
+        Returns ``(status, body)``, with a None body if it failed and a None
+        status if there was no response at all.
+        """
+        import requests
+
+        wait = self.scheduler.try_acquire(url)
+        while wait > 0 and not self.control.cancelled:
+            time.sleep(wait)
+            wait = self.scheduler.try_acquire(url)
+        try:
+            response = self.http.get(url)
+            return response.status_code, response.content
+        except requests.exceptions.RequestException as e:
+            # Plenty of sites have no robots.txt or sitemap, so this isn't reported
+            return (e.response.status_code if e.response is not None else None), None
+
+    def enqueue(self, frontier, url, depth):
+        added = frontier.add(url, depth)
+        if added is not None and self.store is not None:
+            self.store.queued(added, depth)
+        return added
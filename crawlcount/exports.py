@@ -0,0 +1,136 @@
+import csv
+import json
+import os
+
+from sinks import CSV_FIELDS
+
+
+EXPORT_FORMATS = ("csv", "jsonl", "xlsx")
+
+# Excel refuses more rows or hyperlinks than this on one worksheet
+EXCEL_MAX_ROWS = 1_048_576
+EXCEL_MAX_HYPERLINKS = 65_530
+
+
+def read_input_csv(path):
+    """Read URLs and search terms from a CSV file with 'urls' and 'terms' columns."""
+    urls = []
+    search_terms = []
+    with open(path, "r", encoding="utf-8") as csvfile:
+        reader = csv.DictReader(csvfile)
+        for row in reader:
+            url = (row.get("urls") or "").strip()
+            term = (row.get("terms") or "").strip()
+            if url:
+                urls.append(url)
+            if term:
+                search_terms.append(term)
+    return urls, search_terms
+
+
+def export_format(path):
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported output file '{path}'. Use a .csv, .jsonl or .xlsx file.")
+    return extension
+
+
+def export_results(matrix, file_path):
+    """Save a run's ``CountMatrix`` as CSV, JSONL or Excel, chosen by extension."""
+    format = export_format(file_path)
+    if format == "xlsx":
+        export_excel(matrix, file_path)
+    elif format == "csv":
+        export_csv(matrix, file_path)
+    else:
+        export_jsonl(matrix, file_path)
+
+
+def export_csv(matrix, file_path):
+    with open(file_path, "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.writer(csvfile)
+
+        writer.writerow(CSV_FIELDS)
+        for url, term_counts in matrix.rows():
+            writer.writerows([url, term, count] for term, count in term_counts.items())
+
+
+def export_jsonl(matrix, file_path):
+    with open(file_path, "w", encoding="utf-8") as jsonl_file:
+        for url, term_counts in matrix.rows():
+            jsonl_file.write(json.dumps({"url": url, "counts": term_counts}) + "\n")
+
+
+def column_widths(matrix):
+    """The widest value in each Detailed column, headers included."""
+    counts = matrix.counts
+    return [
+        max([len(CSV_FIELDS[0])] + [len(url) for url in matrix.urls]),
+        max([len(CSV_FIELDS[1])] + [len(term) for term in matrix.terms]),
+        max(len(CSV_FIELDS[2]), len(str(int(counts.max()))) if counts.size else 0),
+    ]
+
+
+def export_excel(matrix, file_path):
+    """Write the Summary and Detailed sheets with openpyxl's write-only mode.
+
+    Rows go straight to disk instead of being held as cells, so the export
+    needs no memory beyond the matrix itself. Column widths have to be set before
+    the first row, so they are worked out from the ``CountMatrix`` up front,
+    along with its per-domain totals. Only the first ``EXCEL_MAX_HYPERLINKS``
+    URLs on a sheet are links, and Detailed rows past Excel's row limit
+    continue on another sheet.
+    """
+    # openpyxl is only needed for Excel export, so it isn't loaded before then
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+
+    domain_counts = matrix.domain_totals()
+    detailed_widths = column_widths(matrix)
+
+    wb = Workbook(write_only=True)
+
+    def new_sheet(title, header, widths):
+        ws = wb.create_sheet(title=title)
+        for index, width in enumerate(widths, 1):
+            ws.column_dimensions[get_column_letter(index)].width = width + 2
+        ws.append(header)
+        return ws
+
+    def link(ws, url, links_written):
+        # Clickable until the sheet reaches Excel's hyperlink limit, plain text after that
+        if links_written >= EXCEL_MAX_HYPERLINKS:
+            return url
+        cell = WriteOnlyCell(ws, value=url)
+        cell.hyperlink = url
+        cell.style = "Hyperlink"
+        return cell
+
+    # Summary sheet with the total count for each base domain
+    summary_rows = [
+        (domain if domain.startswith("https://") else "https://" + domain, count)
+        for domain, count in domain_counts.items()
+    ]
+    summary_widths = [
+        max([len("Base Domain")] + [len(domain) for domain, _ in summary_rows]),
+        max([len("Total Count")] + [len(str(count)) for _, count in summary_rows]),
+    ]
+    summary_ws = new_sheet("Summary", ["Base Domain", "Total Count"], summary_widths)
+    for index, (domain, count) in enumerate(summary_rows):
+        summary_ws.append([link(summary_ws, domain, index), count])
+
+    # Detailed sheet with one row per URL and search term
+    sheets = 1
+    detailed_ws = new_sheet("Detailed", CSV_FIELDS, detailed_widths)
+    sheet_rows = 1
+    for url, term_counts in matrix.rows():
+        for term, count in term_counts.items():
+            if sheet_rows == EXCEL_MAX_ROWS:
+                sheets += 1
+                detailed_ws = new_sheet(f"Detailed {sheets}", CSV_FIELDS, detailed_widths)
+                sheet_rows = 1
+            detailed_ws.append([link(detailed_ws, url, sheet_rows - 1), term, count])
+            sheet_rows += 1
+
+    wb.save(file_path)
@@ -0,0 +1,125 @@
+from html.parser import HTMLParser
+from importlib.util import find_spec
+
+
+# Elements whose content is never visible page text
+SKIPPED_TAGS = ("script", "style", "noscript", "template")
+
+
+class SoupExtractor:
+    """BeautifulSoup with the built-in html.parser. Slowest but most forgiving."""
+
+    name = "soup"
+    requires = "bs4"
+
+    def __init__(self):
+        from bs4 import BeautifulSoup
+
+        self._soup = BeautifulSoup
+
+    def extract(self, html):
+        soup = self._soup(html, "html.parser")
+        for element in soup(SKIPPED_TAGS):
+            element.decompose()
+        links = [link["href"] for link in soup.find_all("a", href=True)]
+        return soup.get_text(), links
+
+
+class LxmlExtractor:
+    """lxml's C parser. Much faster than BeautifulSoup for the same output."""
+
+    name = "lxml"
+    requires = "lxml"
+
+    def __init__(self):
+        import lxml.html
+        from lxml import etree
+
+        self._html = lxml.html
+        self._etree = etree
+
+    def extract(self, html):
+        if not html or not html.strip():
+            return "", []
+        try:
+            root = self._html.document_fromstring(html)
+        except ValueError:
+            # Strings with an XML encoding declaration must be parsed as bytes
+            root = self._html.document_fromstring(html.encode("utf-8"))
+        except self._etree.ParserError:
+            return "", []
+        self._etree.strip_elements(root, *SKIPPED_TAGS, with_tail=False)
+        links = root.xpath("//a/@href")
+        return root.text_content(), [str(link) for link in links]
+
+
+class _TextCollector(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.links = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+        elif tag == "a":
+            for name, value in attrs:
+                if name == "href" and value is not None:
+                    self.links.append(value)
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+
+class StreamExtractor:
+    """A streaming tokenizer on the standard library's HTMLParser.
+
+    No tree is built, and it needs no extra dependency.
+    """
+
+    name = "stream"
+    requires = None
+
+    def extract(self, html):
+        collector = _TextCollector()
+        collector.feed(html)
+        collector.close()
+        return "".join(collector.parts), collector.links
+
+
+EXTRACTORS = {
+    "lxml": LxmlExtractor,
+    "stream": StreamExtractor,
+    "soup": SoupExtractor,
+}
+
+DEFAULT_EXTRACTOR = "auto"
+
+
+def available_extractors():
+    """Names of the backends that can run here, fastest first."""
+    # Look for the parser packages without importing them, which is slow
+    return [
+        name
+        for name, extractor_class in EXTRACTORS.items()
+        if extractor_class.requires is None or find_spec(extractor_class.requires) is not None
+    ]
+
+
+def get_extractor(name=DEFAULT_EXTRACTOR):
+    """Return an extractor by name. "auto" picks lxml when it is installed."""
+    if name == "auto":
+        try:
+            return LxmlExtractor()
+        except ImportError:
+            return StreamExtractor()
+    try:
+        return EXTRACTORS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown text extractor '{name}'. Choose from: auto, {', '.join(EXTRACTORS)}.")
@@ -0,0 +1,152 @@
+import asyncio
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from engine import DEFAULT_CONCURRENCY, DEFAULT_PER_HOST, RunControl
+
+
+class FetchEngine:
+    """Fetch many URLs concurrently with a global and a per-host limit.
+
+    The blocking ``fetch`` callable runs on a thread pool while asyncio
+    semaphores decide how many requests are in flight overall and against
+    any single host. ``on_result(url, html, error)`` is called on the
+    calling thread as each URL completes, in completion order.
+
+    With a ``HostScheduler`` each URL also waits for its host's rate limit,
+    and a URL whose host is failing is retried after the host's backoff
+    without holding a slot that other hosts could use.
+    """
+
+    def __init__(self, fetch, concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST, control=None, scheduler=None):
+        self.fetch = fetch
+        self.concurrency = max(1, int(concurrency))
+        self.per_host = max(1, int(per_host))
+        self.control = control or RunControl()
+        self.scheduler = scheduler
+
+    def run(self, urls, on_result):
+        asyncio.run(self._run(urls, on_result))
+
+    async def _run(self, urls, on_result):
+        global_limit = asyncio.Semaphore(self.concurrency)
+        host_limits = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            tasks = [
+                asyncio.ensure_future(
+                    self._fetch_one(url, executor, global_limit, host_limits[urlparse(url).netloc])
+                )
+                for url in urls
+            ]
+            for task in asyncio.as_completed(tasks):
+                outcome = await task
+                if outcome is not None:
+                    on_result(*outcome)
+
+    async def _fetch_one(self, url, executor, global_limit, host_limit):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not await self._wait_for_host(url):
+                return None
+
+            # Take the host slot first so one busy host cannot hold global slots while waiting
+            async with host_limit:
+                async with global_limit:
+                    while self.control.paused:
+                        await asyncio.sleep(0.1)
+                    if self.control.cancelled:
+                        return None
+                    try:
+                        html = await loop.run_in_executor(executor, self.fetch, url)
+                    except Exception as e:
+                        error = e
+                    else:
+                        if self.scheduler is not None:
+                            self.scheduler.record_success(url)
+                        return url, html, None
+
+            if self.scheduler is None or self.scheduler.record_failure(url, error) is None:
+                return url, None, error
+
+    async def _wait_for_host(self, url):
+        # Sleep in short steps so a cancel is noticed during a long backoff
+        if self.scheduler is None:
+            return True
+        while True:
+            if self.control.cancelled:
+                return False
+            wait = self.scheduler.try_acquire(url)
+            if wait <= 0:
+                return True
+            wait = min(wait, 0.5)
+            await asyncio.sleep(wait)
+            self.scheduler.record_wait(url, wait)
+
+
+class FetchPool:
+    """Fetches pages on a thread pool for a caller that keeps finding more URLs, such as a deep crawl.
+
+    ``FetchEngine`` is handed every URL up front. Here URLs are submitted one
+    at a time as they come off the crawl queue, and finished fetches are
+    collected as ``(item, html, error)`` on the calling thread, so counting,
+    queueing links and checkpointing stay on that one thread. ``has_room``
+    says whether a URL can start now without going over ``concurrency``
+    fetches in all or ``per_host`` to its host.
+    """
+
+    def __init__(self, fetch, concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST):
+        self.fetch = fetch
+        self.concurrency = max(1, int(concurrency))
+        self.per_host = max(1, int(per_host))
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        self._pending = {}
+        self._hosts = Counter()
+
+    def has_room(self, url):
+        return not self.full() and self._hosts[urlparse(url).netloc] < self.per_host
+
+    def full(self):
+        return len(self._pending) >= self.concurrency
+
+    def submit(self, url, item):
+        future = self._executor.submit(self.fetch, url)
+        self._pending[future] = (url, item)
+        self._hosts[urlparse(url).netloc] += 1
+
+    def collect(self, timeout=0):
+        """Return the fetches that have finished, waiting up to ``timeout`` seconds (None for no limit) for one."""
+        from concurrent.futures import FIRST_COMPLETED, wait
+
+        if not self._pending:
+            return []
+        done, _ = wait(self._pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        results = []
+        for future in done:
+            url, item = self._pending.pop(future)
+            host = urlparse(url).netloc
+            self._hosts[host] -= 1
+            if not self._hosts[host]:
+                del self._hosts[host]
+            try:
+                results.append((item, future.result(), None))
+            except Exception as e:
+                results.append((item, None, e))
+        return results
+
+    def drain(self):
+        """Wait for every fetch still running and return them all."""
+        results = []
+        while self._pending:
+            results.extend(self.collect(timeout=None))
+        return results
+
+    def __len__(self):
+        return len(self._pending)
+
+    def close(self):
+        # Fetches not collected yet are dropped; a resumed crawl fetches those pages again
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._pending.clear()
+        self._hosts.clear()
@@ -0,0 +1,113 @@
+import hashlib
+import math
+from collections import deque
+from urllib.parse import urldefrag
+
+from urls import is_crawlable, normalize_url
+
+
+DEFAULT_MAX_DEPTH = 1
+DEFAULT_BLOOM_CAPACITY = 1_000_000
+DEFAULT_BLOOM_ERROR_RATE = 0.001
+
+
+class BloomFilter:
+    """A fixed-size probabilistic set of strings.
+
+    Memory stays the same however many items are added. Membership checks
+    can give false positives at about ``error_rate`` once ``capacity``
+    items have been added, but never give false negatives.
+    """
+
+    def __init__(self, capacity=DEFAULT_BLOOM_CAPACITY, error_rate=DEFAULT_BLOOM_ERROR_RATE):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __len__(self):
+        return self.count
+
+
+class Frontier:
+    """The queue of URLs still to crawl, deduplicated when links are added.
+
+    URLs are compared by their ``normalize_url`` form, so the same page linked
+    with a different fragment, tracking parameters or trailing slash is only
+    queued once. The URL queued is the one first linked, without its
+    fragment, so it is fetched as the site wrote it. Links beyond
+    ``max_depth`` are refused instead of being queued and dropped later.
+    With ``bloom_filter=True`` seen URLs are kept
+    in a fixed-size ``BloomFilter`` instead of a set, trading a small chance
+    of skipping a new URL for bounded memory on very large crawls. An optional
+    ``CrawlScope`` refuses links outside the crawl's domain rule.
+    """
+
+    def __init__(self, max_depth=DEFAULT_MAX_DEPTH, bloom_filter=False, bloom_capacity=DEFAULT_BLOOM_CAPACITY, scope=None):
+        self.max_depth = max_depth
+        self.scope = scope
+        self.seen = BloomFilter(bloom_capacity) if bloom_filter else set()
+        self.queue = deque()
+        self.queued = 0
+        self.duplicates = 0
+        self.too_deep = 0
+        self.rejected = 0
+
+    def add(self, url, depth):
+        """Queue a URL unless it was seen before. Returns the URL queued or None."""
+        if depth > self.max_depth:
+            self.too_deep += 1
+            return None
+        if not is_crawlable(url):
+            self.rejected += 1
+            return None
+        if self.scope is not None and not self.scope.allows(url):
+            return None
+
+        key = normalize_url(url)
+        if key in self.seen:
+            self.duplicates += 1
+            return None
+
+        self.seen.add(key)
+        url = urldefrag(url.strip()).url
+        self.queue.append((url, depth))
+        self.queued += 1
+        return url
+
+    def restore(self, queued, seen):
+        """Reload a saved crawl: every URL in ``seen`` counts as seen and ``queued`` is crawled next."""
+        for url in seen:
+            self.seen.add(normalize_url(url))
+        self.queue.extend(queued)
+        self.queued += len(queued)
+
+    def pop(self):
+        return self.queue.popleft()
+
+    def __len__(self):
+        return len(self.queue)
+
+    def stats(self):
+        return {
+            "queued": self.queued,
+            "pending": len(self.queue),
+            "duplicates": self.duplicates,
+            "too_deep": self.too_deep,
+            "rejected": self.rejected,
+        }
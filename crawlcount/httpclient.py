@@ -0,0 +1,319 @@
+import codecs
+import re
+import threading
+import time
+
+from metrics import CACHED
+
+
+# Browser-like headers sent with every Requests fetch
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_11_5) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/50.0.2661.102 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Referer': 'https://www.google.com/',
+    'Connection': 'keep-alive',
+}
+
+DEFAULT_CONNECT_TIMEOUT = 4
+DEFAULT_READ_TIMEOUT = 10
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.5
+DEFAULT_POOL_HOSTS = 20
+DEFAULT_POOL_PER_HOST = 2
+
+# Responses that are worth retrying after a short wait
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+DEFAULT_MAX_PAGE_BYTES = 5 * 1024 * 1024  # Longer pages are cut off here, 0 for no limit
+CHUNK_SIZE = 64 * 1024
+
+# Content types that can contain search terms; anything else is skipped from its headers
+TEXT_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([\w.:-]+)""", re.IGNORECASE)
+
+
+# The timings of the request in flight on each thread, filled in as it goes when a run collects metrics
+_request_timing = threading.local()
+
+
+def _timed_pool_classes():
+    """urllib3 connection pools whose connections add the time spent connecting to ``_request_timing``."""
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    def timed(pool_class):
+        class TimedConnection(pool_class.ConnectionCls):
+            def connect(self):
+                # DNS lookup, TCP and TLS handshakes; reused keep-alive connections skip this
+                start = time.perf_counter()
+                try:
+                    super().connect()
+                finally:
+                    _request_timing.connect = getattr(_request_timing, "connect", 0.0) + time.perf_counter() - start
+
+        return type(f"Timed{pool_class.__name__}", (pool_class,), {"ConnectionCls": TimedConnection})
+
+    return {"http": timed(HTTPConnectionPool), "https": timed(HTTPSConnectionPool)}
+
+
+class SkippedPage(Exception):
+    """Raised by ``fetch_html`` for a response that can't contain search terms, such as a PDF or an image."""
+
+
+def response_charset(content_type, head):
+    """The charset named in the Content-Type header, else in a <meta> tag at the top of the page, else UTF-8."""
+    for param in content_type.split(";")[1:]:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "charset":
+            charset = value.strip().strip("\"'")
+            break
+    else:
+        match = META_CHARSET.search(head[:4096])
+        charset = match.group(1).decode("ascii") if match else "utf-8"
+    try:
+        return codecs.lookup(charset).name
+    except LookupError:
+        return "utf-8"
+
+
+class HttpClient:
+    """A shared keep-alive session for every Requests fetch in a run.
+
+    Connections are pooled per host so repeat visits skip the TCP and TLS
+    handshakes, every request gets the default headers and a connect/read
+    timeout, and failed connections or retryable statuses are retried with
+    exponential backoff. ``stats()`` reports how many connections were opened
+    and how many requests reused one.
+
+    With a ``ResponseCache``, ``fetch_html`` serves fresh pages from disk and
+    revalidates stale ones with a conditional GET.
+
+    Pages are streamed rather than downloaded whole. A response whose
+    Content-Type can't hold text (a PDF, image, video and so on) is dropped
+    as soon as its headers arrive, a body longer than ``max_page_bytes``
+    is cut off there, and text is decoded chunk by chunk as it arrives.
+    The bytes avoided either way are counted in ``stats()``.
+
+    With a ``CrawlMetrics``, each ``fetch_html`` reports how long the page
+    took to connect, to send its first byte and to download, with its
+    status and size.
+    """
+
+    def __init__(
+        self,
+        connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+        read_timeout=DEFAULT_READ_TIMEOUT,
+        retries=DEFAULT_RETRIES,
+        backoff=DEFAULT_BACKOFF,
+        pool_hosts=DEFAULT_POOL_HOSTS,
+        pool_per_host=DEFAULT_POOL_PER_HOST,
+        headers=None,
+        cache=None,
+        max_page_bytes=DEFAULT_MAX_PAGE_BYTES,
+        metrics=None,
+    ):
+        # Requests is loaded with the first client rather than when the app starts
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.timeout = (connect_timeout, read_timeout)
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,  # Hand back the last response so raise_for_status explains it
+        )
+        self.adapter = HTTPAdapter(
+            pool_connections=max(1, int(pool_hosts)),
+            pool_maxsize=max(1, int(pool_per_host)),
+            max_retries=retry,
+        )
+        self.session = requests.Session()
+        self.session.headers.update(headers or HEADERS)
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+        self.cache = cache
+        self.max_page_bytes = max_page_bytes
+        self.metrics = metrics
+        if metrics is not None:
+            self.adapter.poolmanager.pool_classes_by_scheme = _timed_pool_classes()
+
+        self._lock = threading.Lock()
+        self.fetches = 0
+        self.failures = 0
+        self.retries = 0
+        self.bytes_read = 0
+        self.skipped = 0  # Responses dropped for their content type
+        self.truncated = 0  # Pages cut off at max_page_bytes
+        self.skipped_bytes = 0  # Body bytes not downloaded, where the size was known
+
+    def get(self, url, **kwargs):
+        """GET a URL through the shared session and raise for HTTP errors."""
+        import requests
+
+        kwargs.setdefault("timeout", self.timeout)
+        try:
+            response = self.session.get(url, **kwargs)
+            _request_timing.status = response.status_code
+            _request_timing.headers = time.perf_counter()
+            self._count_retries(response)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            if e.response is not None and kwargs.get("stream"):
+                e.response.close()
+            with self._lock:
+                self.fetches += 1
+                self.failures += 1
+            raise
+        with self._lock:
+            self.fetches += 1
+        return response
+
+    def fetch_html(self, url):
+        """Return the page's text. Raises ``SkippedPage`` if it isn't a text page."""
+        if self.metrics is None:
+            return self._fetch_html(url)
+
+        import requests
+
+        _request_timing.connect = 0.0
+        _request_timing.status = _request_timing.headers = None
+        _request_timing.bytes = 0
+        start = time.perf_counter()
+        try:
+            text = self._fetch_html(url)
+        except (requests.exceptions.RequestException, SkippedPage) as e:
+            response = getattr(e, "response", None)
+            status = response.status_code if response is not None else _request_timing.status
+            self._record_timing(url, start, status or type(e).__name__, failed=True)
+            raise
+        self._record_timing(url, start, _request_timing.status or CACHED)
+        return text
+
+    def _record_timing(self, url, start, status, failed=False):
+        end = time.perf_counter()
+        connect = _request_timing.connect
+        headers = _request_timing.headers
+        if status == CACHED:
+            self.metrics.fetched(url, status)
+        elif headers is None:
+            # No response at all, so the wait is all there is to report
+            self.metrics.fetched(url, status, connect=connect, ttfb=end - start - connect, failed=True)
+        else:
+            self.metrics.fetched(
+                url,
+                status,
+                size=_request_timing.bytes,
+                connect=connect,
+                ttfb=headers - start - connect,
+                download=end - headers,
+                failed=failed,
+            )
+
+    def _fetch_html(self, url):
+        if self.cache is None:
+            return self.read_text(self.get(url, stream=True))
+
+        cached = self.cache.get(url)
+        if cached is not None and cached.is_fresh(self.cache.ttl):
+            self.cache.count("hits")
+            return cached.body
+
+        # Ask the server whether our stale copy is still current
+        response = self.get(url, headers=cached.validators() if cached else None, stream=True)
+        if cached is not None and response.status_code == 304:
+            response.close()
+            self.cache.refresh(url)
+            self.cache.count("revalidated")
+            return cached.body
+
+        self.cache.count("misses")
+        text = self.read_text(response)
+        self.cache.put(
+            url,
+            text,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        return text
+
+    def read_text(self, response):
+        """Stream a response's body as text, up to ``max_page_bytes``."""
+        content_type = response.headers.get("Content-Type", "")
+        length = response.headers.get("Content-Length", "")
+        length = int(length) if length.isdigit() else None
+        media_type = content_type.split(";")[0].strip().lower()
+        if media_type and media_type not in TEXT_CONTENT_TYPES:
+            # Closing before reading the body means it is never downloaded
+            response.close()
+            with self._lock:
+                self.skipped += 1
+                self.skipped_bytes += length or 0
+            raise SkippedPage(f"{media_type} isn't a text page")
+
+        decoder = None
+        parts = []
+        received = 0
+        limit = self.max_page_bytes or float("inf")
+        try:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                if decoder is None:
+                    # Headers and the first chunk are enough to pick the charset
+                    decoder = codecs.getincrementaldecoder(response_charset(content_type, chunk))(errors="replace")
+                if received + len(chunk) > limit:
+                    kept = int(limit - received)
+                    parts.append(decoder.decode(chunk[:kept]))
+                    received += kept
+                    with self._lock:
+                        self.truncated += 1
+                        self.skipped_bytes += max(0, length - received) if length else len(chunk) - kept
+                    break
+                parts.append(decoder.decode(chunk))
+                received += len(chunk)
+            if decoder is not None:
+                parts.append(decoder.decode(b"", final=True))
+        finally:
+            response.close()
+            _request_timing.bytes = received
+            with self._lock:
+                self.bytes_read += received
+        return "".join(parts)
+
+    def _count_retries(self, response):
+        history = getattr(getattr(response.raw, "retries", None), "history", None)
+        if history:
+            with self._lock:
+                self.retries += len(history)
+
+    def stats(self):
+        """Return fetch counts and connection reuse across every pooled host."""
+        opened = 0
+        requests_sent = 0
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            opened += pool.num_connections
+            requests_sent += pool.num_requests
+        return {
+            "fetches": self.fetches,
+            "failures": self.failures,
+            "retries": self.retries,
+            "bytes": self.bytes_read,
+            "skipped": self.skipped,
+            "truncated": self.truncated,
+            "skipped_bytes": self.skipped_bytes,
+            "hosts": len(pools),
+            "connections_opened": opened,
+            "connections_reused": max(0, requests_sent - opened),
+        }
+
+    def close(self):
+        self.session.close()
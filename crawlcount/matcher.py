@@ -0,0 +1,115 @@
+from collections import Counter, deque
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == "_"
+
+
+class TermMatcher:
+    """Counts every search term in one pass over the page text.
+
+    The terms are compiled once into an Aho-Corasick automaton, so the cost of
+    matching a page grows with the page length rather than with
+    pages x terms x page length. Counts follow ``str.count`` semantics: each
+    term's occurrences are counted left to right without overlapping each
+    other, while different terms may overlap freely.
+
+    ``case_sensitive`` and ``whole_words`` are fixed when the matcher is
+    built. Unless matching is case sensitive, terms and text are both
+    casefolded, so "Straße" and "STRASSE" are the same term, keyed
+    "strasse", and results are keyed by the casefolded term.
+    """
+
+    def __init__(self, search_terms, case_sensitive=False, whole_words=False):
+        self.case_sensitive = case_sensitive
+        self.whole_words = whole_words
+
+        # Deduplicate terms, keeping the order they were entered in
+        self.terms = []
+        patterns = []
+        for term in search_terms:
+            key = self.fold(term.strip())
+            if key and key not in self.terms:
+                self.terms.append(key)
+                patterns.append(key)
+
+        self._lengths = [len(pattern) for pattern in patterns]
+        self._checks_start = [_is_word_char(pattern[0]) for pattern in patterns]
+        self._checks_end = [_is_word_char(pattern[-1]) for pattern in patterns]
+        self._build(patterns)
+
+    def fold(self, text):
+        return text if self.case_sensitive else text.casefold()
+
+    def _build(self, patterns):
+        # Trie of goto transitions, one dict per state
+        self._goto = [{}]
+        self._outputs = [[]]
+        for index, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._outputs.append([])
+                state = next_state
+            self._outputs[state].append(index)
+
+        # Breadth-first pass to add failure links and merge their outputs
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+
+    def count(self, text):
+        """Return a Counter with an entry for every term, including zero counts."""
+        return Counter(dict(zip(self.terms, self.count_vector(text))))
+
+    def count_vector(self, text):
+        """Return the count of each term as a list, in the order of ``terms``."""
+        counts = [0] * len(self.terms)
+        if self.terms:
+            self._scan(self.fold(text), counts)
+        return counts
+
+    def _scan(self, text, counts):
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        lengths = self._lengths
+        whole_words = self.whole_words
+        next_allowed = [0] * len(counts)
+        last = len(text) - 1
+
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not outputs[state]:
+                continue
+            for index in outputs[state]:
+                start = position - lengths[index] + 1
+                if start < next_allowed[index]:
+                    continue
+                if whole_words and not self._on_word_boundary(text, start, position, last, index):
+                    continue
+                counts[index] += 1
+                next_allowed[index] = position + 1
+
+    def _on_word_boundary(self, text, start, end, last, index):
+        if self._checks_start[index] and start > 0 and _is_word_char(text[start - 1]):
+            return False
+        if self._checks_end[index] and end < last and _is_word_char(text[end + 1]):
+            return False
+        return True
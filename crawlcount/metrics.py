@@ -0,0 +1,208 @@
+import csv
+import threading
+from bisect import bisect_left
+from collections import Counter
+
+
+# Each page's time is split into these phases
+PHASES = ("connect", "ttfb", "download", "parse", "count")
+PHASE_NAMES = {
+    "connect": "connect",
+    "ttfb": "first byte",
+    "download": "download",
+    "parse": "parse",
+    "count": "count",
+}
+NETWORK_PHASES = ("connect", "ttfb", "download")
+
+# Histogram upper bounds: Prometheus' default buckets for seconds, and 1 KB to 16 MB for page sizes
+TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = tuple(1024 * 4 ** power for power in range(8))
+
+METRICS_FIELDS = ["url", "status", "bytes", "connect_ms", "ttfb_ms", "download_ms", "parse_ms", "count_ms"]
+CACHED = "cached"  # The status of a page served from the cache without a request
+
+
+class Histogram:
+    """Counts of observed values in fixed buckets, as a Prometheus histogram keeps them."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)  # The last bucket is everything above the top bound
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, fraction):
+        """Estimate a quantile by interpolating within its bucket, as Prometheus' histogram_quantile does."""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            if count and seen + count >= rank:
+                if index == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[index - 1] if index else 0.0
+                return lower + (self.bounds[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+    def cumulative(self):
+        """``(upper bound, count at or below it)`` pairs, ending with infinity."""
+        pairs = []
+        total = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.buckets):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def stats(self):
+        return {"count": self.count, "sum": self.sum, "p50": self.quantile(0.5), "p95": self.quantile(0.95)}
+
+
+class CrawlMetrics:
+    """Where the time went for each page of a run, kept as histograms.
+
+    ``HttpClient`` reports each page's network phases with ``fetched``:
+    connecting (DNS, TCP and TLS, for new connections only), waiting for the
+    first byte and downloading the body, with its status and size. The
+    crawler then reports parsing and counting with ``analyzed``. Pages that
+    fail are finished at once. With ``path`` every page's timings are also
+    written to a CSV file as it finishes. Safe to use from several threads.
+    """
+
+    def __init__(self, path=None):
+        self._lock = threading.Lock()
+        self.phases = {phase: Histogram(TIME_BUCKETS) for phase in PHASES}
+        self.sizes = Histogram(SIZE_BUCKETS)
+        self.statuses = Counter()
+        self._pending = {}
+        self._file = None
+        self._writer = None
+        if path:
+            self._file = open(path, "w", newline="", encoding="utf-8")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(METRICS_FIELDS)
+
+    def fetched(self, url, status, size=0, connect=None, ttfb=None, download=None, failed=False):
+        """Record a page's download. Unless it ``failed`` it is finished by ``analyzed``."""
+        timings = {"status": status, "bytes": size, "connect": connect, "ttfb": ttfb, "download": download}
+        with self._lock:
+            if failed:
+                self._finish(url, timings)
+            else:
+                self._pending[url] = timings
+
+    def analyzed(self, url, parse, count):
+        """Record how long a page took to parse and count, finishing it."""
+        with self._lock:
+            timings = self._pending.pop(url, None) or {"status": None, "bytes": 0}
+            timings.update(parse=parse, count=count)
+            self._finish(url, timings)
+
+    def _finish(self, url, timings):
+        for phase in PHASES:
+            if timings.get(phase) is not None:
+                self.phases[phase].observe(timings[phase])
+        if timings["bytes"]:
+            self.sizes.observe(timings["bytes"])
+        if timings["status"] is not None:
+            self.statuses[str(timings["status"])] += 1
+        if self._writer is not None:
+            self._writer.writerow(
+                [url, timings["status"], timings["bytes"]]
+                + [round(timings[phase] * 1000, 3) if timings.get(phase) is not None else "" for phase in PHASES]
+            )
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pages": sum(self.statuses.values()),
+                "phases": {phase: histogram.stats() for phase, histogram in self.phases.items()},
+                "bytes": self.sizes.stats(),
+                "statuses": dict(self.statuses.most_common()),
+            }
+
+    def prometheus(self):
+        """The histograms and status counts in the Prometheus text format."""
+        lines = [
+            "# HELP crawlcount_page_phase_seconds Time each page spent connecting, waiting, downloading, parsing and counting.",
+            "# TYPE crawlcount_page_phase_seconds histogram",
+        ]
+        with self._lock:
+            for phase, histogram in self.phases.items():
+                lines += _histogram_lines("crawlcount_page_phase_seconds", histogram, f'phase="{phase}"')
+            lines += [
+                "# HELP crawlcount_page_bytes Size of each downloaded page.",
+                "# TYPE crawlcount_page_bytes histogram",
+            ]
+            lines += _histogram_lines("crawlcount_page_bytes", self.sizes)
+            lines += [
+                "# HELP crawlcount_pages_total Pages finished, by HTTP status.",
+                "# TYPE crawlcount_pages_total counter",
+            ]
+            lines += [f'crawlcount_pages_total{{status="{status}"}} {count}' for status, count in self.statuses.items()]
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        # Pages downloaded but never counted, because the run stopped first, still have their download timed
+        with self._lock:
+            for url, timings in self._pending.items():
+                self._finish(url, timings)
+            self._pending.clear()
+            if self._file is not None:
+                self._file.close()
+                self._file = self._writer = None
+
+
+def _histogram_lines(name, histogram, labels=""):
+    separator = "," if labels else ""
+    lines = [
+        f'{name}_bucket{{{labels}{separator}le="{"+Inf" if bound == float("inf") else f"{bound:g}"}"}} {count}'
+        for bound, count in histogram.cumulative()
+    ]
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{name}_sum{suffix} {histogram.sum:g}")
+    lines.append(f"{name}_count{suffix} {histogram.count}")
+    return lines
+
+
+class MetricsServer:
+    """Serves a run's ``CrawlMetrics`` at http://host:port/metrics for Prometheus to scrape."""
+
+    def __init__(self, metrics, port, host="127.0.0.1"):
+        # http.server is only loaded when a run asks for the endpoint
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,149 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from httpclient import RETRY_STATUSES
+
+
+DEFAULT_HOST_RATE = 4.0  # Requests per second to any one host, 0 for no limit
+DEFAULT_HOST_BURST = 8
+DEFAULT_RETRY_DELAY = 5.0  # Seconds a failing host is left alone, doubled per failure
+DEFAULT_MAX_RETRY_DELAY = 120.0
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+def is_retryable(error):
+    """Timeouts, dropped connections and 429/5xx responses may work later. Nothing else will."""
+    import requests
+
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return True
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return error.response.status_code in RETRY_STATUSES
+    return False
+
+
+class _HostState:
+    def __init__(self, burst):
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.backoff_until = 0.0
+        self.failures = 0
+        self.waited = 0.0
+        self.retries = 0
+
+
+class HostScheduler:
+    """Per-host rate limits and backoff, so one slow or flaky site only delays itself.
+
+    Each host has a token bucket refilled at ``rate`` requests per second
+    (up to ``burst``) and a backoff timer. After a retryable failure the host
+    is left alone for ``retry_delay`` seconds, doubling with each further
+    failure up to ``max_retry_delay``, and the URL is retried later, up to
+    ``max_attempts`` tries in total. URLs for other hosts keep going in the
+    meantime. Callers that can't sleep per URL can ``defer`` work here and
+    collect it again with ``pop_ready``. ``stats()`` reports how long each
+    host made URLs wait.
+    """
+
+    def __init__(
+        self,
+        rate=DEFAULT_HOST_RATE,
+        burst=DEFAULT_HOST_BURST,
+        retry_delay=DEFAULT_RETRY_DELAY,
+        max_retry_delay=DEFAULT_MAX_RETRY_DELAY,
+        max_attempts=DEFAULT_MAX_ATTEMPTS,
+    ):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_attempts = max(1, max_attempts)
+        self._hosts = {}
+        self._attempts = Counter()
+        self._deferred = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def _state(self, url):
+        host = urlsplit(url).netloc.lower()
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.burst)
+        return state
+
+    def try_acquire(self, url):
+        """Take a request slot for the URL's host. Returns 0 if taken, else seconds to wait."""
+        with self._lock:
+            state = self._state(url)
+            now = time.monotonic()
+            if state.backoff_until > now:
+                return state.backoff_until - now
+            if not self.rate:
+                return 0.0
+            state.tokens = min(self.burst, state.tokens + (now - state.updated) * self.rate)
+            state.updated = now
+            if state.tokens >= 1:
+                state.tokens -= 1
+                return 0.0
+            return (1 - state.tokens) / self.rate
+
+    def record_wait(self, url, seconds):
+        with self._lock:
+            self._state(url).waited += seconds
+
+    def record_success(self, url):
+        with self._lock:
+            self._state(url).failures = 0
+            self._attempts.pop(url, None)
+
+    def record_failure(self, url, error):
+        """Back the host off. Returns the seconds until the URL may be retried, or None to give up."""
+        with self._lock:
+            self._attempts[url] += 1
+            if not is_retryable(error) or self._attempts[url] >= self.max_attempts:
+                self._attempts.pop(url, None)
+                return None
+            state = self._state(url)
+            state.failures += 1
+            state.retries += 1
+            delay = min(self.max_retry_delay, self.retry_delay * 2 ** (state.failures - 1))
+            state.backoff_until = max(state.backoff_until, time.monotonic() + delay)
+            return state.backoff_until - time.monotonic()
+
+    def defer(self, url, item, delay):
+        """Hold ``item`` until ``delay`` seconds from now."""
+        now = time.monotonic()
+        with self._lock:
+            heapq.heappush(self._deferred, (now + delay, next(self._sequence), now, url, item))
+
+    def pop_ready(self):
+        """Return a deferred item whose time has come, or None."""
+        with self._lock:
+            if not self._deferred or self._deferred[0][0] > time.monotonic():
+                return None
+            _, _, deferred_at, url, item = heapq.heappop(self._deferred)
+            self._state(url).waited += time.monotonic() - deferred_at
+            return item
+
+    def next_ready_in(self):
+        with self._lock:
+            if not self._deferred:
+                return None
+            return max(0.0, self._deferred[0][0] - time.monotonic())
+
+    def has_deferred(self):
+        return bool(self._deferred)
+
+    def stats(self):
+        """Wait time and retries per host, longest wait first."""
+        with self._lock:
+            hosts = {
+                host: {"waited": state.waited, "retries": state.retries}
+                for host, state in self._hosts.items()
+                if state.waited or state.retries
+            }
+        return dict(sorted(hosts.items(), key=lambda item: item[1]["waited"], reverse=True))
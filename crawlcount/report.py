@@ -0,0 +1,191 @@
+from datetime import datetime
+
+from metrics import NETWORK_PHASES, PHASE_NAMES
+
+
+def percentage(part, total):
+    return (part / total) * 100 if total > 0 else 0
+
+
+def format_summary(summary):
+    """The run summary shown under Results in the window and printed by the CLI."""
+    elapsed_time = summary.get("elapsed", 0)
+    total_urls = summary["total_urls"]
+    percentage_any_terms = percentage(summary["urls_with_any_terms"], total_urls)
+    percentage_all_terms = percentage(summary["urls_with_all_terms"], total_urls)
+    return (
+        f"{percentage_any_terms:.1f}% of the URLs contained one or more search terms. " +
+        f"{percentage_all_terms:.1f}% included all the search terms. Elapsed time: {elapsed_time:.2f}s." +
+        format_totals(summary.get("term_totals"), summary.get("domain_totals")) +
+        format_http_stats(summary.get("http")) +
+        format_timing_stats(summary.get("timings")) +
+        format_cache_stats(summary.get("cache")) +
+        format_corpus_stats(summary.get("corpus")) +
+        format_recount_stats(summary.get("recount")) +
+        format_sitemap_stats(summary.get("sitemaps")) +
+        format_robots_stats(summary.get("robots")) +
+        format_frontier_stats(summary.get("frontier")) +
+        format_duplicate_stats(summary.get("duplicates")) +
+        format_scope_stats(summary.get("scope")) +
+        format_queue_stats(summary.get("queue")) +
+        format_host_stats(summary.get("hosts"))
+    )
+
+
+def format_totals(term_totals, domain_totals, limit=5):
+    if not term_totals:
+        return ""
+    terms = ", ".join(f"{term}: {count}" for term, count in term_totals.items())
+    text = f"\nTerm totals: {terms}."
+    if domain_totals:
+        top = sorted(domain_totals.items(), key=lambda item: item[1], reverse=True)[:limit]
+        text += " Top domains: " + ", ".join(f"{domain} {count}" for domain, count in top) + "."
+    return text
+
+
+def format_http_stats(stats):
+    if not stats or not stats["fetches"]:
+        return ""
+    return (
+        f"\nRequests: {stats['fetches']} fetches ({stats['failures']} failed, {stats['retries']} retries) "
+        f"over {stats['connections_opened']} connections to {stats['hosts']} hosts, "
+        f"{stats['connections_reused']} reused."
+    ) + format_download_stats(stats)
+
+
+def format_download_stats(stats):
+    if not stats.get("bytes") and not stats.get("skipped") and not stats.get("truncated"):
+        return ""
+    text = f" Downloaded {stats['bytes'] / (1024 * 1024):.1f} MB of page text"
+    if stats["skipped"] or stats["truncated"]:
+        text += (
+            f"; {stats['skipped']} non-text responses skipped and {stats['truncated']} pages cut off at the size limit, "
+            f"saving at least {stats['skipped_bytes'] / (1024 * 1024):.1f} MB"
+        )
+    return text + "."
+
+
+def format_duration(seconds):
+    return f"{seconds * 1000:.0f}ms" if seconds < 1 else f"{seconds:.1f}s"
+
+
+def format_timing_stats(stats):
+    if not stats or not stats["pages"]:
+        return ""
+    phases = stats["phases"]
+    timings = ", ".join(
+        f"{PHASE_NAMES[phase]} {format_duration(values['p50'])}/{format_duration(values['p95'])}"
+        for phase, values in phases.items()
+        if values["count"]
+    )
+    text = f"\nPage timings (median/95th percentile): {timings}."
+    network = sum(phases[phase]["sum"] for phase in NETWORK_PHASES)
+    total = network + sum(values["sum"] for phase, values in phases.items() if phase not in NETWORK_PHASES)
+    if total:
+        text += f" {percentage(network, total):.0f}% of page time was network, the rest parsing and counting."
+    if stats["bytes"]["count"]:
+        text += f" Page size {stats['bytes']['p50'] / 1024:.0f} KB/{stats['bytes']['p95'] / 1024:.0f} KB."
+    statuses = ", ".join(f"{status} x{count}" for status, count in stats["statuses"].items())
+    return text + f" Statuses: {statuses}."
+
+
+def format_cache_stats(stats):
+    if not stats:
+        return ""
+    return (
+        f"\nCache: {stats['hits']} pages reused, {stats['revalidated']} unchanged after rechecking, "
+        f"{stats['misses']} downloaded."
+    )
+
+
+def format_corpus_stats(stats):
+    if not stats:
+        return ""
+    return f"\nStored the text of {stats['pages']} pages for recounting ({stats['stored_bytes'] / (1024 * 1024):.1f} MB compressed)."
+
+
+def format_recount_stats(stats):
+    if not stats:
+        return ""
+    started = datetime.fromtimestamp(stats["started_at"]).strftime("%Y-%m-%d %H:%M")
+    return (
+        f"\nRecounted {stats['pages']} pages stored by the run started {started}, without fetching. "
+        f"The index ruled out {stats['pages'] - stats['scanned']}, so {stats['scanned']} were scanned."
+    )
+
+
+def format_sitemap_stats(stats):
+    if not stats:
+        return ""
+    text = (
+        f"\nSitemaps: {stats['found']} pages listed in {stats['sitemaps']} sitemaps, {stats['queued']} queued"
+    )
+    if stats["too_old"]:
+        text += f", {stats['too_old']} entries older than the age limit skipped"
+    if stats["failed"]:
+        text += f", {stats['failed']} sitemaps missing or unreadable"
+    return text + "."
+
+
+def format_robots_stats(stats):
+    if not stats:
+        return ""
+    return f"\nrobots.txt: read for {stats['hosts']} hosts, {stats['blocked']} pages it disallows skipped."
+
+
+def format_frontier_stats(stats):
+    if not stats:
+        return ""
+    return (
+        f"\nCrawl queue: {stats['queued']} URLs queued ({stats['pending']} not crawled), "
+        f"{stats['duplicates']} duplicate links and {stats['too_deep']} links past the depth limit skipped."
+    )
+
+
+def format_duplicate_stats(stats):
+    if not stats:
+        return ""
+    action = "skipped" if stats["mode"] == "skip" else "flagged"
+    return (
+        f"\nNear-duplicates: {stats['duplicates']} of {stats['checked']} pages {action} as within "
+        f"{stats['distance']} bits of a page already crawled, and their links not followed."
+    )
+
+
+def format_scope_stats(stats):
+    if not stats:
+        return ""
+    text = (
+        f"\nScope: {stats['pages']} pages from {stats['hosts']} hosts, "
+        f"{stats['out_of_scope']} out-of-scope links and {stats['over_host_budget']} pages over the per-host limit skipped."
+    )
+    if stats["stop_reason"]:
+        text += f" Stopped early: {stats['stop_reason']}."
+    return text
+
+
+def format_queue_stats(stats):
+    if not stats:
+        return ""
+    text = (
+        f"\nQueue: {stats['done']} pages crawled, {stats['failed']} failed and {stats['skipped']} skipped by "
+        f"{len(stats['workers'])} workers, {stats['queued']} still queued, "
+        f"{stats['over_host_budget']} over the per-host limit."
+    )
+    if stats["requeued"]:
+        text += f" {stats['requeued']} leases ran out and were re-queued."
+    return text
+
+
+def format_host_stats(stats):
+    if not stats:
+        return ""
+    total_wait = sum(host["waited"] for host in stats.values())
+    total_retries = sum(host["retries"] for host in stats.values())
+    slowest = ", ".join(
+        f"{host} {host_stats['waited']:.1f}s" for host, host_stats in list(stats.items())[:3]
+    )
+    return (
+        f"\nHost waits: {total_wait:.1f}s waiting on rate limits and backoff, {total_retries} retries. "
+        f"Longest: {slowest}."
+    )
@@ -0,0 +1,171 @@
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from counts import CountMatrix
+
+
+URL_COLUMN = 0
+TOTAL_COLUMN = 1
+FIRST_TERM_COLUMN = 2
+
+
+class ResultsTableModel(QAbstractTableModel):
+    """The results table: one row per URL with its total and a column per search term.
+
+    The model reads straight from a ``CountMatrix``, so the table view only
+    asks for the cells that are on screen and a long crawl costs nothing
+    to display beyond the counts themselves. Which matrix rows are shown,
+    and in what order, is kept as an index array, so sorting and filtering
+    by URL, term and count are NumPy operations over the whole matrix rather
+    than a call back into Python per row. Results arriving while the table is
+    filtered or sorted are checked against the filter and slotted into place.
+    NumPy is only loaded once the first results arrive, not when the window opens.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.matrix = CountMatrix()
+        self._rows = ()  # The matrix row shown on each table row, a NumPy array once there are results
+        self._url_filter = ""
+        self._term = None  # Filter on one term's count instead of the total
+        self._min_count = 0
+        self._sort_column = -1  # -1 keeps the order the results arrived in
+        self._sort_order = Qt.AscendingOrder
+
+    def reset(self, terms=()):
+        """Clear the table for a new run."""
+        self.beginResetModel()
+        self.matrix = CountMatrix(terms)
+        self._rows = ()
+        self.endResetModel()
+
+    def add_results(self, results):
+        """Append ``(url, {term: count})`` results, showing those that pass the filter."""
+        import numpy as np
+
+        start = len(self.matrix)
+        term_count = len(self.matrix.terms)
+        for url, term_counts in results:
+            self.matrix.add(url, term_counts)
+        if len(self.matrix.terms) != term_count:
+            # A term without a column yet, so the columns change too
+            self.refresh()
+            return
+
+        new_rows = self._matching(np.arange(start, len(self.matrix), dtype=np.int64))
+        if not len(new_rows):
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(new_rows) - 1)
+        self._rows = np.concatenate([self._rows, new_rows]) if len(self._rows) else new_rows
+        self.endInsertRows()
+        if self._sort_column >= 0:
+            self._reorder(self._sorted(self._rows))
+
+    def set_filter(self, url_text="", term=None, min_count=0):
+        """Show URLs containing ``url_text`` that have at least ``min_count`` of ``term``.
+
+        With no term the count is each URL's total. Picking a term also hides
+        URLs where it wasn't found at all.
+        """
+        self._url_filter = url_text.strip().lower()
+        self._term = term
+        self._min_count = min_count
+        self.refresh()
+
+    def refresh(self):
+        """Rebuild the shown rows from the whole matrix."""
+        import numpy as np
+
+        self.beginResetModel()
+        self._rows = self._sorted(self._matching(np.arange(len(self.matrix), dtype=np.int64)))
+        self.endResetModel()
+
+    def url(self, row):
+        return self.matrix.urls[self._rows[row]]
+
+    def _matching(self, rows):
+        import numpy as np
+
+        term_column = self.matrix.terms.index(self._term) if self._term in self.matrix.terms else None
+        min_count = max(self._min_count, 1) if term_column is not None else self._min_count
+        if min_count:
+            rows = rows[self._values(rows, term_column) >= min_count]
+        if self._url_filter:
+            urls = self.matrix.urls
+            rows = np.array([row for row in rows.tolist() if self._url_filter in urls[row].lower()], dtype=np.int64)
+        return rows
+
+    def _values(self, rows, term_column):
+        import numpy as np
+
+        counts = self.matrix.counts
+        if term_column is None:
+            return counts[rows].sum(axis=1, dtype=np.int64)
+        return counts[rows, term_column]
+
+    def _sorted(self, rows):
+        if self._sort_column < 0 or not len(rows):
+            return rows
+        import numpy as np
+
+        descending = self._sort_order == Qt.DescendingOrder
+        if self._sort_column == URL_COLUMN:
+            urls = self.matrix.urls
+            return np.array(sorted(rows.tolist(), key=urls.__getitem__, reverse=descending), dtype=np.int64)
+        term_column = None if self._sort_column == TOTAL_COLUMN else self._sort_column - FIRST_TERM_COLUMN
+        values = self._values(rows, term_column)
+        # Negating keeps ties in arrival order when sorting largest first
+        return rows[np.argsort(-values if descending else values, kind="stable")]
+
+    def _reorder(self, rows):
+        # Same rows in a new order, so the view keeps its scroll position and selection
+        import numpy as np
+
+        self.layoutAboutToBeChanged.emit()
+        positions = np.zeros(len(self.matrix), dtype=np.int64)
+        positions[rows] = np.arange(len(rows))
+        old_indexes = self.persistentIndexList()
+        new_indexes = [
+            self.index(int(positions[self._rows[index.row()]]), index.column()) for index in old_indexes
+        ]
+        self._rows = rows
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self._sort_column = column
+        self._sort_order = order
+        if len(self._rows):
+            self._reorder(self._sorted(self._rows))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else FIRST_TERM_COLUMN + len(self.matrix.terms)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = index.column()
+        if role == Qt.DisplayRole:
+            row = self._rows[index.row()]
+            if column == URL_COLUMN:
+                return self.matrix.urls[row]
+            if column == TOTAL_COLUMN:
+                return int(self.matrix.counts[row].sum())
+            return int(self.matrix.counts[row, column - FIRST_TERM_COLUMN])
+        if role == Qt.TextAlignmentRole and column != URL_COLUMN:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        if role == Qt.ToolTipRole and column == URL_COLUMN:
+            return "Double-click to open this page in your browser."
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or orientation != Qt.Horizontal:
+            return None
+        if section == URL_COLUMN:
+            return "URL"
+        if section == TOTAL_COLUMN:
+            return "Total"
+        return self.matrix.terms[section - FIRST_TERM_COLUMN]
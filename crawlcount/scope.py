@@ -0,0 +1,120 @@
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+
+SCOPE_RULES = ("any", "same-domain", "same-registrable-domain", "allowlist")
+DEFAULT_SCOPE = "any"
+
+# Common public suffixes with two labels. Not the full public suffix list,
+# but enough to treat bbc.co.uk and abc.net.au as one registrable domain.
+TWO_LABEL_SUFFIXES = {
+    "co.uk", "org.uk", "gov.uk", "ac.uk", "ltd.uk", "plc.uk", "me.uk", "net.uk", "nhs.uk", "police.uk",
+    "com.au", "net.au", "org.au", "edu.au", "gov.au",
+    "co.nz", "org.nz", "govt.nz",
+    "co.jp", "ne.jp", "or.jp", "ac.jp", "go.jp",
+    "co.in", "net.in", "org.in", "gov.in",
+    "com.br", "net.br", "org.br", "gov.br",
+    "com.cn", "net.cn", "org.cn", "gov.cn",
+    "co.za", "org.za", "gov.za",
+    "com.mx", "com.ar", "com.tr", "com.sg", "com.hk", "com.tw", "co.kr", "or.kr", "co.il",
+}
+
+
+def host_of(url):
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def budget_host(url):
+    # Per-host budgets count pages the way HostScheduler rate-limits them, so each port is its own host
+    return urlsplit(url).netloc.lower()
+
+
+def registrable_domain(host):
+    """Return the registrable part of a host name, e.g. news.bbc.co.uk -> bbc.co.uk."""
+    labels = host.split(".")
+    if len(labels) <= 2:
+        return host
+    if ".".join(labels[-2:]) in TWO_LABEL_SUFFIXES:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+class CrawlScope:
+    """Decides which links a deep crawl may follow and when it must stop.
+
+    ``rule`` limits links to the seed hosts ("same-domain"), to the seeds'
+    registrable domains ("same-registrable-domain"), or to the hosts in
+    ``allowlist`` and their subdomains ("allowlist"). ``max_pages_per_host``,
+    ``max_pages`` and ``time_limit`` (seconds) are budgets where 0 means
+    unlimited. Once the page budget or the time limit runs out the crawl
+    stops and keeps its partial results.
+    """
+
+    def __init__(self, rule=DEFAULT_SCOPE, allowlist=(), max_pages_per_host=0, max_pages=0, time_limit=0):
+        if rule not in SCOPE_RULES:
+            raise ValueError(f"Unknown crawl scope '{rule}'. Choose from: {', '.join(SCOPE_RULES)}.")
+        self.rule = rule
+        self.allowlist = {host_of("//" + host.strip()) for host in allowlist if host.strip()}
+        self.max_pages_per_host = max_pages_per_host
+        self.max_pages = max_pages
+        self.time_limit = time_limit
+        self.started = time.monotonic()
+        self.seed_hosts = set()
+        self.seed_domains = set()
+        self.pages = 0
+        self.pages_per_host = Counter()
+        self.out_of_scope = 0
+        self.over_host_budget = 0
+        self.stop_reason = None
+
+    def add_seed(self, url):
+        host = host_of(url)
+        self.seed_hosts.add(host)
+        self.seed_domains.add(registrable_domain(host))
+
+    def allows(self, url):
+        """Whether a discovered link is inside the crawl scope."""
+        if self.rule == "any":
+            return True
+        host = host_of(url)
+        if self.rule == "same-domain":
+            allowed = host in self.seed_hosts
+        elif self.rule == "same-registrable-domain":
+            allowed = registrable_domain(host) in self.seed_domains
+        else:
+            allowed = host in self.seed_hosts or any(
+                host == allowed_host or host.endswith("." + allowed_host) for allowed_host in self.allowlist
+            )
+        if not allowed:
+            self.out_of_scope += 1
+        return allowed
+
+    def can_fetch(self, url):
+        """Whether the URL's host still has page budget left."""
+        if self.max_pages_per_host and self.pages_per_host[budget_host(url)] >= self.max_pages_per_host:
+            self.over_host_budget += 1
+            return False
+        return True
+
+    def record_page(self, url):
+        self.pages += 1
+        self.pages_per_host[budget_host(url)] += 1
+
+    def exhausted(self):
+        """Whether the page budget or time limit has run out. Sets ``stop_reason``."""
+        if self.max_pages and self.pages >= self.max_pages:
+            self.stop_reason = f"page budget of {self.max_pages} reached"
+        elif self.time_limit and time.monotonic() - self.started >= self.time_limit:
+            self.stop_reason = f"time limit of {self.time_limit:g}s reached"
+        return self.stop_reason is not None
+
+    def stats(self):
+        return {
+            "pages": self.pages,
+            "hosts": len(self.pages_per_host),
+            "out_of_scope": self.out_of_scope,
+            "over_host_budget": self.over_host_budget,
+            "stop_reason": self.stop_reason,
+        }
@@ -0,0 +1,118 @@
+import csv
+import json
+import os
+import time
+from collections import Counter
+from datetime import datetime
+
+
+RESULT_FORMATS = ("csv", "jsonl")
+DEFAULT_RESULTS_DIR = os.path.join(os.path.expanduser("~"), ".crawlcount", "results")
+DEFAULT_FLUSH_INTERVAL = 1.0  # Seconds between flushes to disk
+DEFAULT_KEEP_RESULTS = 20  # Results files kept in the results folder, oldest deleted first
+
+CSV_FIELDS = ["URL", "Search Term", "Count"]
+
+
+def format_from_path(path):
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension not in RESULT_FORMATS:
+        raise ValueError(f"Unsupported results file '{path}'. Use a .csv or .jsonl file.")
+    return extension
+
+
+def new_results_path(directory=DEFAULT_RESULTS_DIR, format="jsonl", keep=DEFAULT_KEEP_RESULTS):
+    """A fresh timestamped results file name for one run.
+
+    Older results files in ``directory`` are deleted so that, with the new
+    one, at most ``keep`` are left.
+    """
+    os.makedirs(directory, exist_ok=True)
+    # The timestamped names sort oldest first
+    old = sorted(name for name in os.listdir(directory) if name.startswith("crawlcount-"))
+    for name in old[: max(0, len(old) - keep + 1)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            # Still open in another window, or already gone
+            pass
+    return os.path.join(directory, f"crawlcount-{datetime.now():%Y%m%d-%H%M%S-%f}.{format}")
+
+
+class ResultWriter:
+    """Writes each URL's term counts to disk as soon as they are produced.
+
+    CSV files use the same URL, Search Term, Count layout as Download CSV.
+    JSONL files hold one ``{"url": ..., "counts": {...}}`` object per line.
+    Rows are flushed at most every ``flush_interval`` seconds, so a crash
+    loses at most that much work and memory use doesn't grow with the run.
+    """
+
+    def __init__(self, path, format=None, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.format = format or format_from_path(path)
+        self.flush_interval = flush_interval
+        self.urls = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        if self.format == "csv":
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(CSV_FIELDS)
+        self._last_flush = time.monotonic()
+
+    def write(self, url, term_counts):
+        if self.format == "csv":
+            self._writer.writerows([url, term, count] for term, count in term_counts.items())
+        else:
+            self._file.write(json.dumps({"url": url, "counts": dict(term_counts)}) + "\n")
+        self.urls += 1
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_results(path):
+    """Yield ``(url, Counter)`` pairs from a results file written by ResultWriter.
+
+    A truncated last line, left by a crash mid-write, is ignored.
+    """
+    format = format_from_path(path)
+    with open(path, "r", newline="", encoding="utf-8") as results_file:
+        if format == "jsonl":
+            for line in results_file:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                yield row["url"], Counter(row["counts"])
+            return
+
+        url, counts = None, Counter()
+        for row in csv.DictReader(results_file):
+            if row["URL"] != url:
+                if url is not None:
+                    yield url, counts
+                url, counts = row["URL"], Counter()
+            try:
+                counts[row["Search Term"]] = int(row["Count"])
+            except (TypeError, ValueError):
+                continue
+        if url is not None:
+            yield url, counts
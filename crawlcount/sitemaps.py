@@ -0,0 +1,170 @@
+import io
+import zlib
+from collections import deque
+from datetime import datetime, timezone
+from urllib.parse import urljoin, urlsplit
+
+
+DISCOVERY_MODES = ("links", "sitemaps", "both")
+DEFAULT_DISCOVERY = "links"
+DEFAULT_MAX_SITEMAPS = 1000  # Sitemap files read per crawl, indexes included
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024  # The sitemap protocol's limit for one uncompressed file
+ROBOTS_AGENT = "CrawlCount"  # Matched against User-agent lines, so rules for * apply
+
+
+def site_root(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def parse_lastmod(text):
+    """Parse a W3C datetime such as 2024-05-01 or 2024-05-01T09:30:00+01:00.
+
+    Returns an aware datetime, in UTC when no offset was given, or None if
+    the value can't be read.
+    """
+    text = (text or "").strip()
+    if not text:
+        return None
+    try:
+        value = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def decompress(body):
+    """Unzip a gzip sitemap (sitemap.xml.gz) and cap any sitemap at ``MAX_SITEMAP_BYTES``."""
+    if body[:2] != b"\x1f\x8b":
+        return body[:MAX_SITEMAP_BYTES]
+    return zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(body, MAX_SITEMAP_BYTES)
+
+
+def local_name(tag):
+    # Drop the XML namespace, e.g. {http://www.sitemaps.org/schemas/sitemap/0.9}loc -> loc
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_sitemap(body):
+    """Yield ``(kind, loc, lastmod)`` for each entry of a sitemap or sitemap index.
+
+    ``kind`` is "url" for a page and "sitemap" for another sitemap listed
+    in an index. Entries are read as the XML is parsed and dropped once
+    yielded, so a large sitemap isn't held as a tree.
+    """
+    from xml.etree import ElementTree
+
+    for _, element in ElementTree.iterparse(io.BytesIO(decompress(body)), events=("end",)):
+        kind = local_name(element.tag)
+        if kind not in ("url", "sitemap"):
+            continue
+        loc = lastmod = None
+        for child in element:
+            name = local_name(child.tag)
+            if name == "loc":
+                loc = (child.text or "").strip()
+            elif name == "lastmod":
+                lastmod = parse_lastmod(child.text)
+        element.clear()
+        if loc:
+            yield kind, loc, lastmod
+
+
+class RobotsCache:
+    """Each host's robots.txt, fetched and parsed the first time the host comes up.
+
+    ``fetch`` takes a URL and returns ``(status, body)``: the HTTP status,
+    or None if there was no response, and the body as bytes, or None if it
+    couldn't be downloaded. As with ``RobotFileParser.read``, a robots.txt
+    refused with 401 or 403 disallows everything, while a missing or
+    unreadable one allows everything.
+    """
+
+    def __init__(self, fetch, agent=ROBOTS_AGENT):
+        self.fetch = fetch
+        self.agent = agent
+        self._rules = {}
+        self.blocked = 0
+
+    def rules(self, url):
+        root = site_root(url)
+        parser = self._rules.get(root)
+        if parser is None:
+            # robotparser pulls in urllib.request, so it is only loaded once a crawl needs it
+            from urllib.robotparser import RobotFileParser
+
+            parser = RobotFileParser(root + "/robots.txt")
+            status, body = self.fetch(root + "/robots.txt")
+            if status in (401, 403):
+                parser.disallow_all = True
+            else:
+                parser.parse(body.decode("utf-8", "replace").splitlines() if body else [])
+            self._rules[root] = parser
+        return parser
+
+    def allowed(self, url):
+        if self.rules(url).can_fetch(self.agent, url):
+            return True
+        self.blocked += 1
+        return False
+
+    def sitemaps(self, url):
+        """The sitemaps the host's robots.txt lists, if any."""
+        return self.rules(url).site_maps() or []
+
+    def stats(self):
+        return {"hosts": len(self._rules), "blocked": self.blocked}
+
+
+class SitemapReader:
+    """Finds pages from each site's sitemaps instead of by following links.
+
+    The sitemaps come from each starting host's robots.txt, falling back to
+    /sitemap.xml, and sitemap indexes are followed to the sitemaps they
+    list, gzipped or not. With ``since`` (an aware datetime) pages and
+    sitemaps whose lastmod is older are skipped; entries without a lastmod
+    are kept. At most ``max_sitemaps`` files are read.
+    """
+
+    def __init__(self, fetch, robots, since=None, max_sitemaps=DEFAULT_MAX_SITEMAPS):
+        self.fetch = fetch
+        self.robots = robots
+        self.since = since
+        self.max_sitemaps = max_sitemaps
+        self.read = 0
+        self.failed = 0
+        self.found = 0
+        self.too_old = 0
+
+    def discover(self, urls):
+        """Yield ``(url, lastmod)`` for each page in the sitemaps of the hosts of ``urls``."""
+        pending = deque()
+        for root in dict.fromkeys(site_root(url) for url in urls):
+            pending.extend(self.robots.sitemaps(root) or [root + "/sitemap.xml"])
+
+        seen = set()
+        while pending and self.read < self.max_sitemaps:
+            sitemap = pending.popleft()
+            if sitemap in seen:
+                continue
+            seen.add(sitemap)
+            self.read += 1
+            _, body = self.fetch(sitemap)
+            if body is None:
+                self.failed += 1
+                continue
+            try:
+                for kind, loc, lastmod in parse_sitemap(body):
+                    if self.since is not None and lastmod is not None and lastmod < self.since:
+                        self.too_old += 1
+                    elif kind == "sitemap":
+                        pending.append(urljoin(sitemap, loc))
+                    else:
+                        self.found += 1
+                        yield urljoin(sitemap, loc), lastmod
+            except (SyntaxError, zlib.error):  # ElementTree.ParseError is a SyntaxError
+                # Keep the entries read before the sitemap turned out to be broken or cut short
+                self.failed += 1
+
+    def stats(self):
+        return {"sitemaps": self.read, "failed": self.failed, "found": self.found, "too_old": self.too_old}
@@ -0,0 +1,64 @@
+import builtins
+import sys
+import time
+from importlib.util import resolve_name
+
+
+class ImportProfiler:
+    """Times imports for ``--profile-startup``.
+
+    Once installed, every module imported for the first time is timed,
+    including the imports it triggers in turn. ``report()`` lists the
+    slowest ones with their nesting depth, which points at the import
+    statements worth deferring, and how long the window took to appear.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports = []  # (seconds, depth, name) in the order they finished
+        self.window_shown = None
+        self._depth = 0
+        self._import = builtins.__import__
+
+    def install(self):
+        builtins.__import__ = self._timed_import
+        return self
+
+    def uninstall(self):
+        builtins.__import__ = self._import
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        module = name
+        if level > 0:
+            # A relative import names its module from the importing package, and may leave name empty
+            package = (globals or {}).get("__package__") or ""
+            try:
+                module = resolve_name("." * level + name, package)
+            except (ImportError, ValueError):
+                module = name
+        if module in sys.modules:
+            return self._import(name, globals, locals, fromlist, level)
+        start = time.perf_counter()
+        self._depth += 1
+        try:
+            return self._import(name, globals, locals, fromlist, level)
+        finally:
+            self._depth -= 1
+            self.imports.append((time.perf_counter() - start, self._depth, module))
+
+    def mark_window_shown(self):
+        self.window_shown = time.perf_counter() - self.started
+        self.uninstall()
+
+    def report(self, limit=20):
+        top_level = sum(seconds for seconds, depth, _ in self.imports if depth == 0)
+        lines = [
+            "Startup profile",
+            f"  Imports at startup: {top_level:.3f}s ({len(self.imports)} modules)",
+        ]
+        if self.window_shown is not None:
+            lines.append(f"  Window shown after: {self.window_shown:.3f}s")
+        lines.append("Slowest imports (seconds including nested imports, indented by depth):")
+        for seconds, depth, name in sorted(self.imports, reverse=True)[:limit]:
+            lines.append(f"  {seconds:8.3f}  {'  ' * depth}{name}")
+        return "\n".join(lines)
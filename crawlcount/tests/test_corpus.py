@@ -0,0 +1,108 @@
+import random
+from collections import Counter
+
+import pytest
+
+from corpus import PageCorpus
+from matcher import TermMatcher
+
+PAGES = {
+    "http://host.test/housing": "Housing benefit and the housing-benefit cap. Council housing.",
+    "http://host.test/benefits": "Benefits, unhousing and rehousing; the council's councillors.",
+    "http://host.test/strasse": "Die Straße und die STRASSE. Maßnahmen.",
+    "http://host.test/code": "Written in C++ and c#, not in C.",
+    "http://host.test/empty": "",
+    "http://host.test/nothing": "Nothing to see here at all.",
+    "http://host.test/split": "house holding, household, householder and a house hold.",
+}
+TERMS = [
+    "housing",
+    "housing benefit",
+    "benefit",
+    "using ben",
+    "council",
+    "councillor",
+    "Straße",
+    "strasse",
+    "c++",
+    "hold",
+    "house hold",
+    "household",
+    "ouseho",
+    "not here",
+]
+
+
+def full_rescan(pages, matcher):
+    return {url: matcher.count(text) for url, text in pages.items()}
+
+
+def stored(tmp_path, pages):
+    corpus = PageCorpus(str(tmp_path / "corpus.sqlite3"))
+    corpus.start_run(["anything"])
+    for url, text in pages.items():
+        corpus.add(url, text)
+    return corpus
+
+
+@pytest.mark.parametrize("case_sensitive", [False, True])
+@pytest.mark.parametrize("whole_words", [False, True])
+def test_indexed_recount_matches_a_full_rescan(tmp_path, case_sensitive, whole_words):
+    corpus = stored(tmp_path, PAGES)
+    try:
+        matcher = TermMatcher(TERMS, case_sensitive=case_sensitive, whole_words=whole_words)
+        recounted = dict(corpus.recount(matcher, corpus.run_id))
+        assert recounted == full_rescan(PAGES, matcher)
+        # The index did rule pages out, so the comparison tested the narrowing
+        assert corpus.scanned < len(PAGES)
+    finally:
+        corpus.close()
+
+
+def test_recount_after_reopening_and_recrawling(tmp_path):
+    corpus = stored(tmp_path, PAGES)
+    corpus.close()
+
+    corpus = PageCorpus(str(tmp_path / "corpus.sqlite3"))
+    try:
+        corpus.start_run(["anything"])
+        # A re-crawled page keeps stale postings for the words it no longer has
+        pages = dict(PAGES)
+        pages["http://host.test/housing"] = "Nothing about that any more."
+        pages["http://host.test/new"] = "council"
+        for url, text in pages.items():
+            corpus.add(url, text)
+        matcher = TermMatcher(TERMS)
+        assert dict(corpus.recount(matcher, corpus.run_id)) == full_rescan(pages, matcher)
+    finally:
+        corpus.close()
+
+
+def test_recount_of_random_pages_never_misses_a_match(tmp_path):
+    rng = random.Random(7)
+    vocabulary = ["house", "household", "holding", "hold", "council", "councils", "benefit", "housing", "the", "a"]
+    separators = [" ", ", ", "-", "_", ". ", ""]
+    pages = {}
+    for number in range(300):
+        words = rng.choices(vocabulary, k=rng.randint(0, 30))
+        pages[f"http://host.test/{number}"] = "".join(word + rng.choice(separators) for word in words)
+    corpus = stored(tmp_path, pages)
+    try:
+        for whole_words in (False, True):
+            terms = ["house hold", "household", "usehol", "council", "s bene", "housing-benefit"]
+            matcher = TermMatcher(terms, whole_words=whole_words)
+            assert dict(corpus.recount(matcher, corpus.run_id)) == full_rescan(pages, matcher)
+    finally:
+        corpus.close()
+
+
+def test_terms_without_words_scan_every_page(tmp_path):
+    corpus = stored(tmp_path, PAGES)
+    try:
+        matcher = TermMatcher(["++", "."])
+        assert dict(corpus.recount(matcher, corpus.run_id)) == full_rescan(PAGES, matcher)
+        assert corpus.scanned == len(PAGES)
+        recounted = dict(corpus.recount(TermMatcher(["council"]), corpus.run_id))
+        assert recounted["http://host.test/empty"] == Counter({"council": 0})
+    finally:
+        corpus.close()
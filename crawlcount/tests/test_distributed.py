@@ -0,0 +1,188 @@
+import threading
+from collections import Counter
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from distributed import FAILED, IGNORED, SKIPPED, CrawlWorker, SqliteQueue, job_matrix, start_job
+from engine import CrawlSettings, RunControl
+
+JOB = "test"
+CONFIG = {"urls": [], "search_terms": ["council"], "settings": {}, "deadline": 0}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = SqliteQueue(str(tmp_path / "queue.sqlite3"))
+    queue.now = Clock()
+    queue.create_job(JOB, CONFIG)
+    yield queue
+    queue.close()
+
+
+def states(queue):
+    with queue._transaction() as db:
+        return dict(db.execute("SELECT url, state FROM work WHERE job = ?", (JOB,)))
+
+
+def test_claim_and_complete(queue):
+    assert queue.add(JOB, [("http://a.test/1", 0), ("http://a.test/2", 0), ("http://a.test/1", 1)]) == 2
+    claimed = queue.claim(JOB, "w1", 10, lease=30)
+    assert claimed == [("http://a.test/1", 0), ("http://a.test/2", 0)]
+    assert queue.claim(JOB, "w2", 10, lease=30) == []
+
+    added = queue.complete(
+        JOB,
+        "w1",
+        [("http://a.test/1", Counter(council=2)), ("http://a.test/2", None)],
+        [("http://a.test/3", 1), ("http://a.test/1", 1)],
+    )
+    assert added == 1
+    status = queue.status(JOB)
+    assert (status["done"], status["failed"], status["queued"], status["leased"]) == (1, 1, 1, 0)
+    assert list(queue.results(JOB)) == [("http://a.test/1", Counter(council=2))]
+
+
+def test_expired_lease_is_requeued_for_another_worker(queue):
+    queue.add(JOB, [("http://a.test/1", 0)])
+    assert queue.claim(JOB, "w1", 1, lease=30) == [("http://a.test/1", 0)]
+
+    queue.now.now += 20
+    assert queue.heartbeat(JOB, "w1", ["http://a.test/1"], lease=30) == 1
+    queue.now.now += 20
+    # The heartbeat moved the expiry on, so the lease still holds
+    assert queue.claim(JOB, "w2", 1, lease=30) == []
+
+    queue.now.now += 31
+    assert queue.claim(JOB, "w2", 1, lease=30) == [("http://a.test/1", 0)]
+    assert queue.heartbeat(JOB, "w1", ["http://a.test/1"], lease=30) == 0
+    assert queue.status(JOB)["requeued"] == 1
+
+
+def test_late_complete_from_expired_holder_keeps_the_first_result(queue):
+    queue.add(JOB, [("http://a.test/1", 0)])
+    queue.claim(JOB, "w1", 1, lease=30)
+    queue.now.now += 31
+    queue.claim(JOB, "w2", 1, lease=30)
+
+    queue.complete(JOB, "w2", [("http://a.test/1", Counter(council=1))], [])
+    queue.complete(JOB, "w1", [("http://a.test/1", Counter(council=5))], [])
+    assert list(queue.results(JOB)) == [("http://a.test/1", Counter(council=1))]
+    assert queue.claim(JOB, "w3", 1, lease=30) == []
+    assert queue.status(JOB)["done"] == 1
+
+
+def test_late_complete_takes_a_requeued_url_out_of_the_queue(queue):
+    queue.add(JOB, [("http://a.test/1", 0)])
+    queue.claim(JOB, "w1", 1, lease=30)
+    queue.now.now += 31
+    assert queue.requeue_expired(JOB) == 1
+
+    queue.complete(JOB, "w1", [("http://a.test/1", Counter(council=1))], [])
+    assert queue.claim(JOB, "w2", 1, lease=30) == []
+    assert queue.status(JOB)["done"] == 1
+
+
+def test_release_gives_leases_back_straight_away(queue):
+    queue.add(JOB, [("http://a.test/1", 0), ("http://a.test/2", 0)])
+    queue.claim(JOB, "w1", 2, lease=30)
+    queue.release(JOB, "w2", ["http://a.test/1"])
+    assert queue.status(JOB)["leased"] == 2
+
+    queue.release(JOB, "w1", ["http://a.test/1", "http://a.test/2"])
+    assert queue.claim(JOB, "w2", 2, lease=30) == [("http://a.test/1", 0), ("http://a.test/2", 0)]
+    assert queue.status(JOB)["requeued"] == 0
+
+
+def test_per_host_budget_skips_rather_than_fails(queue):
+    queue.add(JOB, [("http://a.test/1", 0), ("http://a.test/2", 0), ("http://a.test/3", 0), ("http://b.test/1", 0)])
+    claimed = queue.claim(JOB, "w1", 10, lease=30, max_pages_per_host=2)
+    assert claimed == [("http://a.test/1", 0), ("http://a.test/2", 0), ("http://b.test/1", 0)]
+    assert states(queue)["http://a.test/3"] == SKIPPED
+
+    status = queue.status(JOB)
+    assert (status["failed"], status["skipped"], status["over_host_budget"]) == (0, 0, 1)
+
+
+def test_pages_the_worker_skips_are_not_failures(queue):
+    queue.add(JOB, [("http://a.test/1", 0), ("http://a.test/2", 0)])
+    queue.claim(JOB, "w1", 2, lease=30)
+    queue.complete(JOB, "w1", [("http://a.test/1", None)], [], skipped=["http://a.test/2"])
+    assert states(queue) == {"http://a.test/1": FAILED, "http://a.test/2": IGNORED}
+    status = queue.status(JOB)
+    assert (status["done"], status["failed"], status["skipped"]) == (0, 1, 1)
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def site(tmp_path):
+    pages = {
+        "index.html": '<p>The council met.</p><a href="a.html">a</a><a href="b.html">b</a>',
+        "a.html": "<p>The council and the council again.</p>",
+        "b.html": "<p>Nothing here.</p>",
+    }
+    for name, body in pages.items():
+        (tmp_path / name).write_text(f"<html><body>{body}</body></html>", encoding="utf-8")
+    handler = partial(QuietHandler, directory=str(tmp_path))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_worker_started_before_the_coordinator(tmp_path, site):
+    queue = SqliteQueue(str(tmp_path / "queue.sqlite3"))
+    overrides = {"use_cache": False, "host_rate": 0}
+    worker = CrawlWorker(queue, "late", overrides=overrides, poll_interval=0.05, job_wait=30)
+    results = []
+    thread = threading.Thread(target=lambda: results.append(worker.run()))
+    thread.start()
+    try:
+        threading.Event().wait(0.3)
+        assert thread.is_alive()
+        settings = CrawlSettings(max_depth=1, use_cache=False, host_rate=0)
+        assert start_job(queue, "late", [f"{site}/index.html"], ["council"], settings)
+        thread.join(timeout=30)
+        assert not thread.is_alive()
+        assert results[0]["pages"] == 3
+        matrix = job_matrix(queue, "late")
+        totals = dict(zip(matrix.urls, matrix.row_totals().tolist()))
+        assert totals == {f"{site}/index.html": 1, f"{site}/a.html": 2, f"{site}/b.html": 0}
+    finally:
+        queue.close()
+
+
+def test_worker_gives_up_when_the_job_never_appears(tmp_path):
+    queue = SqliteQueue(str(tmp_path / "queue.sqlite3"))
+    try:
+        worker = CrawlWorker(queue, "missing", poll_interval=0.01, job_wait=0.05)
+        with pytest.raises(ValueError, match="no job 'missing'"):
+            worker.run()
+
+        control = RunControl()
+        control.cancel()
+        result = CrawlWorker(queue, "missing", control=control, job_wait=30).run()
+        assert result["cancelled"] and result["pages"] == 0
+    finally:
+        queue.close()
+
+
+def test_the_same_page_spelled_differently_is_queued_once(queue):
+    assert queue.add(JOB, [("http://a.test/dir/", 0)]) == 1
+    assert queue.add(JOB, [("http://A.test/dir#top", 1), ("http://a.test/dir?utm_source=x", 1)]) == 0
+    assert queue.claim(JOB, "w1", 10, lease=30) == [("http://a.test/dir/", 0)]
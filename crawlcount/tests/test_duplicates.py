@@ -0,0 +1,98 @@
+import random
+
+import pytest
+
+from duplicates import DEFAULT_DUPLICATE_SIMILARITY, NearDuplicateIndex, max_distance, simhash
+
+VOCABULARY = [f"word{index}" for index in range(3000)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+TEMPLATE = "Home News Sport Business Weather Contact us Privacy Cookies Subscribe to our newsletter".split()
+
+
+def story(rng, words=800):
+    # Word frequencies roughly follow Zipf's law, as in real text, inside a shared site template
+    return " ".join(TEMPLATE + rng.choices(VOCABULARY, WEIGHTS, k=words) + TEMPLATE)
+
+
+def edit(rng, text, share):
+    words = text.split()
+    body = range(len(TEMPLATE), len(words) - len(TEMPLATE))
+    for index in rng.sample(body, max(1, int(len(body) * share))):
+        words[index] = rng.choice(VOCABULARY)
+    return " ".join(words)
+
+
+def distance(first, second):
+    return bin(first ^ second).count("1")
+
+
+def test_default_allows_five_bits():
+    # Pinned so the threshold can't drift without these tests being revisited
+    assert max_distance(DEFAULT_DUPLICATE_SIMILARITY) == 5
+    assert max_distance(1.0) == 0
+    assert max_distance(0.5) == 32
+
+
+def test_exact_duplicates_have_the_same_fingerprint():
+    text = story(random.Random(1))
+    assert simhash(text) == simhash(text)
+    # Only the words count, not case, punctuation or spacing
+    assert simhash(text) == simhash("  " + text.upper().replace(" ", ",\n  "))
+    assert simhash("") is None and simhash("  ...  ") is None
+
+
+def test_exact_duplicate_is_flagged():
+    index = NearDuplicateIndex()
+    text = story(random.Random(2))
+    assert index.find_or_add("http://host.test/a", simhash(text)) is None
+    assert index.find_or_add("http://host.test/a-print", simhash(text)) == "http://host.test/a"
+    assert index.stats() == {"checked": 2, "duplicates": 1, "distance": 5}
+
+
+def test_pages_with_one_word_in_a_hundred_edited_are_mostly_flagged():
+    rng = random.Random(3)
+    flagged = 0
+    for _ in range(40):
+        index = NearDuplicateIndex()
+        original = story(rng)
+        index.find_or_add("http://host.test/original", simhash(original))
+        flagged += index.find_or_add("http://host.test/edited", simhash(edit(rng, original, 0.01))) is not None
+    assert flagged >= 24
+
+
+def test_page_with_a_corrected_sentence_is_flagged():
+    original = story(random.Random(4))
+    words = original.split()
+    words[400:408] = "The council has since said the figure".split()
+    index = NearDuplicateIndex()
+    index.find_or_add("http://host.test/story", simhash(original))
+    assert index.find_or_add("http://host.test/story-corrected", simhash(" ".join(words))) == "http://host.test/story"
+
+
+def test_unrelated_pages_sharing_a_template_are_not_flagged():
+    rng = random.Random(5)
+    index = NearDuplicateIndex()
+    for number in range(200):
+        fingerprint = simhash(story(rng, words=rng.randint(200, 1500)))
+        assert index.find_or_add(f"http://host.test/{number}", fingerprint) is None
+    assert index.duplicates == 0
+
+
+@pytest.mark.parametrize("similarity", [0.99, DEFAULT_DUPLICATE_SIMILARITY, 0.85])
+def test_bands_find_every_fingerprint_within_the_distance(similarity):
+    rng = random.Random(6)
+    limit = max_distance(similarity)
+    for _ in range(50):
+        fingerprint = rng.getrandbits(64)
+        flipped = rng.sample(range(64), limit + 1)
+        near = far = fingerprint
+        for bit in flipped[:limit]:
+            near ^= 1 << bit
+        for bit in flipped:
+            far ^= 1 << bit
+
+        index = NearDuplicateIndex(similarity)
+        index.find_or_add("http://host.test/original", fingerprint)
+        assert index.find_or_add("http://host.test/near", near) == "http://host.test/original"
+        assert distance(far, fingerprint) == limit + 1
+        assert index.find_or_add("http://host.test/far", far) is None
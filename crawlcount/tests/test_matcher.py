@@ -0,0 +1,95 @@
+import re
+from collections import Counter
+
+import pytest
+
+from matcher import TermMatcher
+
+
+def reference_count(text, term, case_sensitive=False, whole_words=False):
+    # What the regex-per-term counting did: non-overlapping matches, left to right
+    if not case_sensitive:
+        text, term = text.casefold(), term.casefold()
+    pattern = re.escape(term)
+    if whole_words:
+        if re.match(r"\w", term):
+            pattern = r"(?<!\w)" + pattern
+        if re.search(r"\w$", term):
+            pattern += r"(?!\w)"
+    return len(re.findall(pattern, text))
+
+
+TEXTS = [
+    "The council met the Council of councillors. COUNCIL!",
+    "aaaa aa a",
+    "she sells seashells; he shells hers",
+    "housing-benefit and housing_benefit and housing benefit",
+    "Die Straße, die STRASSE und die strasse. Maße, MASSE.",
+    "Éclair, éclair, ÉCLAIRS. İstanbul istanbul",
+    "naïve naive NAÏVE; über ÜBER uber",
+    "",
+]
+TERMS = [
+    "council",
+    "councillors",
+    "aa",
+    "a",
+    "she",
+    "he",
+    "shells",
+    "hers",
+    "housing",
+    "housing benefit",
+    "benefit",
+    "Straße",
+    "masse",
+    "éclair",
+    "naïve",
+    "über",
+    "c++",
+    "-benefit",
+]
+
+
+@pytest.mark.parametrize("case_sensitive", [False, True])
+@pytest.mark.parametrize("whole_words", [False, True])
+def test_counts_match_the_regex_reference(case_sensitive, whole_words):
+    matcher = TermMatcher(TERMS, case_sensitive=case_sensitive, whole_words=whole_words)
+    for text in TEXTS:
+        counts = matcher.count(text)
+        for term in TERMS:
+            key = term if case_sensitive else term.casefold()
+            assert counts[key] == reference_count(text, term, case_sensitive, whole_words), (text, term)
+
+
+def test_overlapping_terms_and_repeats():
+    matcher = TermMatcher(["aa", "a", "aaa"])
+    # Each term counts without overlapping itself, like str.count, while different terms overlap freely
+    assert matcher.count("aaaa") == Counter({"aa": 2, "a": 4, "aaa": 1})
+    assert TermMatcher(["she", "he", "hers"]).count("ushers") == Counter({"she": 1, "he": 1, "hers": 1})
+
+
+def test_whole_words():
+    matcher = TermMatcher(["council", "c++"], whole_words=True)
+    assert matcher.count("council, councils, town-council, council_tax") == Counter({"council": 2, "c++": 0})
+    assert matcher.count("c++ and c++11 and xc++") == Counter({"council": 0, "c++": 2})
+
+
+def test_case():
+    assert TermMatcher(["Council"]).count("council COUNCIL Council") == Counter({"council": 3})
+    assert TermMatcher(["Council"], case_sensitive=True).count("council COUNCIL Council") == Counter({"Council": 1})
+
+
+def test_non_ascii_terms_are_casefolded_on_both_sides():
+    matcher = TermMatcher(["Straße", "STRASSE", "ÉCLAIR"])
+    # "Straße" and "STRASSE" casefold to the same term, so it is counted once
+    assert matcher.terms == ["strasse", "éclair"]
+    assert matcher.count("Die Straße, die STRASSE, éclair") == Counter({"strasse": 2, "éclair": 1})
+    assert TermMatcher(["straße"], case_sensitive=True).count("Straße straße strasse") == Counter({"straße": 1})
+
+
+def test_terms_are_stripped_deduplicated_and_kept_in_order():
+    matcher = TermMatcher(["  housing ", "Council", "HOUSING", "", "   "])
+    assert matcher.terms == ["housing", "council"]
+    assert matcher.count_vector("Council housing") == [1, 1]
+    assert TermMatcher([]).count("anything") == Counter()
@@ -0,0 +1,140 @@
+import pytest
+
+from frontier import BloomFilter, Frontier
+from scope import CrawlScope
+from urls import is_crawlable, normalize_url
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("http://host.test/a?utm_source=x&utm_medium=y&id=3&fbclid=z&gclid=1", "http://host.test/a?id=3"),
+        ("http://host.test/a?UTM_Campaign=x&ref=home", "http://host.test/a"),
+        ("http://host.test/a?b=2&a=1&a=0", "http://host.test/a?a=0&a=1&b=2"),
+        ("http://host.test/a?empty=", "http://host.test/a?empty="),
+        ("http://host.test/a#section", "http://host.test/a"),
+        ("http://host.test/a/?x=1#top", "http://host.test/a?x=1"),
+        ("HTTP://Host.TEST:80/Path", "http://host.test/Path"),
+        ("https://host.test:443/a", "https://host.test/a"),
+        ("http://host.test:443/a", "http://host.test:443/a"),
+        ("https://host.test:8443/a", "https://host.test:8443/a"),
+        ("http://host.test", "http://host.test/"),
+        ("http://host.test/", "http://host.test/"),
+        ("http://host.test/dir/", "http://host.test/dir"),
+        ("  http://host.test/a  ", "http://host.test/a"),
+    ],
+)
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+@pytest.mark.parametrize(
+    "url, crawlable",
+    [
+        ("http://host.test/a", True),
+        ("https://host.test", True),
+        ("mailto:someone@host.test", False),
+        ("javascript:void(0)", False),
+        ("ftp://host.test/file", False),
+        ("http:///no-host", False),
+        ("/relative/path", False),
+    ],
+)
+def test_is_crawlable(url, crawlable):
+    assert is_crawlable(url) is crawlable
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("http://[::1]:8080/a", "http://[::1]:8080/a"),
+        ("http://[::1]:80/a", "http://[::1]/a"),
+        ("HTTP://[2001:DB8::1]/a", "http://[2001:db8::1]/a"),
+        ("http://user:pw@Host.test/a", "http://user:pw@host.test/a"),
+        ("https://User@host.test:443/a", "https://User@host.test/a"),
+    ],
+)
+def test_normalize_url_keeps_ipv6_brackets_and_user_info(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_frontier_queues_the_url_as_linked():
+    frontier = Frontier(max_depth=2)
+    assert frontier.add("http://Example.test/dir/?b=2&a=1&utm_source=x#top", 0) == (
+        "http://Example.test/dir/?b=2&a=1&utm_source=x"
+    )
+    assert frontier.add("http://[::1]:8080/a", 0) == "http://[::1]:8080/a"
+    assert frontier.add("http://user:pw@host.test/a", 0) == "http://user:pw@host.test/a"
+    assert list(frontier.queue) == [
+        ("http://Example.test/dir/?b=2&a=1&utm_source=x", 0),
+        ("http://[::1]:8080/a", 0),
+        ("http://user:pw@host.test/a", 0),
+    ]
+
+    # The same pages spelled differently are still only queued once
+    assert frontier.add("http://example.test/dir?a=1&b=2", 1) is None
+    assert frontier.add("http://[::1]:8080/a/", 1) is None
+    assert frontier.duplicates == 2
+
+
+def test_restore_recognises_saved_urls_however_they_were_spelled():
+    frontier = Frontier()
+    frontier.restore([("http://host.test/b/", 1)], ["http://host.test/a/", "http://host.test/b/"])
+    assert frontier.add("http://host.test/a", 0) is None
+    assert frontier.add("http://HOST.test/b#x", 0) is None
+    assert list(frontier.queue) == [("http://host.test/b/", 1)]
+
+
+@pytest.mark.parametrize("bloom_filter", [False, True])
+def test_frontier_add_dedupes_on_the_normalized_url(bloom_filter):
+    frontier = Frontier(max_depth=3, bloom_filter=bloom_filter, bloom_capacity=1000)
+    assert frontier.add("http://host.test/a?id=1", 0) == "http://host.test/a?id=1"
+    for variant in (
+        "http://host.test/a?id=1#part",
+        "http://HOST.test:80/a/?id=1",
+        "http://host.test/a?utm_source=feed&id=1",
+    ):
+        assert frontier.add(variant, 1) is None
+    assert frontier.add("http://host.test/a?id=2", 1) == "http://host.test/a?id=2"
+    assert frontier.add("https://host.test/a?id=1", 1) == "https://host.test/a?id=1"
+    assert frontier.stats() == {"queued": 3, "pending": 3, "duplicates": 3, "too_deep": 0, "rejected": 0}
+
+
+def test_frontier_add_refuses_links_past_the_depth_limit_and_uncrawlable_ones():
+    frontier = Frontier(max_depth=1)
+    assert frontier.add("http://host.test/", 0) is not None
+    assert frontier.add("http://host.test/one", 1) is not None
+    assert frontier.add("http://host.test/two", 2) is None
+    assert frontier.add("mailto:someone@host.test", 1) is None
+    stats = frontier.stats()
+    assert (stats["queued"], stats["too_deep"], stats["rejected"]) == (2, 1, 1)
+    # A URL refused for its depth isn't marked as seen, so a shorter path to it still counts
+    assert frontier.add("http://host.test/two", 1) is not None
+
+
+def test_frontier_add_leaves_out_of_scope_links():
+    scope = CrawlScope("same-domain")
+    scope.add_seed("http://host.test/")
+    frontier = Frontier(scope=scope)
+    assert frontier.add("http://other.test/a", 0) is None
+    assert frontier.add("http://host.test/a", 0) == "http://host.test/a"
+    assert frontier.stats()["queued"] == 1
+
+
+def test_frontier_pops_in_the_order_urls_were_found():
+    frontier = Frontier(max_depth=2)
+    frontier.add("http://host.test/a", 0)
+    frontier.add("http://host.test/b", 1)
+    assert frontier.pop() == ("http://host.test/a", 0)
+    assert len(frontier) == 1
+
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(capacity=2000, error_rate=0.01)
+    added = [f"http://host.test/page/{index}" for index in range(2000)]
+    for url in added:
+        bloom.add(url)
+    assert all(url in bloom for url in added)
+    false_positives = sum(f"http://other.test/page/{index}" in bloom for index in range(10000))
+    assert false_positives < 300
+    assert len(bloom) == 2000
@@ -0,0 +1,73 @@
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Query parameters that only track where a visitor came from
+TRACKING_PARAMS = {
+    "fbclid",
+    "gclid",
+    "dclid",
+    "msclkid",
+    "mc_cid",
+    "mc_eid",
+    "igshid",
+    "ocid",
+    "cmpid",
+    "ref",
+    "ref_src",
+    "_ga",
+}
+TRACKING_PREFIXES = ("utm_",)
+
+
+def is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def normalize_url(url):
+    """Return a canonical form of a URL for use as a cache or dedup key.
+
+    The scheme and host are lower-cased, default ports, the fragment and
+    tracking parameters are dropped, the remaining query parameters are
+    sorted, an empty path becomes "/" and other paths lose their trailing
+    slash. User info and IPv6 brackets are kept. The key is only for
+    comparing URLs: servers may treat "/dir" and "/dir/" differently, so
+    pages are fetched at the URL they were linked as.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = normalize_netloc(parts.netloc, scheme)
+
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+
+    query = [
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not is_tracking_param(name)
+    ]
+    return urlunsplit((scheme, netloc, path, urlencode(sorted(query)), ""))
+
+
+def normalize_netloc(netloc, scheme):
+    """Lower-case the host of ``netloc`` and drop a default port, keeping user info and IPv6 brackets."""
+    userinfo, at, host = netloc.rpartition("@")
+    if host.startswith("["):
+        # An IPv6 address, whose colons aren't the port separator
+        address, _, port = host.partition("]")
+        host, port = address + "]", port[1:]
+    else:
+        host, _, port = host.partition(":")
+    host = host.lower()
+    if port and port != str(DEFAULT_PORTS.get(scheme)):
+        host = f"{host}:{port}"
+    return f"{userinfo}{at}{host}"
+
+
+def is_crawlable(url):
+    """Only http and https pages can be fetched, not mailto:, javascript: and so on."""
+    parts = urlsplit(url)
+    return parts.scheme in DEFAULT_PORTS and bool(parts.hostname)